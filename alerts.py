@@ -0,0 +1,299 @@
+import json
+import os
+import subprocess
+import time
+from collections import deque
+from datetime import datetime
+
+from schedule_upload import scheduled_state
+
+FLOAT_LOW_AFTER = 10 * 60       # seconds a float switch must read low before alerting
+OVERHEAT_WINDOW = 15 * 60       # seconds averaged by the temperature rules
+SCHEDULE_GRACE = 2 * 60         # seconds a relay may disagree with the schedule
+OVERRIDE_DURATION = 5 * 60      # overrideDuration in the firmware; the schedule pauses this long
+
+
+class WindowMean:
+    """Mean of the samples from the last `window` seconds.
+
+    Each sample is added once and removed once, so updates are amortised
+    O(1) and memory is bounded by the window, not by history.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = deque()
+        self._sum = 0.0
+
+    def add(self, value, now):
+        self._samples.append((now, value))
+        self._sum += value
+        while now - self._samples[0][0] > self.window:
+            self._sum -= self._samples.popleft()[1]
+
+    def mean(self):
+        return self._sum / len(self._samples) if self._samples else None
+
+    def span(self):
+        return self._samples[-1][0] - self._samples[0][0] if self._samples else 0
+
+
+class Rule:
+    """Base rule. evaluate() returns True to fire, False to clear, or None to keep the current state.
+
+    Returning None between the fire and clear conditions is what gives a
+    rule hysteresis.
+    """
+
+    inputs = "sensors"  # which updates the rule consumes: "sensors" or "relays"
+
+    def __init__(self, name, message, severity="warning"):
+        self.name = name
+        self.message = message  # formatted with value=
+        self.severity = severity
+        self.value = None       # last observed value, for the alert text
+
+    def evaluate(self, state, now):
+        raise NotImplementedError
+
+    def describe(self):
+        return self.message.format(value=self.value)
+
+
+class DurationRule(Rule):
+    """Fire when a condition has held for `duration` seconds; clear once it has been false for `clear_after`."""
+
+    def __init__(self, name, message, condition, duration, clear_after=60, inputs="sensors", severity="warning"):
+        super().__init__(name, message, severity)
+        self.condition = condition  # condition(state) -> (bool or None, value)
+        self.duration = duration
+        self.clear_after = clear_after
+        self.inputs = inputs
+        self._true_since = None
+        self._false_since = None
+
+    def evaluate(self, state, now):
+        holds, self.value = self.condition(state)
+        if holds is None:
+            return None  # No data: neither fire nor clear
+        if holds:
+            self._false_since = None
+            self._true_since = self._true_since if self._true_since is not None else now
+            return True if now - self._true_since >= self.duration else None
+        self._true_since = None
+        self._false_since = self._false_since if self._false_since is not None else now
+        return False if now - self._false_since >= self.clear_after else None
+
+
+class WindowMeanRule(Rule):
+    """Fire when a sensor's windowed mean crosses `trigger`; clear when it crosses back past `clear`."""
+
+    def __init__(self, name, message, field, trigger, clear, window=OVERHEAT_WINDOW, above=True,
+                 min_coverage=0.8, severity="warning"):
+        super().__init__(name, message, severity)
+        self.field = field
+        self.trigger = trigger
+        self.clear = clear
+        self.above = above
+        self.min_coverage = min_coverage  # fraction of the window that must hold samples
+        self._window = WindowMean(window)
+
+    def evaluate(self, state, now):
+        value = state["sensors"].get(self.field)
+        if value is None:
+            return None
+        self._window.add(value, now)
+        if self._window.span() < self.min_coverage * self._window.window:
+            return None
+        mean = self._window.mean()
+        self.value = round(mean, 1)
+        if self.above:
+            return True if mean > self.trigger else (False if mean < self.clear else None)
+        return True if mean < self.trigger else (False if mean > self.clear else None)
+
+
+class ScheduleMismatchRule(DurationRule):
+    """Fire when RSTATE disagrees with the uploaded schedule table for longer than `grace`.
+
+    Manual overrides pause the firmware schedule, so the rule is silent
+    until OVERRIDE_DURATION after the last one.
+    """
+
+    def __init__(self, code, entries, grace=SCHEDULE_GRACE):
+        self.code = code
+        self.entries = entries
+        self.override_until = 0.0
+        super().__init__(
+            f"schedule_mismatch_{code.lower()}",
+            f"{code} is {{value}} but the schedule disagrees",
+            self._mismatch, grace, clear_after=0, inputs="relays",
+        )
+
+    def _mismatch(self, state):
+        actual = state["relays"].get(self.code)
+        if actual is None or time.monotonic() < self.override_until:
+            return None, None
+        now = datetime.now()
+        expected = scheduled_state(self.entries, self.code, now.hour * 3600 + now.minute * 60 + now.second)
+        if expected is None:
+            return None, None
+        return bool(actual) != expected, "ON" if actual else "OFF"
+
+
+def default_rules(schedule_entries=None):
+    """Float, temperature and (when a schedule table is given) relay-vs-schedule rules."""
+    def float_low(field):
+        def condition(state):
+            value = state["sensors"].get(field)
+            return (None, None) if value is None else (value == 0, value)
+        return condition
+
+    rules = [
+        DurationRule("float_top_low", "Top reservoir float has been low for over 10 minutes",
+                     float_low("float_top"), FLOAT_LOW_AFTER, severity="critical"),
+        DurationRule("float_bottom_low", "Bottom reservoir float has been low for over 10 minutes",
+                     float_low("float_bottom"), FLOAT_LOW_AFTER, severity="critical"),
+        WindowMeanRule("indoor_overheat", "Indoor temperature averaged {value}°C over 15 minutes",
+                       "temp_indoor", trigger=32.0, clear=30.0, severity="critical"),
+        WindowMeanRule("indoor_cold", "Indoor temperature averaged {value}°C over 15 minutes",
+                       "temp_indoor", trigger=8.0, clear=10.0, above=False),
+        WindowMeanRule("water_top_hot", "Top water temperature averaged {value}°C over 15 minutes",
+                       "water_temp_top", trigger=28.0, clear=26.0),
+        WindowMeanRule("water_bottom_hot", "Bottom water temperature averaged {value}°C over 15 minutes",
+                       "water_temp_bottom", trigger=28.0, clear=26.0),
+    ]
+    for code in ("LT", "LB", "PT", "PB"):
+        if schedule_entries and any(entry[0] == code for entry in schedule_entries):
+            rules.append(ScheduleMismatchRule(code, schedule_entries))
+    return rules
+
+
+class AlertEngine:
+    """Evaluate rules as samples arrive and notify sinks on state changes.
+
+    An alert notifies once when it starts firing and once when it resolves;
+    while it keeps firing it is only repeated every REMIND_AFTER seconds.
+    Sinks are any callables taking the event dict.
+    """
+
+    REMIND_AFTER = 6 * 60 * 60
+
+    def __init__(self, rules, sinks=()):
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self.active = {}  # rule name -> event dict of the firing alert
+        self._last_notified = {}
+        self._state = {"sensors": {}, "relays": {}}
+        self.counters = {"evaluations": 0, "fired": 0, "resolved": 0, "reminders": 0}
+
+    def update_sensors(self, sensors, now=None):
+        self._state["sensors"] = sensors or {}
+        self._evaluate("sensors", now)
+
+    def update_relays(self, relays, now=None):
+        """relays: {device code: 0/1} as returned by parse_relay_state."""
+        self._state["relays"] = relays or {}
+        self._evaluate("relays", now)
+
+    def note_override(self):
+        """A manual command was sent; the firmware pauses its schedule for a while."""
+        for rule in self.rules:
+            if isinstance(rule, ScheduleMismatchRule):
+                rule.override_until = time.monotonic() + OVERRIDE_DURATION
+
+    def _evaluate(self, inputs, now):
+        now = time.monotonic() if now is None else now
+        for rule in self.rules:
+            if rule.inputs != inputs:
+                continue
+            self.counters["evaluations"] += 1
+            try:
+                result = rule.evaluate(self._state, now)
+            except Exception as e:
+                print(f"⚠ Alert rule {rule.name} failed: {e}")
+                continue
+
+            if result is True:
+                if rule.name not in self.active:
+                    self.active[rule.name] = self._event(rule, "firing")
+                    self.counters["fired"] += 1
+                    self._notify(rule.name, self.active[rule.name], now)
+                elif now - self._last_notified[rule.name] >= self.REMIND_AFTER:
+                    self.counters["reminders"] += 1
+                    self._notify(rule.name, dict(self._event(rule, "firing"), reminder=True), now)
+            elif result is False and rule.name in self.active:
+                del self.active[rule.name]
+                self.counters["resolved"] += 1
+                self._notify(rule.name, self._event(rule, "resolved"), now)
+
+    def _event(self, rule, state):
+        return {
+            "rule": rule.name,
+            "state": state,
+            "severity": rule.severity,
+            "message": rule.describe(),
+            "value": rule.value,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def _notify(self, name, event, now):
+        self._last_notified[name] = now
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception as e:
+                print(f"⚠ Alert sink error: {e}")
+
+    def stats(self):
+        return dict(self.counters, active=sorted(self.active))
+
+
+# --- Sinks ----------------------------------------------------------------
+
+def print_sink(event):
+    icon = "✅" if event["state"] == "resolved" else "🚨"
+    print(f"{icon} [ALERT] {event['rule']} {event['state']}: {event['message']}")
+
+
+class LogSink:
+    """Append each event as a JSON line to a log (a RotatingLog or anything with write(text))."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def __call__(self, event):
+        self.log.write(json.dumps(event) + "\n")
+
+
+class ActiveAlertsFile:
+    """Keep a JSON file listing the alerts currently firing, for the dashboard and uploader."""
+
+    def __init__(self, path):
+        self.path = path
+        self.active = {}
+
+    def __call__(self, event):
+        if event["state"] == "resolved":
+            self.active.pop(event["rule"], None)
+        else:
+            self.active[event["rule"]] = event
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump({"updated": datetime.now().isoformat(), "active": list(self.active.values())}, f)
+        os.replace(self.path + ".tmp", self.path)
+
+
+class CommandSink:
+    """Run a local command (e.g. a mail or push script) with the event as JSON on stdin."""
+
+    def __init__(self, command):
+        self.command = command
+        self._running = []
+
+    def __call__(self, event):
+        # Not waited for, so a slow notifier never blocks the controller; finished ones are reaped here
+        self._running = [p for p in self._running if p.poll() is None]
+        process = subprocess.Popen(self.command, shell=True, stdin=subprocess.PIPE)
+        process.stdin.write(json.dumps(event).encode())
+        process.stdin.close()
+        self._running.append(process)
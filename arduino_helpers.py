@@ -1,18 +1,121 @@
+import os
+import re
 import serial
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from serial.tools import list_ports
+
+# USB vendor/product IDs of genuine Arduino boards and the usual clone USB-serial chips.
+# A product ID of None matches any product from that vendor.
+ARDUINO_USB_IDS = [
+    (0x2341, None),    # Arduino SA
+    (0x2A03, None),    # Arduino.org
+    (0x1A86, 0x7523),  # CH340
+    (0x0403, 0x6001),  # FTDI FT232R
+    (0x10C4, 0xEA60),  # Silicon Labs CP210x
+]
+# Only probed when no port matches the IDs above (e.g. list_ports lacks USB info)
+FALLBACK_PORTS = ["/dev/ttyACM0", "/dev/ttyACM1", "/dev/ttyUSB0", "/dev/ttyUSB1"]
+LAST_PORT_CACHE = os.path.expanduser("~/.hydromonitor_last_port")
+BAUD_RATE = 9600
+# Long enough for boards that reset when the port is opened to boot and answer
+HANDSHAKE_TIMEOUT = 3.5
+PING_INTERVAL = 0.5
+
+def find_candidate_ports():
+    """Return serial ports whose USB IDs look like an Arduino."""
+    candidates = []
+    try:
+        for info in list_ports.comports():
+            if info.vid is None:
+                continue
+            for vid, pid in ARDUINO_USB_IDS:
+                if info.vid == vid and (pid is None or info.pid == pid):
+                    candidates.append(info.device)
+                    break
+    except Exception as e:
+        print(f"⚠ Could not list serial ports: {e}")
+
+    if not candidates:
+        candidates = [port for port in FALLBACK_PORTS if os.path.exists(port)]
+    return candidates
+
+def load_last_port():
+    try:
+        with open(LAST_PORT_CACHE) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def save_last_port(port):
+    try:
+        with open(LAST_PORT_CACHE, "w") as f:
+            f.write(port)
+    except OSError as e:
+        print(f"⚠ Could not cache Arduino port: {e}")
+
+def probe_port(port, timeout=HANDSHAKE_TIMEOUT):
+    """Open a port and return it only if the device answers PING with PING_OK."""
+    try:
+        arduino = serial.Serial(port, BAUD_RATE, timeout=0.1)
+    except Exception:
+        return None
+
+    try:
+        deadline = time.monotonic() + timeout
+        next_ping = 0
+        while time.monotonic() < deadline:
+            if time.monotonic() >= next_ping:
+                arduino.write(b"PING\n")
+                next_ping = time.monotonic() + PING_INTERVAL
+            response = arduino.readline().decode(errors="ignore").strip()
+            if response == "PING_OK":
+                arduino.timeout = 2  # Timeout the listeners expect
+                return arduino
+    except Exception:
+        pass
+
+    arduino.close()
+    return None
+
+def _close_probe_result(future):
+    arduino = future.result()
+    if arduino:
+        arduino.close()
 
 def connect_to_arduino():
-    """Scan available ports and attempt to connect to the Arduino."""
-    POSSIBLE_PORTS = ["/dev/ttyACM0", "/dev/ttyACM1", "/dev/ttyUSB0", "/dev/ttyUSB1"]
-    
-    for port in POSSIBLE_PORTS:
+    """Find the Arduino: try the last good port, then probe the other candidates in parallel."""
+    candidates = find_candidate_ports()
+
+    cached_port = load_last_port()
+    if cached_port:
+        arduino = probe_port(cached_port)
+        if arduino:
+            print(f"✅ Connected to Arduino on {cached_port}")
+            return arduino
+        candidates = [port for port in candidates if port != cached_port]
+
+    if candidates:
+        pool = ThreadPoolExecutor(max_workers=len(candidates))
+        futures = {pool.submit(probe_port, port): port for port in candidates}
+        winner = None
         try:
-            arduino = serial.Serial(port, 9600, timeout=2)
-            time.sleep(2)  # Allow time for initialization
+            for future in as_completed(futures):
+                if future.result():
+                    winner = future
+                    break
+        finally:
+            # Let slower probes finish in the background and close anything they opened
+            for future in futures:
+                if future is not winner:
+                    future.add_done_callback(_close_probe_result)
+            pool.shutdown(wait=False)
+
+        if winner:
+            port = futures[winner]
+            save_last_port(port)
             print(f"✅ Connected to Arduino on {port}")
-            return arduino
-        except Exception:
-            continue  # Try the next port
+            return winner.result()
 
     print("⚠ No Arduino found.")
     return None
@@ -76,3 +179,122 @@ def start_relay_state_listener(gui):
     import threading
     threading.Thread(target=listen_for_state, daemon=True).start()
 
+
+# Relay codes used in RSTATE messages and XX:ON/OFF commands, in report order
+RELAY_CODES = {
+    'LT': 'lights_top',
+    'LB': 'lights_bottom',
+    'PT': 'pump_top',
+    'PB': 'pump_bottom',
+    'FV': 'fan_vent',
+    'FC': 'fan_circ',
+    'HE': 'heater',
+}
+
+# Field order of SSTATE messages. The first temperature/humidity pair is from
+# the indoor DHT sensor, the second pair is from the outdoor DHT sensor.
+SENSOR_FIELDS = [
+    'temp_indoor', 'humid_indoor',
+    'temp_outdoor', 'humid_outdoor',
+    'water_temp_top', 'water_temp_bottom',
+    'float_top', 'float_bottom',
+]
+
+# Telemetry framing added by sendFrame() in the firmware: <payload>#<seq>*<xor hex>
+FRAME_PATTERN = re.compile(r"^(.*)#(\d{1,5})\*([0-9A-Fa-f]{2})$")
+SEQUENCE_MODULO = 65536
+
+def frame_checksum(text):
+    """XOR of all characters, as sendFrame() computes it over '<payload>#<seq>'."""
+    checksum = 0
+    for byte in text.encode(errors="replace"):
+        checksum ^= byte
+    return checksum
+
+def decode_frame(line):
+    """Split a framed line into (payload, seq, valid).
+
+    Unframed lines (replies, boot messages, older firmware) come back as
+    (line, None, True); a frame whose checksum does not match gives
+    valid=False.
+    """
+    match = FRAME_PATTERN.match(line)
+    if not match:
+        return line, None, True
+    payload, seq, checksum = match.groups()
+    valid = frame_checksum(f"{payload}#{seq}") == int(checksum, 16)
+    return payload, int(seq), valid
+
+def format_scene_command(relay_states):
+    """Build a batched SET: command from a {device_code: bool} dict."""
+    pairs = ",".join(f"{code}={1 if state else 0}" for code, state in relay_states.items())
+    return f"SET:{pairs}\n"
+
+# Telemetry stream codes used by RATE: and BURST:, with the message each one sends
+TELEMETRY_STREAMS = {'R': 'RSTATE', 'S': 'SSTATE', 'T': 'TIME'}
+
+def format_rate_command(intervals):
+    """Build a RATE: command from {stream code: interval in seconds}."""
+    pairs = ",".join(f"{code}={int(interval * 1000)}" for code, interval in intervals.items())
+    return f"RATE:{pairs}\n"
+
+def format_burst_command(duration, intervals):
+    """Build a BURST: command: the given intervals (seconds) for duration seconds."""
+    pairs = "".join(f",{code}={int(interval * 1000)}" for code, interval in intervals.items())
+    return f"BURST:{int(duration * 1000)}{pairs}\n"
+
+def parse_rate_reply(response):
+    """Parse RATE_OK:R=10000,S=10000,T=10000 into {stream code: seconds}, or None."""
+    if not response.startswith("RATE_OK:"):
+        return None
+    intervals = {}
+    for item in response.split(":", 1)[1].split(","):
+        code, _, value = item.partition("=")
+        if code in TELEMETRY_STREAMS and value.isdigit():
+            intervals[code] = int(value) / 1000
+    return intervals
+
+def parse_relay_state(response):
+    """Parse an RSTATE message into a {device_code: 0/1} dict, or None if malformed."""
+    if not response.startswith("RSTATE:"):
+        print(f"⚠ Warning: Unexpected message format: {response}")
+        return None
+
+    relay_states = {}
+    for item in response.split(":", 1)[1].split(","):
+        if "=" in item:
+            code, val = item.split("=")
+            relay_states[code.strip()] = int(val.strip())
+    return relay_states
+
+def _reading(text, convert):
+    """Convert one SSTATE field, or None for a non-numeric placeholder such as "--"."""
+    try:
+        return convert(text)
+    except ValueError:
+        return None
+
+def parse_sensor_state(response):
+    """Parse an SSTATE message into a dict keyed by SENSOR_FIELDS, or None if malformed.
+
+    A field that is not a number is None; the rest of the sample is kept.
+    """
+    if ":" not in response:
+        print(f"⚠ Incomplete or malformed message: {response}")
+        return None
+
+    sensor_values = response.split(":", 1)[1].split(",")
+    if len(sensor_values) != len(SENSOR_FIELDS):
+        print(f"⚠ Warning: Unexpected number of values in sensor update: {sensor_values}")
+        return None
+
+    return {
+        'temp_indoor': _reading(sensor_values[0], int),
+        'humid_indoor': _reading(sensor_values[1], int),
+        'temp_outdoor': _reading(sensor_values[2], int),
+        'humid_outdoor': _reading(sensor_values[3], int),
+        'water_temp_top': _reading(sensor_values[4], float),
+        'water_temp_bottom': _reading(sensor_values[5], float),
+        'float_top': _reading(sensor_values[6], int),
+        'float_bottom': _reading(sensor_values[7], int),
+    }
@@ -60,6 +60,7 @@ float getHeaterOffThreshold(float hour) {
 #include <DHT_U.h>
 #include <OneWire.h>
 #include <DallasTemperature.h>
+#include <EEPROM.h>
 
 OneWire oneWire1(ONE_WIRE_BUS_1);
 DallasTemperature sensor1(&oneWire1);
@@ -74,20 +75,76 @@ DHT dhtOutdoor(DHTPIN2, DHTTYPE);
 // Time tracking variables
 int hours = 0, minutes = 0, seconds = 0;
 unsigned long lastMillis = 0;
-unsigned long lastStateUpdate = 0;
 unsigned long lastSensorUpdate = 0;
 
-// Function to send the current time status
+// Telemetry streams and their report intervals, set by the Pi with RATE:
+// and temporarily with BURST:. Not stored, so a reset returns to 10 s.
+#define STREAM_COUNT 3
+const char* streamCodes[STREAM_COUNT] = {"R", "S", "T"};  // RSTATE, SSTATE, TIME
+unsigned long streamInterval[STREAM_COUNT] = {10000, 10000, 10000};
+// SSTATE reads the DHT11s, which give at most one new reading per second
+const unsigned long streamMinInterval[STREAM_COUNT] = {250, 1000, 250};
+const unsigned long streamMaxInterval = 3600000UL;  // 1 hour
+unsigned long streamLastSent[STREAM_COUNT] = {0, 0, 0};
+
+bool burstActive = false;
+unsigned long burstStart = 0;
+unsigned long burstDuration = 0;
+unsigned long burstInterval[STREAM_COUNT];
+const unsigned long maxBurstDuration = 5UL * 60 * 1000;  // 5 minutes
+
+// Schedule table uploaded by schedule_upload.py. When loaded it replaces the
+// built-in light and pump schedule for every device it lists.
+#define MAX_SCHEDULE_ENTRIES 32
+#define SCHEDULE_EEPROM_MAGIC 0x5C4E
+const char* scheduleDevices[] = {"LT", "LB", "PT", "PB"};
+const int scheduleDeviceCount = 4;
+
+struct ScheduleEntry {
+    uint8_t device;     // Index into scheduleDevices
+    uint32_t start;     // Seconds since midnight
+    uint32_t duration;  // Seconds
+};
+
+ScheduleEntry scheduleTable[MAX_SCHEDULE_ENTRIES];
+uint8_t scheduleCount = 0;
+// Uploads are built here and only replace scheduleTable on SCHED_COMMIT
+ScheduleEntry scheduleStaging[MAX_SCHEDULE_ENTRIES];
+uint8_t scheduleStagingCount = 0;
+
+// Telemetry lines go out as <payload>#<seq>*<xor>, where seq counts every
+// framed line since boot (wrapping at 65536) and xor is the XOR of all
+// characters before the '*' in two hex digits. The Pi uses them to count
+// lost, corrupted and reordered lines (link_stats.py).
+uint16_t frameSeq = 0;
+
+void sendFrame(const String& payload) {
+    String line = payload + "#" + String(frameSeq++);
+    uint8_t checksum = 0;
+    for (unsigned int i = 0; i < line.length(); i++) {
+        checksum ^= (uint8_t)line[i];
+    }
+    Serial.print(line);
+    Serial.print("*");
+    if (checksum < 0x10) Serial.print("0");
+    Serial.println(checksum, HEX);
+}
+
+String twoDigits(int value) {
+    return value < 10 ? "0" + String(value) : String(value);
+}
+
+// Function to send the current time status as TIME:HH:MM:SS.mmm
 void sendTimeStatus() {
-    Serial.print("TIME:");
-    if (hours < 10) Serial.print("0");
-    Serial.print(hours);
-    Serial.print(":");
-    if (minutes < 10) Serial.print("0");
-    Serial.print(minutes);
-    Serial.print(":");
-    if (seconds < 10) Serial.print("0");
-    Serial.println(seconds);
+    // Milliseconds into the current second, so the Pi can measure offset precisely
+    unsigned long ms = millis() - lastMillis;
+    if (ms > 999) ms = 999;
+
+    String line = "TIME:" + twoDigits(hours) + ":" + twoDigits(minutes) + ":" + twoDigits(seconds) + ".";
+    if (ms < 100) line += "0";
+    if (ms < 10) line += "0";
+    line += String(ms);
+    sendFrame(line);
 }
 
 // Manual override tracking
@@ -107,6 +164,18 @@ bool ventFanInCooldown = false;
 unsigned long ventFanCooldownStart = 0;
 const unsigned long ventFanCooldownDuration = 10 * 60 * 1000; // 10 minutes
 
+// Host climate control (climate_control.py). While the lease is held the Pi
+// decides heater and vent fan on/off via CTL:, without pausing the schedule;
+// the firmware still enforces the heater run cap and both cooldowns. If the
+// Pi goes quiet the lease lapses and the local logic takes over again.
+bool hostControlActive = false;
+unsigned long hostControlStart = 0;
+const unsigned long hostControlLease = 15UL * 60 * 1000; // 15 minutes
+
+bool hostClimateControl() {
+    return hostControlActive && millis() - hostControlStart < hostControlLease;
+}
+
 void activateOverride() {
     overrideActive = true;
     overrideEndTime = millis() + overrideDuration;
@@ -145,6 +214,8 @@ void setup() {
     delay(1000);
     sensor2.begin();
 
+    loadScheduleFromEeprom();
+
     Serial.println("Arduino is ready. Default time: 00:00. Running schedule.");
 }
 
@@ -152,6 +223,7 @@ void loop() {
     static unsigned long lastLoopTime = 0;
     if (millis() - lastLoopTime > 30000) {
         Serial.println("⚠ Loop took too long — resetting manually.");
+        Serial.flush();  // Let the warning reach the Pi before the reset cuts it off
         NVIC_SystemReset();  // Safe reset method on UNO R4
     }
     lastLoopTime = millis();
@@ -170,11 +242,19 @@ void loop() {
         }
     }
 
-    // Send relay state and time status every 10 seconds
-    if (currentMillis - lastStateUpdate >= 10000) {
-        lastStateUpdate = currentMillis;
-        sendRelayState();
-        sendTimeStatus();
+    // A burst reverts to the RATE: intervals once its duration is up
+    if (burstActive && currentMillis - burstStart >= burstDuration) {
+        burstActive = false;
+        Serial.println("BURST_END");
+    }
+
+    // Send each telemetry stream on its own interval
+    for (int i = 0; i < STREAM_COUNT; i++) {
+        unsigned long interval = burstActive ? burstInterval[i] : streamInterval[i];
+        if (currentMillis - streamLastSent[i] >= interval) {
+            streamLastSent[i] = currentMillis;
+            sendStream(i);
+        }
     }
 
     // If override has expired, return to schedule
@@ -192,7 +272,11 @@ void loop() {
             serialBuffer.trim();
             if (serialBuffer.length() > 0) {
                 handleCommand(serialBuffer);
-                sendRelayState();  // Send updated state immediately after a change
+                // Send updated state immediately after a change. Pure queries
+                // skip it so clock sync and link checks stay cheap and fast.
+                if (commandChangesState(serialBuffer)) {
+                    sendRelayState();
+                }
             }
             serialBuffer = "";
         } else {
@@ -201,21 +285,38 @@ void loop() {
     }
 }
 
+// Queries, rate changes and schedule upload steps answer for themselves;
+// everything else is followed by a full state report
+bool commandChangesState(String command) {
+    if (command == "PING" || command == "GET_TIME") return false;
+    if (command.startsWith("RATE") || command.startsWith("BURST:")) return false;
+    if (command.startsWith("SCHED_")) {
+        return command.startsWith("SCHED_COMMIT:") || command == "SCHED_CLEAR";
+    }
+    return true;
+}
+
 void sendRelayState() {
     sendRelayStatus();
     sendSensorStatus();
 }
 
+void sendStream(int stream) {
+    if (stream == 0) sendRelayStatus();
+    else if (stream == 1) sendSensorStatus();
+    else sendTimeStatus();
+}
+
 void sendRelayStatus() {
-    Serial.print("RSTATE:");
-    Serial.print("LT="); Serial.print(digitalRead(RELAY_LIGHTS_TOP) == LOW ? 1 : 0); Serial.print(",");
-    Serial.print("LB="); Serial.print(digitalRead(RELAY_LIGHTS_BOTTOM) == LOW ? 1 : 0); Serial.print(",");
-    Serial.print("PT="); Serial.print(digitalRead(RELAY_PUMP_TOP) == LOW ? 1 : 0); Serial.print(",");
-    Serial.print("PB="); Serial.print(digitalRead(RELAY_PUMP_BOTTOM) == LOW ? 1 : 0); Serial.print(",");
-    Serial.print("FV="); Serial.print(digitalRead(RELAY_VENT_FAN) == LOW ? 1 : 0); Serial.print(",");
-    Serial.print("FC="); Serial.print(digitalRead(RELAY_CIRCULATION_FAN) == LOW ? 1 : 0); Serial.print(",");
-    Serial.print("HE="); Serial.print(digitalRead(RELAY_HEATER) == LOW ? 1 : 0);
-    Serial.println();
+    String line = "RSTATE:";
+    line += "LT="; line += (digitalRead(RELAY_LIGHTS_TOP) == LOW ? 1 : 0); line += ",";
+    line += "LB="; line += (digitalRead(RELAY_LIGHTS_BOTTOM) == LOW ? 1 : 0); line += ",";
+    line += "PT="; line += (digitalRead(RELAY_PUMP_TOP) == LOW ? 1 : 0); line += ",";
+    line += "PB="; line += (digitalRead(RELAY_PUMP_BOTTOM) == LOW ? 1 : 0); line += ",";
+    line += "FV="; line += (digitalRead(RELAY_VENT_FAN) == LOW ? 1 : 0); line += ",";
+    line += "FC="; line += (digitalRead(RELAY_CIRCULATION_FAN) == LOW ? 1 : 0); line += ",";
+    line += "HE="; line += (digitalRead(RELAY_HEATER) == LOW ? 1 : 0);
+    sendFrame(line);
 }
 
 void sendSensorStatus() {
@@ -227,49 +328,70 @@ void sendSensorStatus() {
     if (isnan(waterTemp1)) waterTemp1 = -1;
     if (isnan(waterTemp2)) waterTemp2 = -1;
 
-    int temp1 = (int)dhtIndoor.readTemperature();
-    int humid1 = (int)dhtIndoor.readHumidity();
-    int temp2 = (int)dhtOutdoor.readTemperature();
-    int humid2 = (int)dhtOutdoor.readHumidity();
-
-    if (isnan(temp1)) temp1 = -1;
-    if (isnan(humid1)) humid1 = -1;
-    if (isnan(temp2)) temp2 = -1;
-    if (isnan(humid2)) humid2 = -1;
+    // A failed DHT read returns NaN; check before converting, since an int is never NaN
+    float readings[4] = {
+        dhtIndoor.readTemperature(), dhtIndoor.readHumidity(),
+        dhtOutdoor.readTemperature(), dhtOutdoor.readHumidity(),
+    };
+    int temp1 = isnan(readings[0]) ? -1 : (int)readings[0];
+    int humid1 = isnan(readings[1]) ? -1 : (int)readings[1];
+    int temp2 = isnan(readings[2]) ? -1 : (int)readings[2];
+    int humid2 = isnan(readings[3]) ? -1 : (int)readings[3];
 
     int floatTop = digitalRead(FLOAT_SENSOR_TOP) == LOW ? 1 : 0;
     int floatBottom = digitalRead(FLOAT_SENSOR_BOTTOM) == LOW ? 1 : 0;
 
-    Serial.print("SSTATE:");
-    Serial.print(temp1); Serial.print(",");
-    Serial.print(humid1); Serial.print(",");
-    Serial.print(temp2); Serial.print(",");
-    Serial.print(humid2); Serial.print(",");
-    Serial.print(waterTemp1, 1); Serial.print(",");
-    Serial.print(waterTemp2, 1); Serial.print(",");
-    Serial.print(floatTop); Serial.print(",");
-    Serial.println(floatBottom);
+    String line = "SSTATE:";
+    line += temp1; line += ",";
+    line += humid1; line += ",";
+    line += temp2; line += ",";
+    line += humid2; line += ",";
+    line += String(waterTemp1, 1); line += ",";
+    line += String(waterTemp2, 1); line += ",";
+    line += floatTop; line += ",";
+    line += floatBottom;
+    sendFrame(line);
 }
 
 // Function to process commands from the Raspberry Pi
 void handleCommand(String command) {
     if (command == "PING") {
         Serial.println("PING_OK");
+    } else if (command == "GET_TIME") {
+        sendTimeStatus();
+    } else if (command == "GET_STATE") {
+        // Nothing to do here: loop() sends the full state after every command,
+        // so handlers must not send their own
     } else if (command.startsWith("SET_TIME:")) {
         setTimeFromPi(command.substring(9));
         Serial.println("SET_TIME OK");
         Serial.println("Received time update command: " + command);
-        sendRelayState();
     } else if (command == "RESET_SCHEDULE") {  
         Serial.println("Schedule reset. Resuming automatic control.");
         activateOverride();
         runSchedule();
-        sendRelayState();  
     } else if (command.startsWith("LT:") || command.startsWith("LB:") || 
                command.startsWith("PT:") || command.startsWith("PB:") ||
                command.startsWith("FV:") || command.startsWith("FC:") ||
                command.startsWith("HE:")) {
         overrideDevice(command);
+    } else if (command.startsWith("SET:")) {
+        applyRelayScene(command.substring(4));
+    } else if (command.startsWith("CTL:")) {
+        applyHostControl(command.substring(4));
+    } else if (command.startsWith("SCHED_")) {
+        handleScheduleCommand(command);
+    } else if (command == "RATE?") {
+        sendRates();
+    } else if (command.startsWith("RATE:")) {
+        unsigned long intervals[STREAM_COUNT];
+        for (int i = 0; i < STREAM_COUNT; i++) intervals[i] = streamInterval[i];
+        if (parseStreamIntervals(command.substring(5), intervals)) {
+            for (int i = 0; i < STREAM_COUNT; i++) streamInterval[i] = intervals[i];
+            sendRates();
+        }
+    } else if (command.startsWith("BURST:")) {
+        handleBurstCommand(command.substring(6));
     } else {
         Serial.println("Unknown command: " + command);
     }
@@ -336,8 +458,368 @@ void overrideDevice(String command) {
     } else {
         Serial.println("Invalid state for " + deviceName + ": " + state);
     }
+}
+
+// Map a two-letter device code to its relay pin, or -1 if unknown
+int relayPinForCode(String code) {
+    if (code == "LT") return RELAY_LIGHTS_TOP;
+    if (code == "LB") return RELAY_LIGHTS_BOTTOM;
+    if (code == "PT") return RELAY_PUMP_TOP;
+    if (code == "PB") return RELAY_PUMP_BOTTOM;
+    if (code == "FV") return RELAY_VENT_FAN;
+    if (code == "FC") return RELAY_CIRCULATION_FAN;
+    if (code == "HE") return RELAY_HEATER;
+    return -1;
+}
+
+// Apply several relay overrides at once, e.g. "LT=1,LB=0,FV=1".
+// The whole command is rejected if any entry is malformed, so a scene is
+// never half applied. loop() sends a single state report afterwards.
+void applyRelayScene(String pairs) {
+    const int maxEntries = 7;
+    int pins[maxEntries];
+    bool states[maxEntries];
+    int count = 0;
+
+    int start = 0;
+    while (start < (int)pairs.length()) {
+        int comma = pairs.indexOf(',', start);
+        if (comma < 0) comma = pairs.length();
+        String entry = pairs.substring(start, comma);
+        entry.trim();
+        start = comma + 1;
+        if (entry.length() == 0) continue;
+
+        int eq = entry.indexOf('=');
+        String code = eq > 0 ? entry.substring(0, eq) : entry;
+        String value = eq > 0 ? entry.substring(eq + 1) : "";
+        int pin = relayPinForCode(code);
+        if (pin < 0 || (value != "0" && value != "1") || count >= maxEntries) {
+            Serial.println("Invalid scene entry: " + entry);
+            return;
+        }
+        pins[count] = pin;
+        states[count] = (value == "1");
+        count++;
+    }
+
+    if (count == 0) {
+        Serial.println("Empty scene.");
+        return;
+    }
+
+    // Same heater guard as overrideDevice, reading the DHT at most once
+    bool heaterAllowed = true;
+    bool fanInScene = false;
+    for (int i = 0; i < count; i++) {
+        if (pins[i] == RELAY_CIRCULATION_FAN) fanInScene = true;
+        if (pins[i] == RELAY_HEATER && states[i]) {
+            float indoorTemp = dhtIndoor.readTemperature();
+            bool isDaytime = (hours >= 7 && hours < 19);
+            float offThreshold = isDaytime ? 22.0 : 18.0;
+            if (!isnan(indoorTemp) && indoorTemp >= offThreshold) {
+                heaterAllowed = false;
+                Serial.println("Heater override denied: temperature already above threshold.");
+            }
+        }
+    }
+
+    for (int i = 0; i < count; i++) {
+        if (pins[i] == RELAY_HEATER) {
+            if (states[i] && !heaterAllowed) continue;
+            // Circulation fan follows the heater unless the scene sets it explicitly
+            if (!fanInScene) digitalWrite(RELAY_CIRCULATION_FAN, states[i] ? LOW : HIGH);
+        }
+        digitalWrite(pins[i], states[i] ? LOW : HIGH);
+    }
+
+    activateOverride();
+    Serial.print("Scene applied: ");
+    Serial.print(count);
+    Serial.println(" relays.");
+}
+
+// Apply host climate decisions, e.g. "HE=1,FV=0". Only the heater and vent
+// fan can be driven this way, and the firmware's timers can still refuse.
+void applyHostControl(String pairs) {
+    int start = 0;
+    while (start < (int)pairs.length()) {
+        int comma = pairs.indexOf(',', start);
+        if (comma < 0) comma = pairs.length();
+        String entry = pairs.substring(start, comma);
+        entry.trim();
+        start = comma + 1;
+        if (entry.length() == 0) continue;
+
+        bool on = entry.endsWith("=1");
+        if (entry == "HE=1" || entry == "HE=0") {
+            bool isOn = digitalRead(RELAY_HEATER) == LOW;
+            if (on && !isOn) {
+                if (heaterCooldownActive && millis() - heaterCooldownStartTime < heaterCooldownDuration) {
+                    Serial.println("CTL denied: heater cooling down.");
+                    continue;
+                }
+                heaterCooldownActive = false;
+                heaterOnStartTime = millis();
+            }
+            digitalWrite(RELAY_HEATER, on ? LOW : HIGH);
+        } else if (entry == "FV=1" || entry == "FV=0") {
+            bool isOn = digitalRead(RELAY_VENT_FAN) == LOW;
+            if (on && !isOn && ventFanInCooldown) {
+                if (millis() - ventFanCooldownStart < ventFanCooldownDuration) {
+                    Serial.println("CTL denied: vent fan cooling down.");
+                    continue;
+                }
+                ventFanInCooldown = false;
+            }
+            if (!on && isOn) {
+                // Same rest period the local logic gives the fan after a run
+                ventFanRecentlyOn = false;
+                ventFanInCooldown = true;
+                ventFanCooldownStart = millis();
+            }
+            digitalWrite(RELAY_VENT_FAN, on ? LOW : HIGH);
+        } else {
+            Serial.println("Invalid CTL entry: " + entry);
+            return;
+        }
+    }
+    hostControlActive = true;
+    hostControlStart = millis();
+    Serial.println("CTL applied.");
+}
+
+// Parse "R=10000,S=2000" into intervals (ms), leaving unlisted streams as
+// they are. Prints RATE_ERR and returns false on the first bad entry.
+bool parseStreamIntervals(String pairs, unsigned long* intervals) {
+    int start = 0;
+    while (start < (int)pairs.length()) {
+        int comma = pairs.indexOf(',', start);
+        if (comma < 0) comma = pairs.length();
+        String entry = pairs.substring(start, comma);
+        entry.trim();
+        start = comma + 1;
+        if (entry.length() == 0) continue;
+
+        int eq = entry.indexOf('=');
+        int stream = -1;
+        for (int i = 0; i < STREAM_COUNT && eq > 0; i++) {
+            if (entry.substring(0, eq) == streamCodes[i]) stream = i;
+        }
+        long value = eq > 0 ? entry.substring(eq + 1).toInt() : 0;
+        if (stream < 0 || value < (long)streamMinInterval[stream] || value > (long)streamMaxInterval) {
+            Serial.println("RATE_ERR:" + entry);
+            return false;
+        }
+        intervals[stream] = value;
+    }
+    return true;
+}
+
+// RATE_OK:R=10000,S=10000,T=10000 with the configured (non-burst) intervals
+void sendRates() {
+    Serial.print("RATE_OK:");
+    for (int i = 0; i < STREAM_COUNT; i++) {
+        if (i > 0) Serial.print(",");
+        Serial.print(streamCodes[i]);
+        Serial.print("=");
+        Serial.print(streamInterval[i]);
+    }
+    Serial.println();
+}
+
+// BURST:<duration ms>,S=1000,R=500 runs faster intervals for a bounded
+// time; streams not listed keep their RATE: interval. BURST:0 ends a burst.
+void handleBurstCommand(String args) {
+    int comma = args.indexOf(',');
+    long duration = (comma < 0 ? args : args.substring(0, comma)).toInt();
+    if (duration <= 0) {
+        if (burstActive) Serial.println("BURST_END");
+        burstActive = false;
+        return;
+    }
+    if (duration > (long)maxBurstDuration) {
+        Serial.println("RATE_ERR:burst longer than 5 minutes");
+        return;
+    }
+    unsigned long intervals[STREAM_COUNT];
+    for (int i = 0; i < STREAM_COUNT; i++) intervals[i] = streamInterval[i];
+    if (comma >= 0 && !parseStreamIntervals(args.substring(comma + 1), intervals)) return;
+
+    for (int i = 0; i < STREAM_COUNT; i++) burstInterval[i] = intervals[i];
+    burstActive = true;
+    burstStart = millis();
+    burstDuration = duration;
+    Serial.println("BURST_OK:" + String(duration));
+}
+
+// CRC-16/CCITT (poly 0x1021, init 0xFFFF), one byte at a time
+uint16_t crc16Update(uint16_t crc, uint8_t data) {
+    crc ^= (uint16_t)data << 8;
+    for (int i = 0; i < 8; i++) {
+        crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+    return crc;
+}
+
+// Checksum over the entry count, then each entry's device, start and
+// duration (little-endian). Must match schedule_crc() in schedule_upload.py.
+uint16_t scheduleTableCrc(bool staged) {
+    ScheduleEntry* table = staged ? scheduleStaging : scheduleTable;
+    uint8_t count = staged ? scheduleStagingCount : scheduleCount;
+    uint16_t crc = crc16Update(0xFFFF, count);
+    for (int i = 0; i < count; i++) {
+        crc = crc16Update(crc, table[i].device);
+        for (int b = 0; b < 4; b++) crc = crc16Update(crc, (table[i].start >> (8 * b)) & 0xFF);
+        for (int b = 0; b < 4; b++) crc = crc16Update(crc, (table[i].duration >> (8 * b)) & 0xFF);
+    }
+    return crc;
+}
+
+int scheduleDeviceIndex(String code) {
+    for (int i = 0; i < scheduleDeviceCount; i++) {
+        if (code == scheduleDevices[i]) return i;
+    }
+    return -1;
+}
+
+// EEPROM.put only rewrites bytes that changed, so re-committing an
+// unchanged table costs no flash wear
+void saveScheduleToEeprom() {
+    int addr = 0;
+    EEPROM.put(addr, (uint16_t)SCHEDULE_EEPROM_MAGIC); addr += sizeof(uint16_t);
+    EEPROM.put(addr, scheduleCount); addr += sizeof(uint8_t);
+    for (int i = 0; i < scheduleCount; i++) {
+        EEPROM.put(addr, scheduleTable[i]);
+        addr += sizeof(ScheduleEntry);
+    }
+    EEPROM.put(addr, scheduleTableCrc(false));
+}
 
-    sendRelayState();
+void loadScheduleFromEeprom() {
+    uint16_t magic;
+    uint8_t count;
+    int addr = 0;
+    EEPROM.get(addr, magic); addr += sizeof(uint16_t);
+    EEPROM.get(addr, count); addr += sizeof(uint8_t);
+    scheduleCount = 0;
+    if (magic != SCHEDULE_EEPROM_MAGIC || count > MAX_SCHEDULE_ENTRIES) return;  // Nothing stored yet
+
+    for (int i = 0; i < count; i++) {
+        EEPROM.get(addr, scheduleTable[i]);
+        addr += sizeof(ScheduleEntry);
+        if (scheduleTable[i].device >= scheduleDeviceCount) return;
+    }
+    uint16_t storedCrc;
+    EEPROM.get(addr, storedCrc);
+    scheduleCount = count;
+    if (storedCrc != scheduleTableCrc(false)) {
+        scheduleCount = 0;
+        Serial.println("⚠ Stored schedule failed its checksum. Using built-in schedule.");
+        return;
+    }
+    Serial.print("Loaded schedule table: ");
+    Serial.print(scheduleCount);
+    Serial.println(" entries.");
+}
+
+void sendScheduleTable() {
+    Serial.print("SCHED:");
+    Serial.print(scheduleCount);
+    Serial.print(",");
+    Serial.println(scheduleTableCrc(false), HEX);
+    for (int i = 0; i < scheduleCount; i++) {
+        Serial.print("SCHED_ENTRY:");
+        Serial.print(i); Serial.print(",");
+        Serial.print(scheduleDevices[scheduleTable[i].device]); Serial.print(",");
+        Serial.print(scheduleTable[i].start); Serial.print(",");
+        Serial.println(scheduleTable[i].duration);
+    }
+}
+
+// Schedule upload protocol, driven by schedule_upload.py:
+//   SCHED_GET                       -> SCHED:<count>,<crc hex> and one SCHED_ENTRY per entry
+//   SCHED_BEGIN                     -> copy the live table into staging
+//   SCHED_SET:<i>,<code>,<start>,<duration> -> SCHED_ACK:<i>
+//   SCHED_LEN:<n>                   -> SCHED_ACK:LEN
+//   SCHED_COMMIT:<crc hex>          -> SCHED_OK:<crc> if staging matches, else SCHED_ERR
+//   SCHED_CLEAR                     -> drop the table and fall back to the built-in schedule
+void handleScheduleCommand(String command) {
+    if (command == "SCHED_GET") {
+        sendScheduleTable();
+    } else if (command == "SCHED_BEGIN") {
+        memcpy(scheduleStaging, scheduleTable, sizeof(scheduleTable));
+        scheduleStagingCount = scheduleCount;
+        Serial.println("SCHED_ACK:BEGIN");
+    } else if (command.startsWith("SCHED_SET:")) {
+        String args = command.substring(10);
+        int c1 = args.indexOf(',');
+        int c2 = args.indexOf(',', c1 + 1);
+        int c3 = args.indexOf(',', c2 + 1);
+        if (c1 < 0 || c2 < 0 || c3 < 0) {
+            Serial.println("SCHED_ERR:FORMAT " + args);
+            return;
+        }
+        int index = args.substring(0, c1).toInt();
+        int device = scheduleDeviceIndex(args.substring(c1 + 1, c2));
+        long start = args.substring(c2 + 1, c3).toInt();
+        long duration = args.substring(c3 + 1).toInt();
+        if (index < 0 || index >= MAX_SCHEDULE_ENTRIES || device < 0 ||
+            start < 0 || start >= 86400L || duration <= 0 || duration > 86400L) {
+            Serial.println("SCHED_ERR:RANGE " + args);
+            return;
+        }
+        scheduleStaging[index].device = device;
+        scheduleStaging[index].start = start;
+        scheduleStaging[index].duration = duration;
+        Serial.print("SCHED_ACK:");
+        Serial.println(index);
+    } else if (command.startsWith("SCHED_LEN:")) {
+        int count = command.substring(10).toInt();
+        if (count < 0 || count > MAX_SCHEDULE_ENTRIES) {
+            Serial.println("SCHED_ERR:RANGE " + command.substring(10));
+            return;
+        }
+        scheduleStagingCount = count;
+        Serial.println("SCHED_ACK:LEN");
+    } else if (command.startsWith("SCHED_COMMIT:")) {
+        uint16_t expected = strtoul(command.substring(13).c_str(), NULL, 16);
+        uint16_t actual = scheduleTableCrc(true);
+        if (expected != actual) {
+            Serial.print("SCHED_ERR:CRC ");
+            Serial.println(actual, HEX);
+            return;
+        }
+        memcpy(scheduleTable, scheduleStaging, sizeof(scheduleTable));
+        scheduleCount = scheduleStagingCount;
+        saveScheduleToEeprom();
+        Serial.print("SCHED_OK:");
+        Serial.println(actual, HEX);
+        runSchedule();
+    } else if (command == "SCHED_CLEAR") {
+        scheduleCount = 0;
+        saveScheduleToEeprom();
+        Serial.print("SCHED_OK:");
+        Serial.println(scheduleTableCrc(false), HEX);
+        runSchedule();
+    } else {
+        Serial.println("Unknown command: " + command);
+    }
+}
+
+// State of a device under the uploaded table, or builtInState if the table
+// does not list it
+bool scheduleTableState(int device, bool builtInState) {
+    long now = hours * 3600L + minutes * 60L + seconds;
+    bool listed = false;
+    for (int i = 0; i < scheduleCount; i++) {
+        if (scheduleTable[i].device != device) continue;
+        listed = true;
+        // Time since the entry started, wrapping past midnight
+        long elapsed = (now - (long)scheduleTable[i].start + 86400L) % 86400L;
+        if (elapsed < (long)scheduleTable[i].duration) return true;
+    }
+    return listed ? false : builtInState;
 }
 
 void setTimeFromPi(String timeString) {
@@ -347,12 +829,21 @@ void setTimeFromPi(String timeString) {
 
     int firstColon = timeString.indexOf(':');
     int secondColon = timeString.lastIndexOf(':');
+    int dot = timeString.indexOf('.');
 
     if (firstColon > 0 && secondColon > firstColon) {
         hours = timeString.substring(0, firstColon).toInt();
         minutes = timeString.substring(firstColon + 1, secondColon).toInt();
         seconds = timeString.substring(secondColon + 1).toInt();
 
+        // Optional .mmm fraction: start the current second that long ago
+        unsigned long ms = 0;
+        if (dot > secondColon) {
+            ms = timeString.substring(dot + 1).toInt();
+            if (ms > 999) ms = 999;
+        }
+        lastMillis = millis() - ms;
+
         Serial.print("⏰ Time set to: ");
         Serial.print(hours); Serial.print(":");
         Serial.print(minutes); Serial.print(":");
@@ -388,13 +879,13 @@ void runSchedule() {
 
     // **Lights Schedule (7 AM - 7 PM)**
     bool lightsState = (hours >= 7 && hours < 19);
-    digitalWrite(RELAY_LIGHTS_TOP, lightsState ? LOW : HIGH);
-    digitalWrite(RELAY_LIGHTS_BOTTOM, lightsState ? LOW : HIGH);
+    digitalWrite(RELAY_LIGHTS_TOP, scheduleTableState(0, lightsState) ? LOW : HIGH);
+    digitalWrite(RELAY_LIGHTS_BOTTOM, scheduleTableState(1, lightsState) ? LOW : HIGH);
 
     // **Pumps Schedule: ON for 5 minutes at a ramped interval based on air temperature and time of day**
     bool daylightHours = (hours >= 7 && hours < 19);
-    int airTemp = (int)dhtIndoor.readTemperature();
-    if (isnan(airTemp)) airTemp = 20;
+    float airReading = dhtIndoor.readTemperature();
+    int airTemp = isnan(airReading) ? 20 : (int)airReading;
 
     int baseInterval;
     if (airTemp < 15) {
@@ -412,17 +903,19 @@ void runSchedule() {
 
     bool dynamicCycle = (minutes % adjustedInterval < 5);  // ON for 5 minutes
     bool pumpsState = daylightHours && dynamicCycle;
-    digitalWrite(RELAY_PUMP_TOP, pumpsState ? LOW : HIGH);
-    digitalWrite(RELAY_PUMP_BOTTOM, pumpsState ? LOW : HIGH);
+    digitalWrite(RELAY_PUMP_TOP, scheduleTableState(2, pumpsState) ? LOW : HIGH);
+    digitalWrite(RELAY_PUMP_BOTTOM, scheduleTableState(3, pumpsState) ? LOW : HIGH);
 
     // Circulation fan is now enforced ON in loop(), so we do not set it here
     // digitalWrite(RELAY_CIRCULATION_FAN, LOW);
 
     // Vent fan trigger with timeout and cooldown logic (guard against NaN)
-    int currentTemp = dhtIndoor.readTemperature();
-    int currentHumid = dhtIndoor.readHumidity();
+    float currentTemp = dhtIndoor.readTemperature();
+    float currentHumid = dhtIndoor.readHumidity();
 
-    if (!isnan(currentTemp) && !isnan(currentHumid)) {
+    if (hostClimateControl()) {
+        // The Pi drives the vent fan; applyHostControl enforces the cooldown
+    } else if (!isnan(currentTemp) && !isnan(currentHumid)) {
         // Only allow humidity to trigger the fan if temp > 22°C
         bool sensorTrigger = (currentTemp > 28 || (currentTemp > 22 && currentHumid > 80));
 
@@ -464,7 +957,14 @@ void runSchedule() {
         int newHeaterState = digitalRead(RELAY_HEATER);
 
         // Heater timing enforcement logic
-        if (heaterCooldownActive && millis() - heaterCooldownStartTime < heaterCooldownDuration) {
+        if (hostClimateControl()) {
+            // The Pi decides on/off, but every run is still capped at heaterMaxOnDuration
+            if (digitalRead(RELAY_HEATER) == LOW && millis() - heaterOnStartTime >= heaterMaxOnDuration) {
+                digitalWrite(RELAY_HEATER, HIGH);
+                heaterCooldownActive = true;
+                heaterCooldownStartTime = millis();
+            }
+        } else if (heaterCooldownActive && millis() - heaterCooldownStartTime < heaterCooldownDuration) {
             digitalWrite(RELAY_HEATER, HIGH);  // Enforce cooldown
             // Removed circulation fan toggling here
         } else {
@@ -0,0 +1,175 @@
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Mirrors of the firmware timers (ArdunioMaster.ino), so the host never asks
+# for something the firmware would refuse
+HEATER_MAX_ON = 10 * 60           # heaterMaxOnDuration
+HEATER_COOLDOWN = 10 * 60         # heaterCooldownDuration
+VENT_MIN_ON = 5 * 60              # ventFanDelayDuration
+VENT_COOLDOWN = 10 * 60           # ventFanCooldownDuration
+LEASE_RENEW = 10 * 60             # re-send before the firmware's 15-minute hostControlLease lapses
+
+
+def heater_target(hour):
+    """Midpoint of the firmware's day/night heater band (getHeaterOnThreshold + 1 °C)."""
+    base = 17.5 + 7.5 * math.sin((hour - 7.0) / 24.0 * 2 * math.pi)
+    return min(22.0, max(14.0, base)) + 1.0
+
+
+class ClimateController:
+    """Closed-loop heater and vent fan control on filtered SSTATE samples.
+
+    Both devices use hysteresis around their targets, which suits on/off
+    relays better than PID. Decisions go out as CTL: commands, which the
+    firmware applies without pausing the light and pump schedule. A command
+    is only sent when a decision differs from what RSTATE last reported, so
+    steady state adds no serial traffic beyond one lease renewal every
+    LEASE_RENEW seconds.
+    """
+
+    HEATER_BAND = 0.6       # °C total, versus the firmware's 2 °C band
+    MIN_CYCLE = 60          # seconds a heater state is held before it may flip again
+    VENT_ON_TEMP = 27.0
+    VENT_OFF_TEMP = 25.5
+    VENT_ON_HUMIDITY = 78   # only with temperature above VENT_HUMID_MIN_TEMP, as in the firmware
+    VENT_OFF_HUMIDITY = 72
+    VENT_HUMID_MIN_TEMP = 22.0
+    LATENCY_SAMPLES = 100
+    # An RSTATE this long after a command that still shows the old state means the
+    # command was denied or lost; shorter, it may have crossed the command on the link
+    ACK_GRACE = 2
+    ACK_TIMEOUT = 30        # a command with no RSTATE at all is given up after this long
+
+    def __init__(self, send):
+        self.send = send  # send(command) -> bool
+        self._lock = threading.Lock()
+        self.reported = {}    # device code -> state from the latest RSTATE
+        self.changed_at = {}  # device code -> time.monotonic() of the last confirmed change
+        self._sent = {}       # device code -> (state, sample time, send time) of the command awaiting RSTATE
+        self._last_command = None
+        self._heater_cooldown_until = 0.0
+        self.decision_latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self.ack_latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self.counters = {"samples": 0, "commands": 0, "renewals": 0, "held_by_timers": 0, "unconfirmed": 0}
+
+    def handle_relay_state(self, relay_states, now=None):
+        """Track RSTATE ({code: 0/1}) to learn the actual relay states and confirm commands."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for code in ("HE", "FV"):
+                if code not in relay_states:
+                    continue
+                state = bool(relay_states[code])
+                if code in self.reported and self.reported[code] != state:
+                    if code == "HE" and not state and not self._held("HE", now, HEATER_MAX_ON):
+                        # A run that hit the cap: the firmware now holds the heater off
+                        self._heater_cooldown_until = now + HEATER_COOLDOWN
+                    self.changed_at[code] = now
+                self.reported[code] = state
+                if code not in self._sent:
+                    continue
+                wanted, sampled_at, sent_at = self._sent[code]
+                if wanted == state:
+                    self.ack_latencies.append(now - sampled_at)
+                    del self._sent[code]
+                elif now - sent_at >= self.ACK_GRACE:
+                    # e.g. "CTL denied: heater cooling down."; the next sample decides again
+                    self.counters["unconfirmed"] += 1
+                    del self._sent[code]
+
+    def on_sample(self, sensors, received_at=None):
+        """Decide on a cleaned sensor sample and send a CTL: command if anything must change.
+
+        received_at is the time.monotonic() the SSTATE line arrived; the
+        time from then to the command being written is the decision latency.
+        """
+        received_at = time.monotonic() if received_at is None else received_at
+        temperature = sensors.get("temp_indoor")
+        humidity = sensors.get("humid_indoor")
+
+        with self._lock:
+            self.counters["samples"] += 1
+            if "HE" not in self.reported or "FV" not in self.reported:
+                return  # Wait for the first RSTATE
+            now = time.monotonic()
+            for code, (_, _, sent_at) in list(self._sent.items()):
+                if now - sent_at >= self.ACK_TIMEOUT:
+                    self.counters["unconfirmed"] += 1
+                    del self._sent[code]
+            desired = {
+                "HE": self._decide_heater(temperature, now),
+                "FV": self._decide_vent(temperature, humidity, now),
+            }
+            changes = {code: state for code, state in desired.items()
+                       if state != self.reported[code] and self._sent.get(code, (None,))[0] != state}
+            renew = self._last_command is None or now - self._last_command >= LEASE_RENEW
+            if not changes and not renew:
+                return
+            # A renewal restates the current decisions so the lease never lapses mid-run
+            command = changes if changes else desired
+
+        pairs = ",".join(f"{code}={1 if state else 0}" for code, state in command.items())
+        if not self.send(f"CTL:{pairs}\n"):
+            return
+        sent_at = time.monotonic()
+        with self._lock:
+            self._last_command = sent_at
+            self.decision_latencies.append(sent_at - received_at)
+            if changes:
+                self.counters["commands"] += 1
+                for code, state in changes.items():
+                    self._sent[code] = (state, received_at, sent_at)
+            else:
+                self.counters["renewals"] += 1
+
+    def _held(self, code, now, minimum):
+        return now - self.changed_at.get(code, -math.inf) < minimum
+
+    def _decide_heater(self, temperature, now):
+        on = self.reported["HE"]
+        if temperature is None:
+            return False  # No trustworthy reading: fail safe, like the firmware
+        if on and not self._held("HE", now, HEATER_MAX_ON):
+            return False  # The firmware ends the run here and starts its cooldown
+
+        target = heater_target(datetime.now().hour + datetime.now().minute / 60)
+        if temperature < target - self.HEATER_BAND / 2:
+            want = True
+        elif temperature > target + self.HEATER_BAND / 2:
+            want = False
+        else:
+            want = on
+        if want != on and (self._held("HE", now, self.MIN_CYCLE) or (want and now < self._heater_cooldown_until)):
+            self.counters["held_by_timers"] += 1
+            return on
+        return want
+
+    def _decide_vent(self, temperature, humidity, now):
+        on = self.reported["FV"]
+        if temperature is None:
+            return False
+        humid = humidity is not None and temperature > self.VENT_HUMID_MIN_TEMP
+        if on:
+            want = temperature > self.VENT_OFF_TEMP or (humid and humidity > self.VENT_OFF_HUMIDITY)
+        else:
+            want = temperature > self.VENT_ON_TEMP or (humid and humidity > self.VENT_ON_HUMIDITY)
+        # Minimum run, then the rest period the firmware enforces after every run
+        if want != on and self._held("FV", now, VENT_MIN_ON if on else VENT_COOLDOWN):
+            self.counters["held_by_timers"] += 1
+            return on
+        return want
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            decisions = list(self.decision_latencies)
+            acks = list(self.ack_latencies)
+        if decisions:
+            stats["decision_ms_avg"] = round(sum(decisions) / len(decisions) * 1000, 2)
+            stats["decision_ms_max"] = round(max(decisions) * 1000, 2)
+        if acks:
+            stats["ack_ms_avg"] = round(sum(acks) / len(acks) * 1000, 1)
+        return stats
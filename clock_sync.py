@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def parse_arduino_time(response):
+    """Return seconds since midnight from a TIME:HH:MM:SS[.mmm] message, or None."""
+    try:
+        hours, minutes, seconds = response.split(":", 1)[1].strip().split(":")
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:
+        return None
+
+
+class ClockSync:
+    """Measure the Arduino clock against the Pi and correct it only when it has drifted.
+
+    Each query sends GET_TIME and timestamps the round trip. The Arduino's
+    reply is compared with the Pi clock at the midpoint of the round trip to
+    estimate the offset, and a least-squares fit of offset over time gives
+    the drift rate. SET_TIME is only sent when the offset passes
+    CORRECTION_THRESHOLD.
+    """
+
+    QUERY_INTERVAL = 5 * 60       # seconds between GET_TIME queries
+    CORRECTION_THRESHOLD = 0.5    # seconds of offset before SET_TIME is sent
+    MAX_RTT = 1.0                 # replies slower than this are too imprecise to use
+    DRIFT_SAMPLES = 48            # about four hours at the default query interval
+
+    def __init__(self, send):
+        self.send = send
+        self._lock = threading.Lock()
+        self._query_sent_at = None  # (time.time(), time.monotonic()) of the open query
+        # (monotonic time, offset with earlier corrections added back) for the drift fit
+        self._samples = deque(maxlen=self.DRIFT_SAMPLES)
+        self._applied_correction = 0.0
+
+        self.offset = None     # Arduino minus Pi, seconds
+        self.drift = None      # seconds of offset gained per second
+        self.last_rtt = None
+        self.corrections = 0
+        self.last_correction = None
+
+    def query(self):
+        """Ask the Arduino for its time. The reply arrives through handle_time()."""
+        with self._lock:
+            self._query_sent_at = (time.time(), time.monotonic())
+        self.send("GET_TIME\n")
+
+    def handle_time(self, response):
+        """Process a TIME: line. Returns True if it answered an open query."""
+        received_wall, received_mono = time.time(), time.monotonic()
+        with self._lock:
+            if not self._query_sent_at:
+                return False  # Periodic report; its transmit delay is unknown
+            sent_wall, sent_mono = self._query_sent_at
+            self._query_sent_at = None
+
+        rtt = received_mono - sent_mono
+        arduino_seconds = parse_arduino_time(response)
+        if arduino_seconds is None or rtt > self.MAX_RTT:
+            return True
+
+        # Compare against the Pi clock halfway through the round trip
+        midpoint = datetime.fromtimestamp(sent_wall + rtt / 2)
+        host_seconds = midpoint.hour * 3600 + midpoint.minute * 60 + midpoint.second + midpoint.microsecond / 1e6
+        offset = (arduino_seconds - host_seconds + SECONDS_PER_DAY / 2) % SECONDS_PER_DAY - SECONDS_PER_DAY / 2
+
+        with self._lock:
+            self.offset = offset
+            self.last_rtt = rtt
+            self._samples.append((sent_mono + rtt / 2, offset - self._applied_correction))
+            self.drift = self._fit_drift()
+
+        if abs(offset) > self.CORRECTION_THRESHOLD:
+            self.correct()
+        return True
+
+    def correct(self):
+        """Set the Arduino clock to Pi time, allowing for the one-way serial delay."""
+        one_way = (self.last_rtt or 0) / 2
+        target = datetime.now() + timedelta(seconds=one_way)
+        self.send(f"SET_TIME:{target.strftime('%H:%M:%S')}.{target.microsecond // 1000:03d}\n")
+        with self._lock:
+            # Keep the drift fit continuous across the step we just applied
+            if self.offset is not None:
+                self._applied_correction -= self.offset
+                self.offset = 0.0
+            self.corrections += 1
+            self.last_correction = datetime.now().isoformat()
+
+    def _fit_drift(self):
+        if len(self._samples) < 2:
+            return None
+        n = len(self._samples)
+        mean_t = sum(t for t, _ in self._samples) / n
+        mean_o = sum(o for _, o in self._samples) / n
+        var_t = sum((t - mean_t) ** 2 for t, _ in self._samples)
+        if var_t == 0:
+            return None
+        return sum((t - mean_t) * (o - mean_o) for t, o in self._samples) / var_t
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "offset_s": None if self.offset is None else round(self.offset, 3),
+                "drift_ppm": None if self.drift is None else round(self.drift * 1e6, 1),
+                "rtt_ms": None if self.last_rtt is None else round(self.last_rtt * 1000, 1),
+                "corrections": self.corrections,
+                "last_correction": self.last_correction,
+                "samples": len(self._samples),
+            }
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+
+from arduino_helpers import format_scene_command
+
+
+class RelayCommandQueue:
+    """Send relay commands from a writer thread, one in flight per device.
+
+    Requests for a device that already has a command in flight wait in a
+    single pending slot, so a burst of taps collapses to the last one. A
+    command counts as acknowledged when an RSTATE reports the requested
+    state; if none does within ACK_TIMEOUT it is dropped as timed out.
+    """
+
+    ACK_TIMEOUT = 3.0  # seconds; the firmware answers every command with RSTATE
+    LATENCY_SAMPLES = 100
+
+    def __init__(self, send):
+        self.send = send  # send(command) -> bool, True if written to the port
+        self._pending = {}    # device code -> requested state, not sent yet
+        self._in_flight = {}  # device code -> (state, time.monotonic() when sent)
+        self._confirmed = {}  # device code -> state last reported by RSTATE
+        self._cond = threading.Condition()
+        self._running = False
+        self.latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self.counters = {"requested": 0, "sent": 0, "acked": 0, "timeouts": 0, "coalesced": 0}
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def request(self, code, state):
+        """Ask for a relay to be switched. Returns immediately."""
+        self.request_many({code: state})
+
+    def request_many(self, relay_states):
+        """Ask for several relays at once ({code: state}); they are sent as one SET: line."""
+        with self._cond:
+            for code, state in relay_states.items():
+                state = bool(state)
+                self.counters["requested"] += 1
+                if code in self._pending:
+                    self.counters["coalesced"] += 1
+                target = self._in_flight[code][0] if code in self._in_flight else self._confirmed.get(code)
+                if target == state:
+                    # Already there (or on its way): drop anything queued behind it
+                    self._pending.pop(code, None)
+                    continue
+                self._pending[code] = state
+            self._cond.notify()
+
+    def handle_relay_state(self, relay_states):
+        """Match an RSTATE report ({code: 0/1}) against the commands in flight."""
+        now = time.monotonic()
+        with self._cond:
+            for code, value in relay_states.items():
+                state = bool(value)
+                self._confirmed[code] = state
+                if code in self._in_flight and self._in_flight[code][0] == state:
+                    sent_at = self._in_flight.pop(code)[1]
+                    self.latencies.append(now - sent_at)
+                    self.counters["acked"] += 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            latencies = list(self.latencies)
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self._in_flight)
+            stats["pending"] = len(self._pending)
+        if latencies:
+            stats["latency_ms_last"] = round(latencies[-1] * 1000, 1)
+            stats["latency_ms_avg"] = round(sum(latencies) / len(latencies) * 1000, 1)
+            stats["latency_ms_max"] = round(max(latencies) * 1000, 1)
+        return stats
+
+    def _take_ready(self):
+        """Expire unacknowledged commands and return the batch that can be sent now."""
+        now = time.monotonic()
+        for code, (state, sent_at) in list(self._in_flight.items()):
+            if now - sent_at > self.ACK_TIMEOUT:
+                del self._in_flight[code]
+                self.counters["timeouts"] += 1
+                print(f"⚠ No RSTATE confirmed {code}:{'ON' if state else 'OFF'} within {self.ACK_TIMEOUT} s")
+
+        ready = {}
+        for code, state in list(self._pending.items()):
+            if code in self._in_flight:
+                continue
+            del self._pending[code]
+            if self._confirmed.get(code) != state:
+                ready[code] = state
+        return ready
+
+    def _run(self):
+        while True:
+            with self._cond:
+                ready = self._take_ready() if self._running else {}
+                while self._running and not ready:
+                    # Wake up periodically while commands are in flight to expire them
+                    self._cond.wait(0.5 if self._in_flight else None)
+                    ready = self._take_ready()
+                if not self._running:
+                    return
+                now = time.monotonic()
+                for code, state in ready.items():
+                    self._in_flight[code] = (state, now)
+
+            # Several devices ready together go out as one SET: line and one state report
+            if len(ready) > 1:
+                command = format_scene_command(ready)
+            else:
+                code, state = next(iter(ready.items()))
+                command = f"{code}:{'ON' if state else 'OFF'}\n"
+
+            sent = self.send(command)
+            with self._cond:
+                if sent:
+                    self.counters["sent"] += 1
+                else:
+                    for code in ready:
+                        self._in_flight.pop(code, None)
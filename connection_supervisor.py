@@ -0,0 +1,149 @@
+import threading
+import time
+
+from arduino_helpers import connect_to_arduino, send_command_to_arduino
+from link_stats import LinkStats
+
+
+class ConnectionSupervisor:
+    """Own the serial link: one reader thread, stale detection and capped exponential backoff.
+
+    States move connecting -> live -> stale -> backoff -> connecting. Every
+    handle is closed before a new one is opened, so reconnects never leak
+    threads or file descriptors.
+    """
+
+    CONNECTING = "connecting"
+    LIVE = "live"
+    STALE = "stale"
+    BACKOFF = "backoff"
+
+    STALE_AFTER = 30        # seconds without a line; the firmware reports every 10 s
+    RECONNECT_AFTER = 120   # seconds without a line before the port is reopened
+    BACKOFF_INITIAL = 1
+    BACKOFF_MAX = 60
+
+    def __init__(self, on_line, on_state_change=None, on_connect=None, connect=connect_to_arduino):
+        self.on_line = on_line
+        self.on_state_change = on_state_change
+        self.on_connect = on_connect
+        self.connect = connect
+
+        self.state = self.CONNECTING
+        self.arduino = None
+        self.last_line_time = None  # time.monotonic() of the last line received
+        self.link_stats = LinkStats()
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._close()
+
+    def is_connected(self):
+        return self.state in (self.LIVE, self.STALE)
+
+    def send(self, command):
+        """Write a command if the port is open. Safe to call from any thread."""
+        with self._lock:
+            if not self.arduino:
+                print(f"⚠ Arduino not connected, dropping command: {command.strip()}")
+                return False
+            send_command_to_arduino(self.arduino, command)
+            self.link_stats.sent(command)
+            return True
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if self.on_state_change:
+            try:
+                self.on_state_change(state)
+            except Exception as e:
+                print(f"⚠ Link state callback error: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._set_state(self.CONNECTING)
+            try:
+                arduino = self.connect()
+            except Exception as e:
+                print(f"⚠ Connection attempt failed: {e}")
+                arduino = None
+
+            if arduino:
+                with self._lock:
+                    self.arduino = arduino
+                self.last_line_time = time.monotonic()
+                self.link_stats.reset_sequence()
+                self._set_state(self.LIVE)
+                if self.on_connect:
+                    try:
+                        self.on_connect()
+                    except Exception as e:
+                        print(f"⚠ Connect callback error: {e}")
+                self._read_until_lost(arduino)
+                self._close()
+
+            if self._stop.is_set():
+                break
+            self._backoff()
+
+    def _read_until_lost(self, arduino):
+        """Read lines until the port errors or stays silent for RECONNECT_AFTER seconds."""
+        while not self._stop.is_set():
+            try:
+                # Blocks for at most the port timeout, so no busy polling
+                raw = arduino.readline()
+            except Exception as e:
+                print(f"⚠ Serial read error: {e}")
+                return
+
+            now = time.monotonic()
+            line = raw.decode(errors="replace").strip() if raw else ""
+            if line:
+                self.last_line_time = now
+                self._failures = 0
+                self._set_state(self.LIVE)
+                # Strip the frame; a line that fails its checksum is counted and dropped
+                line = self.link_stats.receive(line, now)
+                if line is None:
+                    continue
+                try:
+                    self.on_line(line)
+                except Exception as e:
+                    print(f"⚠ Error handling Arduino line: {e}")
+                continue
+
+            silent_for = now - self.last_line_time
+            if silent_for > self.RECONNECT_AFTER:
+                print(f"[WARN] No Arduino data for {silent_for:.0f} seconds. Reconnecting...")
+                return
+            if silent_for > self.STALE_AFTER:
+                self._set_state(self.STALE)
+
+    def _close(self):
+        with self._lock:
+            arduino, self.arduino = self.arduino, None
+        if arduino:
+            try:
+                arduino.close()
+            except Exception as e:
+                print(f"⚠ Error closing serial port: {e}")
+
+    def _backoff(self):
+        self._set_state(self.BACKOFF)
+        delay = min(self.BACKOFF_MAX, self.BACKOFF_INITIAL * (2 ** self._failures))
+        self._failures += 1
+        print(f"[INFO] Retrying Arduino connection in {delay} s")
+        self._stop.wait(delay)
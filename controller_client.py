@@ -0,0 +1,89 @@
+import socket
+import threading
+import time
+
+from arduino_helpers import format_burst_command
+from hydro_controller import CONTROLLER_HOST, CONTROLLER_PORT
+
+
+class ControllerClient:
+    """Attach to a running hydro_controller daemon and mirror its Arduino messages."""
+
+    RECONNECT_DELAY = 5  # seconds
+
+    def __init__(self, host=CONTROLLER_HOST, port=CONTROLLER_PORT):
+        self.host = host
+        self.port = port
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._listeners = []
+        self._running = False
+
+    @staticmethod
+    def daemon_available(host=CONTROLLER_HOST, port=CONTROLLER_PORT):
+        """Return True if a controller daemon is accepting connections."""
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            return False
+
+    def add_listener(self, callback):
+        """Register callback(line) for every message forwarded by the daemon."""
+        self._listeners.append(callback)
+
+    def send_command(self, command):
+        with self._send_lock:
+            if not self._sock:
+                print(f"⚠ Controller not connected, dropping command: {command.strip()}")
+                return
+            try:
+                self._sock.sendall(command.encode())
+                print(f"📤 Sent command: {command.strip()}")
+            except OSError as e:
+                print(f"⚠ Error sending command: {e}")
+
+    def burst(self, duration, intervals):
+        """Ask for fast telemetry for a while, e.g. burst(60, {"S": 1, "R": 0.5})."""
+        self.send_command(format_burst_command(duration, intervals))
+
+    def is_connected(self):
+        return self._sock is not None
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        with self._send_lock:
+            if self._sock:
+                self._sock.close()
+                self._sock = None
+
+    def _run(self):
+        while self._running:
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=5)
+                sock.settimeout(None)
+                with self._send_lock:
+                    self._sock = sock
+                print(f"✅ Attached to controller on {self.host}:{self.port}")
+
+                for raw in sock.makefile("rb"):
+                    line = raw.decode().strip()
+                    if not line:
+                        continue
+                    for callback in list(self._listeners):
+                        try:
+                            callback(line)
+                        except Exception as e:
+                            print(f"⚠ Listener error: {e}")
+            except OSError as e:
+                print(f"⚠ Controller connection error: {e}")
+
+            with self._send_lock:
+                if self._sock:
+                    self._sock.close()
+                self._sock = None
+            time.sleep(self.RECONNECT_DELAY)
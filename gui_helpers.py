@@ -53,38 +53,25 @@ def update_clock(gui):
     threading.Thread(target=refresh_clock, daemon=True).start()
 
 def update_connection_status(gui):
-    """ Continuously check if the Pi is receiving state updates from the Arduino. """
+    """ Continuously check if the GUI is receiving state updates from the controller. """
     def check_connection():
-        last_state_time = time.time()
-
         while True:
-            if gui.arduino and gui.arduino.is_open:
-                try:
-                    if gui.arduino.in_waiting > 0:
-                        response = gui.arduino.readline().decode().strip()
-                        if response.startswith("STATE:"):
-                            gui.update_relay_states(response)
-                            last_state_time = time.time()  # Reset last received time
-                        
-                    # Check if we haven't received a state update in the last 10 seconds
-                    if time.time() - last_state_time > 10:
-                        update_indicator(gui.connection_indicator, "red")
-                    else:
-                        update_indicator(gui.connection_indicator, "green")
-
-                except Exception:
-                    update_indicator(gui.connection_indicator, "red")
-                    gui.arduino = None  # Mark as disconnected
-
+            last_message = gui.last_message_timestamp
+            # The Arduino reports every 10 seconds, so allow one missed report
+            recent = last_message and time.time() - last_message.timestamp() <= 15
+            if not gui.controller.is_connected():
+                update_indicator(gui, "red")
+            elif gui.link_state == "stale":
+                update_indicator(gui, "orange")
+            elif recent:
+                update_indicator(gui, "green")
             else:
-                update_indicator(gui.connection_indicator, "red")
-                gui.arduino = None  # Mark as disconnected
+                update_indicator(gui, "red")
 
             time.sleep(3)  # Check every 3 seconds
 
     threading.Thread(target=check_connection, daemon=True).start()
 
-def update_indicator(indicator, color):
-    """ Update the color of a status indicator. """
-    indicator.delete("all")
-    indicator.create_oval(2, 2, 18, 18, fill=color)
+def update_indicator(gui, color):
+    """ Update the color of the connection indicator through the GUI renderer. """
+    gui.renderer.set_item(gui.connection_indicator, gui.connection_oval, fill=color)
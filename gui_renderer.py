@@ -0,0 +1,80 @@
+import threading
+
+
+class GuiRenderer:
+    """Coalesce widget updates from any thread and apply only what changed on the Tk thread."""
+
+    MAX_FPS = 10
+
+    def __init__(self, root, max_fps=MAX_FPS):
+        self.root = root
+        self.frame_interval_ms = max(1, int(1000 / max_fps))
+        self._lock = threading.Lock()
+        self._pending = {}  # (widget, canvas item or None) -> {option: value}
+        self._applied = {}  # what is currently on screen, same keys
+        self._pending_coords = {}  # (canvas, item) -> flat coordinate list
+        self.root.after(self.frame_interval_ms, self._render_frame)
+
+    def watch(self, widget, *options):
+        """Record a widget's current options as on screen. Call from the Tk thread."""
+        applied = self._applied.setdefault((widget, None), {})
+        for option in options:
+            applied[option] = widget.cget(option)
+
+    def set(self, widget, **options):
+        """Queue new options for a widget. Safe to call from any thread."""
+        self._queue((widget, None), options)
+
+    def set_item(self, canvas, item, **options):
+        """Queue new options for a canvas item. Safe to call from any thread."""
+        self._queue((canvas, item), options)
+
+    def set_coords(self, canvas, item, coords):
+        """Queue new coordinates for a canvas item; only the latest per frame is applied."""
+        with self._lock:
+            self._pending_coords[(canvas, item)] = coords
+
+    def get(self, widget, option, default=None):
+        """Return the latest requested value for a widget option without touching Tk."""
+        key = (widget, None)
+        with self._lock:
+            pending = self._pending.get(key, {})
+            if option in pending:
+                return pending[option]
+            return self._applied.get(key, {}).get(option, default)
+
+    def _queue(self, key, options):
+        with self._lock:
+            self._pending.setdefault(key, {}).update(options)
+
+    def _render_frame(self):
+        updates = []
+        with self._lock:
+            for key, options in self._pending.items():
+                applied = self._applied.setdefault(key, {})
+                changed = {k: v for k, v in options.items() if applied.get(k) != v}
+                if changed:
+                    applied.update(changed)
+                    updates.append((key, changed))
+            self._pending = {}
+            coords, self._pending_coords = self._pending_coords, {}
+
+        for (widget, item), changed in updates:
+            try:
+                if item is None:
+                    widget.config(**changed)
+                else:
+                    widget.itemconfig(item, **changed)
+            except Exception as e:
+                print(f"⚠ GUI update error: {e}")
+
+        for (canvas, item), flat in coords.items():
+            try:
+                canvas.coords(item, *flat)
+            except Exception as e:
+                print(f"⚠ GUI update error: {e}")
+
+        try:
+            self.root.after(self.frame_interval_ms, self._render_frame)
+        except Exception:
+            pass  # Window has been destroyed
@@ -0,0 +1,623 @@
+import argparse
+import json
+import os
+import queue
+import re
+import socket
+import socketserver
+import threading
+from datetime import datetime
+
+from alerts import ActiveAlertsFile, AlertEngine, CommandSink, LogSink, default_rules, print_sink
+from arduino_helpers import (
+    RELAY_CODES,
+    connect_to_arduino,
+    parse_relay_state,
+    parse_sensor_state,
+)
+from climate_control import ClimateController
+from clock_sync import ClockSync
+from command_queue import RelayCommandQueue
+from connection_supervisor import ConnectionSupervisor
+from log_rotation import DEFAULT_RETENTION_BYTES, RotatingLog
+from schedule_upload import compile_schedule
+from scheduler import Scheduler
+from sensor_filter import SensorFilter
+from shm_ring import SampleRing
+from system_health import PI_HEALTH_FIELDS, SystemHealthSampler
+from telemetry_rate import NORMAL_RATES, TelemetryRates
+
+# Local socket the daemon listens on for GUI clients
+CONTROLLER_HOST = "127.0.0.1"
+CONTROLLER_PORT = 5055
+
+RELAY_COMMAND = re.compile(r"^(LT|LB|PT|PB|FV|FC|HE):(ON|OFF)$")
+SCENE_COMMAND = re.compile(r"^SET:((?:LT|LB|PT|PB|FV|FC|HE)=[01](?:,(?:LT|LB|PT|PB|FV|FC|HE)=[01])*)$")
+
+
+# Dashboard label, SSTATE field and display format of each sensor reading
+STATUS_SENSORS = [
+    ("Air Temp (Indoor)", "temp_indoor", "{}"),
+    ("Air Temp (Outdoor)", "temp_outdoor", "{}"),
+    ("Humidity (Indoor)", "humid_indoor", "{}"),
+    ("Humidity (Outdoor)", "humid_outdoor", "{}"),
+    ("Water Temp Top", "water_temp_top", "{:.1f}"),
+    ("Water Temp Bottom", "water_temp_bottom", "{:.1f}"),
+]
+
+
+def format_status(relay_states, sensor_state, stale=False, cleaned=None):
+    """Build the dashboard status dict from relay states ({key: bool or None}) and parsed sensors.
+
+    Unknown values are None rather than placeholders. When cleaned (the
+    SensorFilter output) is given, the usual keys carry the cleaned values
+    and the raw readings are kept alongside as "<label> Raw".
+    """
+    sensors = sensor_state
+
+    def float_text(field):
+        if not sensors or sensors[field] is None:
+            return None
+        return "Okay" if sensors[field] else "Low"
+
+    status = {}
+    for label, field, fmt in STATUS_SENSORS:
+        raw = fmt.format(sensors[field]) if sensors and sensors[field] is not None else None
+        if cleaned is None:
+            status[label] = raw
+        else:
+            value = cleaned.get(field)
+            status[label] = None if value is None else f"{value:.1f}"
+            status[f"{label} Raw"] = raw
+    status.update({
+        "Top Float": float_text("float_top"),
+        "Bottom Float": float_text("float_bottom"),
+        "timestamp": datetime.now().isoformat(),
+        # True while any value is still the restored snapshot rather than live telemetry
+        "stale": stale,
+    })
+
+    # Add relay statuses
+    for key, state in relay_states.items():
+        status[f"Relay {key.replace('_', ' ').title()}"] = None if state is None else ("ON" if state else "OFF")
+    return status
+
+
+class HydroController:
+    """Headless control core: owns the serial link, logging, status file, time sync and reconnects."""
+
+    STATUS_INTERVAL = 60
+    HEALTH_INTERVAL = 60
+    PI_HEALTH_INTERVAL = 60
+    ENVIRONMENT_INTERVAL = 15 * 60
+
+    RELAY_LOG_HEADER = ["timestamp", "top_lights", "bottom_lights", "pump_top", "pump_bottom",
+                        "fan_vent", "fan_circ", "heater"]
+    HEALTH_LOG_HEADER = ["timestamp", "arduino_connected", "seconds_since_last_message"]
+    ENVIRONMENT_LOG_HEADER = ["timestamp", "indoor_temp", "outdoor_temp", "indoor_humidity", "outdoor_humidity"]
+
+    def __init__(self, base_dir=None, connect=connect_to_arduino, log_retention_bytes=DEFAULT_RETENTION_BYTES,
+                 alert_command=None, schedule_alerts=False, climate_control=False, sample_ring=True,
+                 pi_health_interval=PI_HEALTH_INTERVAL):
+        self.base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+        self.dashboard_dir = os.path.join(self.base_dir, "hydro_dashboard")
+        self.arduino_log_path = os.path.join(self.base_dir, "arduino_log.txt")
+        self.snapshot_path = os.path.join(self.dashboard_dir, "state_snapshot.json")
+
+        # All logs rotate daily (or at 5 MB) and are archived under log_archive/
+        def rotating(path, header=None):
+            return RotatingLog(path, header=header, retention_bytes=log_retention_bytes)
+        self.arduino_log = rotating(self.arduino_log_path)
+        self.relay_log = rotating(os.path.join(self.dashboard_dir, "relay_log.csv"), self.RELAY_LOG_HEADER)
+        self.health_log = rotating(os.path.join(self.dashboard_dir, "system_health.csv"), self.HEALTH_LOG_HEADER)
+        self.health_text_log = rotating(os.path.join(self.dashboard_dir, "system_health.txt"))
+        self.environment_log = rotating(os.path.join(self.dashboard_dir, "environment_log.csv"),
+                                        self.ENVIRONMENT_LOG_HEADER)
+        self.alert_log = rotating(os.path.join(self.dashboard_dir, "alerts.log"))
+        # CPU, memory, temperature and SD card load, next to the sensor logs so stalls can be lined up
+        self.pi_health_log = rotating(os.path.join(self.dashboard_dir, "pi_health.csv"), PI_HEALTH_FIELDS)
+        self.pi_health_interval = pi_health_interval
+        self.pi_health = SystemHealthSampler() if pi_health_interval else None
+
+        # Relay-vs-schedule rules only make sense once schedule.txt has been uploaded to the board
+        schedule_entries = None
+        if schedule_alerts:
+            try:
+                schedule_entries = compile_schedule()
+            except (OSError, ValueError) as e:
+                print(f"⚠ Schedule alerts disabled: {e}")
+        sinks = [print_sink, LogSink(self.alert_log), ActiveAlertsFile(os.path.join(self.dashboard_dir, "alerts.json"))]
+        if alert_command:
+            sinks.append(CommandSink(alert_command))
+        self.alerts = AlertEngine(default_rules(schedule_entries), sinks)
+
+        # None means unknown; unknown values are never published as placeholders
+        self.relay_states = {key: None for key in RELAY_CODES.values()}
+        self.sensor_state = None
+        # Filtered copy of sensor_state; raw and cleaned are published side by side
+        self.sensor_filter = SensorFilter()
+        self.sensor_clean = None
+        self.last_time_received_timestamp = None
+        # Streams restored from the snapshot that fresh telemetry has not confirmed yet
+        self.stale_streams = set()
+
+        # Most recent line of each telemetry type, replayed to newly attached clients
+        self.last_lines = {}
+        self._listeners = []
+        self._listeners_lock = threading.Lock()
+
+        self.supervisor = ConnectionSupervisor(
+            on_line=self.handle_line,
+            on_state_change=self.on_link_state_change,
+            on_connect=self.on_arduino_connected,
+            connect=connect,
+        )
+        self.command_queue = RelayCommandQueue(self.supervisor.send)
+        # Opt-in: heater and vent fan decided here from filtered samples instead of by the firmware
+        self.climate = ClimateController(self.supervisor.send) if climate_control else None
+        self.clock_sync = ClockSync(self.supervisor.send)
+        # Full-rate telemetry while clients are attached or climate control needs it, idle rate otherwise
+        self.rates = TelemetryRates(self.supervisor.send, self.supervisor.is_connected)
+        if climate_control:
+            self.rates.request("climate", {"S": NORMAL_RATES["S"]})
+        self.scheduler = Scheduler()
+        # Recent samples in shared memory for other local processes (see shm_ring.py); created on start
+        self.use_sample_ring = sample_ring
+        self.sample_ring = None
+
+    # --- Client interface -------------------------------------------------
+
+    def add_listener(self, callback):
+        """Register callback(line) for every message received from the Arduino.
+
+        The latest line of each kind is replayed first so the listener starts
+        from the current (or restored) state.
+        """
+        with self._listeners_lock:
+            self._listeners.append(callback)
+            replay = list(self.last_lines.values())
+        for line in replay:
+            callback(line)
+        self.rates.request("clients", NORMAL_RATES)
+
+    def remove_listener(self, callback):
+        with self._listeners_lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+            watched = bool(self._listeners)
+        if not watched:
+            self.rates.release("clients")
+
+    def send_command(self, command):
+        """Send a command line. Relay switches go through the coalescing command queue."""
+        command = command.strip()
+        match = RELAY_COMMAND.match(command)
+        scene = SCENE_COMMAND.match(command)
+        if match:
+            self.set_relay(match.group(1), match.group(2) == "ON")
+        elif scene:
+            self.apply_scene({
+                code: value == "1" for code, value in (pair.split("=") for pair in scene.group(1).split(","))
+            })
+        else:
+            self.supervisor.send(f"{command}\n")
+
+    def set_relay(self, code, state):
+        """Request a relay state without blocking; the queue confirms it against RSTATE."""
+        self.alerts.note_override()
+        self.command_queue.request(code, state)
+
+    def apply_scene(self, relay_states):
+        """Request several relay states ({code: bool}) as one batched command."""
+        self.alerts.note_override()
+        self.command_queue.request_many(relay_states)
+
+    def is_connected(self):
+        return self.supervisor.is_connected()
+
+    def start(self):
+        """Start the connection supervisor and all periodic jobs."""
+        self.restore_snapshot()
+        if self.use_sample_ring:
+            try:
+                self.sample_ring = SampleRing(create=True)
+            except OSError as e:
+                print(f"⚠ Shared-memory sample ring disabled: {e}")
+        self.supervisor.start()
+        self.command_queue.start()
+
+        self.scheduler.every(ClockSync.QUERY_INTERVAL, self.clock_sync.query, delay=ClockSync.QUERY_INTERVAL)
+        self.scheduler.every(self.STATUS_INTERVAL, self.write_status_to_file)
+        self.scheduler.every(self.STATUS_INTERVAL, self.write_metrics_to_file)
+        self.scheduler.every(self.HEALTH_INTERVAL, self.log_system_health)
+        if self.pi_health:
+            self.scheduler.every(self.pi_health_interval, self.log_pi_health)
+        self.scheduler.every(self.ENVIRONMENT_INTERVAL, self.log_environment_data)
+        self.scheduler.start()
+
+    def stop(self):
+        self.scheduler.stop()
+        self.command_queue.stop()
+        self.supervisor.stop()
+        for log in (self.arduino_log, self.relay_log, self.health_log, self.health_text_log, self.environment_log,
+                    self.alert_log, self.pi_health_log):
+            log.close()
+        if self.pi_health:
+            self.pi_health.close()
+        if self.sample_ring:
+            self.sample_ring.close()
+
+    # --- Serial handling --------------------------------------------------
+
+    def on_arduino_connected(self):
+        """Bring a freshly opened Arduino up to date."""
+        self.log_health_event("Connected to Arduino.")
+        # Ask for a full state dump rather than waiting for the next 10 s report
+        self.send_command("GET_STATE\n")
+        # Measure the clock straight away; it is only set if it is actually off
+        self.clock_sync.query()
+        # Report intervals are not kept across an Arduino reset
+        self.rates.apply(force=True)
+
+    def on_link_state_change(self, state):
+        print(f"[INFO] Arduino link is {state}")
+        self.log_health_event(f"Arduino link {state}")
+        # Let clients show the link state without waiting for telemetry
+        self.last_lines["LINK"] = f"LINK:{state}"
+        self.notify_listeners(self.last_lines["LINK"])
+
+    def handle_line(self, response):
+        """Log, parse and fan out a single line received from the Arduino."""
+        # Timestamp time replies before anything slower (printing, file I/O) happens
+        answered_query = response.startswith("TIME:") and self.clock_sync.handle_time(response)
+
+        print(f"[ARDUINO] {response}")
+        # Log every Arduino message to arduino_log.txt
+        self.append_arduino_log(response)
+
+        if response.startswith("RSTATE:"):
+            self.last_lines["RSTATE"] = response
+            self.update_relay_states(response)
+            self.confirm_stream("RSTATE")
+        elif response.startswith("SSTATE:"):
+            self.last_lines["SSTATE"] = response
+            self.update_sensor_states(response)
+            self.confirm_stream("SSTATE")
+        elif response.startswith(("RATE_OK:", "RATE_ERR:", "BURST_")):
+            self.rates.handle_reply(response)
+        elif response.startswith("TIME:"):
+            self.last_lines["TIME"] = response
+            self.last_time_received_timestamp = datetime.now()
+            if answered_query:
+                clock = self.clock_sync.metrics()
+                self.append_arduino_log(
+                    f"CLOCK_SYNC: offset={clock['offset_s']}s drift={clock['drift_ppm']}ppm "
+                    f"rtt={clock['rtt_ms']}ms corrections={clock['corrections']}"
+                )
+
+        self.notify_listeners(response)
+
+    def notify_listeners(self, line):
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(line)
+            except Exception as e:
+                print(f"⚠ Listener error: {e}")
+
+    def append_arduino_log(self, message):
+        now = datetime.now()
+        self.arduino_log.write(f"{now.isoformat()} - {message}\n", now)
+
+    def apply_relay_state(self, response):
+        """Record the relay states in an RSTATE message and return them by device code."""
+        relay_states = parse_relay_state(response)
+        if relay_states is None:
+            return None
+        for code, key in RELAY_CODES.items():
+            if code in relay_states:
+                self.relay_states[key] = bool(relay_states[code])
+        return relay_states
+
+    def apply_sensor_state(self, response):
+        """Record the sensor readings in an SSTATE message and return them."""
+        sensor_state = parse_sensor_state(response)
+        if sensor_state is not None:
+            self.sensor_state = sensor_state
+            self.sensor_clean = self.sensor_filter.update(sensor_state)
+        return sensor_state
+
+    def update_relay_states(self, response):
+        """ Parse the Arduino relay state message and record it. """
+        try:
+            relay_states = self.apply_relay_state(response)
+            if relay_states is None:
+                return
+            self.command_queue.handle_relay_state(relay_states)
+            self.alerts.update_relays(relay_states)
+            if self.climate:
+                self.climate.handle_relay_state(relay_states)
+
+            self.save_snapshot()
+            self.write_status_to_file()
+            # Log relay state update to arduino_log.txt
+            self.append_arduino_log(f"RELAY: {response}")
+
+            # Log relay state to CSV
+            relay_row = [datetime.now().isoformat()]
+            for code in RELAY_CODES:
+                relay_row.append(relay_states.get(code, ""))
+            self.relay_log.writerow(relay_row)
+
+        except Exception as e:
+            print(f"⚠ Error parsing relay state: {e}")
+
+    def update_sensor_states(self, response):
+        """ Parse the Arduino sensor state message and record it. """
+        try:
+            if self.apply_sensor_state(response) is None:
+                return
+            if self.climate:
+                self.climate.on_sample(self.sensor_clean, received_at=self.supervisor.last_line_time)
+            self.alerts.update_sensors(self.sensor_clean)
+            if self.sample_ring:
+                self.sample_ring.publish(self.sensor_state, self.sensor_clean, self.relay_states)
+
+            self.save_snapshot()
+            self.write_status_to_file()
+            # Log sensor state update to arduino_log.txt
+            self.append_arduino_log(f"SENSOR: {response}")
+        except Exception as e:
+            print(f"⚠ Error parsing sensor state: {e}")
+
+    def set_time_on_arduino(self):
+        """Force the Arduino clock to the current system time."""
+        try:
+            self.clock_sync.correct()
+        except Exception as e:
+            print(f"Error sending time to Arduino: {e}")
+
+    # --- Warm restart ----------------------------------------------------
+
+    def restore_snapshot(self):
+        """Load the last persisted state, marked stale until the Arduino confirms it."""
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not read state snapshot: {e}")
+            return
+
+        for kind, apply in (("RSTATE", self.apply_relay_state), ("SSTATE", self.apply_sensor_state)):
+            line = snapshot.get(kind)
+            if line and apply(line) is not None:
+                self.last_lines[kind] = line
+                self.stale_streams.add(kind)
+        self.last_lines["STALE"] = "STALE:" + ",".join(sorted(self.stale_streams))
+        print(f"[INFO] Restored state snapshot from {snapshot.get('saved_at')}")
+
+    def save_snapshot(self):
+        """Persist the latest RSTATE/SSTATE lines, replacing the file atomically."""
+        snapshot = {
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "RSTATE": self.last_lines.get("RSTATE"),
+            "SSTATE": self.last_lines.get("SSTATE"),
+        }
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            os.makedirs(self.dashboard_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"⚠ Could not save state snapshot: {e}")
+
+    def confirm_stream(self, kind):
+        """Clear the stale mark on a stream once fresh telemetry has arrived."""
+        if kind not in self.stale_streams:
+            return
+        self.stale_streams.discard(kind)
+        self.last_lines["STALE"] = "STALE:" + ",".join(sorted(self.stale_streams))
+        self.notify_listeners(self.last_lines["STALE"])
+
+    # --- Status and logs --------------------------------------------------
+
+    def build_status(self):
+        """Return the dashboard status dict for the current state, with None for unknown values."""
+        return format_status(self.relay_states, self.sensor_state, stale=bool(self.stale_streams),
+                             cleaned=self.sensor_clean)
+
+    def write_status_to_file(self):
+        output_path = os.path.join(self.dashboard_dir, "status.json")
+        if self.sensor_state is None and all(state is None for state in self.relay_states.values()):
+            print("[INFO] No Arduino state known yet, status not written")
+            return
+        status = self.build_status()
+        try:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "w") as f:
+                json.dump(status, f)
+            print(f"[INFO] ✅ Status written to {output_path}")
+        except Exception as e:
+            print(f"[ERROR] ❌ Failed to write status: {e}")
+
+    def collect_metrics(self):
+        """Return controller performance counters for metrics.json."""
+        metrics = {
+            "timestamp": datetime.now().isoformat(),
+            "link_state": self.supervisor.state,
+            "link": self.supervisor.link_stats.stats(),
+            "relay_commands": self.command_queue.stats(),
+            "clock": self.clock_sync.metrics(),
+            "sensors": self.sensor_filter.stats(),
+            "alerts": self.alerts.stats(),
+            "scheduler": self.scheduler.stats(),
+            "telemetry_rates": self.rates.stats(),
+        }
+        if self.climate:
+            metrics["climate"] = self.climate.stats()
+        if self.sample_ring:
+            metrics["sample_ring"] = self.sample_ring.stats()
+        if self.pi_health and self.pi_health.last:
+            metrics["pi_health"] = self.pi_health.last
+        return metrics
+
+    def write_metrics_to_file(self):
+        output_path = os.path.join(self.dashboard_dir, "metrics.json")
+        try:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "w") as f:
+                json.dump(self.collect_metrics(), f)
+        except Exception as e:
+            print(f"[ERROR] ❌ Failed to write metrics: {e}")
+
+    def log_health_event(self, message):
+        self.health_log.writerow([datetime.now().isoformat(), message])
+
+    def log_system_health(self):
+        timestamp = datetime.now().isoformat()
+        arduino_connected = self.is_connected()
+        if self.last_time_received_timestamp:
+            seconds_since_last = (datetime.now() - self.last_time_received_timestamp).total_seconds()
+        else:
+            seconds_since_last = "N/A"
+
+        self.health_log.writerow([timestamp, arduino_connected, seconds_since_last])
+
+        # Also log to plain text log
+        try:
+            self.health_text_log.write(f"{timestamp} - Connected: {arduino_connected} ({self.supervisor.state}), Seconds since last: {seconds_since_last}\n")
+        except Exception as e:
+            print(f"[ERROR] Could not write to system_health.txt: {e}")
+
+    def log_pi_health(self):
+        self.pi_health_log.writerow(self.pi_health.row())
+
+    def log_environment_data(self):
+        status = self.build_status()
+        timestamp = datetime.now().isoformat()
+        row = [
+            timestamp,
+            status["Air Temp (Indoor)"], status["Air Temp (Outdoor)"],
+            status["Humidity (Indoor)"], status["Humidity (Outdoor)"],
+        ]
+        self.environment_log.writerow(row)
+
+
+class _ClientHandler(socketserver.StreamRequestHandler):
+    """Forward Arduino lines to one attached client and relay its commands back.
+
+    Lines are queued and written by a thread of the client's own, so a client
+    that stops reading can never hold up the serial reader. One that falls
+    OUTBOX_LIMIT lines behind is disconnected.
+    """
+
+    OUTBOX_LIMIT = 1000
+
+    def handle(self):
+        controller = self.server.controller
+        outbox = queue.Queue(maxsize=self.OUTBOX_LIMIT)
+        closed = threading.Event()
+
+        def disconnect(reason):
+            if closed.is_set():
+                return
+            closed.set()
+            print(f"⚠ Dropping client {self.client_address[0]}: {reason}")
+            try:
+                # Also wakes the command loop below and a writer stuck in a send
+                self.request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        def forward(line):
+            # Runs on the serial reader thread; must never block
+            try:
+                outbox.put_nowait(line)
+            except queue.Full:
+                disconnect(f"more than {self.OUTBOX_LIMIT} lines behind")
+
+        def write_lines():
+            while not closed.is_set():
+                try:
+                    line = outbox.get(timeout=1)
+                except queue.Empty:
+                    continue
+                try:
+                    self.wfile.write(f"{line}\n".encode())
+                except OSError as e:
+                    disconnect(e)
+
+        writer = threading.Thread(target=write_lines, daemon=True)
+        writer.start()
+        # add_listener replays the latest state before live lines stream
+        controller.add_listener(forward)
+        print(f"[INFO] Client attached from {self.client_address[0]}")
+
+        try:
+            for raw in self.rfile:
+                command = raw.decode().strip()
+                if command:
+                    controller.send_command(f"{command}\n")
+        except Exception as e:
+            if not closed.is_set():
+                print(f"⚠ Client connection error: {e}")
+        finally:
+            controller.remove_listener(forward)
+            closed.set()
+            writer.join(timeout=2)
+            print(f"[INFO] Client detached from {self.client_address[0]}")
+
+
+class ControllerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, controller, host=CONTROLLER_HOST, port=CONTROLLER_PORT):
+        super().__init__((host, port), _ClientHandler)
+        self.controller = controller
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the hydroponics controller without a GUI.")
+    parser.add_argument("--host", default=CONTROLLER_HOST, help="Address to accept GUI clients on")
+    parser.add_argument("--port", type=int, default=CONTROLLER_PORT, help="Port to accept GUI clients on")
+    parser.add_argument("--log-retention-mb", type=float, default=DEFAULT_RETENTION_BYTES / 2**20,
+                        help="Archived log space kept per log file, in MB")
+    parser.add_argument("--alert-command", help="Shell command run with each alert as JSON on stdin")
+    parser.add_argument("--schedule-alerts", action="store_true",
+                        help="Alert when relays disagree with schedule.txt (upload it with schedule_upload.py first)")
+    parser.add_argument("--climate-control", action="store_true",
+                        help="Drive the heater and vent fan from the host at sensor rate (firmware keeps its safety caps)")
+    parser.add_argument("--no-sample-ring", action="store_true",
+                        help="Do not publish samples to shared memory for other local processes")
+    parser.add_argument("--pi-health-interval", type=float, default=HydroController.PI_HEALTH_INTERVAL,
+                        help="Seconds between Pi health samples in pi_health.csv (0 to disable)")
+    args = parser.parse_args()
+
+    controller = HydroController(
+        log_retention_bytes=int(args.log_retention_mb * 2**20),
+        alert_command=args.alert_command,
+        schedule_alerts=args.schedule_alerts,
+        climate_control=args.climate_control,
+        sample_ring=not args.no_sample_ring,
+        pi_health_interval=args.pi_health_interval,
+    )
+    controller.start()
+
+    server = ControllerServer(controller, args.host, args.port)
+    print(f"[INFO] Controller listening for clients on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
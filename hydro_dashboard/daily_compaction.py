@@ -0,0 +1,193 @@
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# --- Configuration ---
+HERE = os.path.dirname(os.path.abspath(__file__))
+LOCAL_RAW_DATA_PATH = os.path.join(HERE, 'local_5min_records.pkl')
+ARCHIVE_DIR = os.path.join(HERE, 'daily_archive')
+INDEX_NAME = 'index.json'
+SERVICE_ACCOUNT_KEY_PATH = '/home/tcar5787/APIkeys/hydrowebkey/serviceAccountKey.json'
+BUCKET_NAME = 'hydroweb-fe1ae.firebasestorage.app'
+REMOTE_FOLDER = 'daily-archive'
+KEEP_DAYS = 2  # archived days still kept in the pickle, for the 2-hour aggregation
+
+# Non-numeric columns; everything else is stored as float so each file has one schema
+TEXT_COLUMNS = ['timestamp', 'timestamp_local']
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def read_index(archive_dir=ARCHIVE_DIR):
+    path = os.path.join(archive_dir, INDEX_NAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"days": {}}
+
+
+def write_index(index, archive_dir=ARCHIVE_DIR):
+    path = os.path.join(archive_dir, INDEX_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def record_days(df):
+    """Local calendar date of each record (timestamps are the Pi's local time)."""
+    return pd.to_datetime(df['timestamp'], errors='coerce').dt.date
+
+
+def archive_day(day_df, day, archive_dir=ARCHIVE_DIR):
+    """Write one day's records to a read-only Parquet file (gzipped CSV without pyarrow).
+
+    Returns the index entry for the file.
+    """
+    day_df = day_df.sort_values('timestamp').reset_index(drop=True)
+    for column in day_df.columns:
+        if column not in TEXT_COLUMNS:
+            # to_numeric keeps whole-number columns (relays, floats) as int64; a later day
+            # with a gap in one would be float64, so everything is cast to one type
+            day_df[column] = pd.to_numeric(day_df[column], errors='coerce').astype(float)
+
+    if parquet_available():
+        name, fmt = f"{day.isoformat()}.parquet", 'parquet'
+    else:
+        name, fmt = f"{day.isoformat()}.csv.gz", 'csv.gz'
+    path = os.path.join(archive_dir, name)
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists; archives are never rewritten")
+
+    tmp_path = path + '.tmp'
+    if fmt == 'parquet':
+        day_df.to_parquet(tmp_path, index=False, compression='zstd')
+    else:
+        day_df.to_csv(tmp_path, index=False, compression='gzip')
+    os.replace(tmp_path, path)
+    os.chmod(path, 0o444)
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    timestamps = pd.to_datetime(day_df['timestamp'])
+    return {
+        "file": name,
+        "format": fmt,
+        "rows": len(day_df),
+        "first": timestamps.iloc[0].isoformat(),
+        "last": timestamps.iloc[-1].isoformat(),
+        "columns": list(day_df.columns),
+        "bytes": os.path.getsize(path),
+        "sha256": digest,
+        "uploaded": False,
+    }
+
+
+def open_bucket():
+    """The Firebase Storage bucket, initialising the app if the caller has not."""
+    import firebase_admin
+    from firebase_admin import credentials, storage
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH))
+    return storage.bucket(BUCKET_NAME)
+
+
+def upload_archive(bucket, entry, archive_dir=ARCHIVE_DIR):
+    remote_path = f"{REMOTE_FOLDER}/{entry['file']}"
+    try:
+        bucket.blob(remote_path).upload_from_filename(os.path.join(archive_dir, entry['file']))
+        entry["uploaded"] = True
+        print(f"[INFO] Uploaded {entry['file']} to {remote_path}")
+    except Exception as e:
+        print(f"[ERROR] Failed to upload {entry['file']}: {e}")
+
+
+def compact(df, archive_dir=ARCHIVE_DIR, bucket=None, today=None):
+    """Archive every complete day in df that is not archived yet. Returns the dates archived.
+
+    Only days before today are sealed, so a day is archived once, whole.
+    With a bucket, each new archive (and any earlier one whose upload
+    failed) is uploaded as a single blob.
+    """
+    today = today or datetime.now().date()
+    os.makedirs(archive_dir, exist_ok=True)
+    index = read_index(archive_dir)
+    archived = []
+
+    if not df.empty:
+        days = record_days(df)
+        for day in sorted(d for d in days.dropna().unique() if d < today):
+            if day.isoformat() in index["days"]:
+                continue
+            try:
+                entry = archive_day(df[days == day].copy(), day, archive_dir)
+            except Exception as e:
+                print(f"[ERROR] Failed to archive {day}: {e}")
+                continue
+            index["days"][day.isoformat()] = entry
+            archived.append(day)
+            print(f"[INFO] Archived {entry['rows']} records for {day} to {entry['file']} ({entry['bytes']} bytes).")
+
+    if bucket is not None:
+        for entry in index["days"].values():
+            if not entry.get("uploaded"):
+                upload_archive(bucket, entry, archive_dir)
+
+    index["updated"] = datetime.now().isoformat()
+    write_index(index, archive_dir)
+    return archived
+
+
+def trim_archived(df, archive_dir=ARCHIVE_DIR, keep_days=KEEP_DAYS, today=None):
+    """Drop records of archived days older than keep_days, so the pickle stops growing."""
+    if df.empty:
+        return df
+    today = today or datetime.now().date()
+    cutoff = today - timedelta(days=keep_days)
+    archived_days = set(read_index(archive_dir)["days"])
+    days = record_days(df)
+    drop = pd.Series(False, index=df.index)
+    for day in days.dropna().unique():
+        if day < cutoff and day.isoformat() in archived_days:
+            drop |= days == day
+    if drop.any():
+        print(f"[INFO] Trimmed {int(drop.sum())} archived records from the local data.")
+    return df[~drop].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seal complete days of 5-minute records into daily archive files.")
+    parser.add_argument("--upload", action="store_true", help="Also upload each archive to Firebase Storage")
+    parser.add_argument("--trim", action="store_true",
+                        help="Remove archived days from the pickle (stop the uploader first, it rewrites the file)")
+    parser.add_argument("--keep-days", type=int, default=KEEP_DAYS, help="Archived days to keep in the pickle")
+    args = parser.parse_args()
+
+    if not os.path.exists(LOCAL_RAW_DATA_PATH):
+        print(f"[ERROR] {LOCAL_RAW_DATA_PATH} not found.")
+        return 1
+    df = pd.read_pickle(LOCAL_RAW_DATA_PATH)
+    bucket = open_bucket() if args.upload else None
+    archived = compact(df, bucket=bucket)
+    print(f"[INFO] {len(archived)} new day(s) archived in {ARCHIVE_DIR}.")
+
+    if args.trim:
+        trimmed = trim_archived(df, keep_days=args.keep_days)
+        if len(trimmed) != len(df):
+            trimmed.to_pickle(LOCAL_RAW_DATA_PATH)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+import argparse
+import itertools
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from daily_compaction import ARCHIVE_DIR, LOCAL_RAW_DATA_PATH, TEXT_COLUMNS, read_index, record_days
+
+# Float switch columns are combined with max when resampling, everything else with mean
+FLOAT_SUFFIX = '_low'
+
+
+def parse_time(text):
+    """Accept a date (YYYY-MM-DD) or an ISO date-time."""
+    return pd.Timestamp(datetime.fromisoformat(text))
+
+
+def _read_archive(entry, archive_dir, columns):
+    path = os.path.join(archive_dir, entry['file'])
+    wanted = None if columns is None else [c for c in ['timestamp'] + columns if c in entry.get('columns', [])]
+    if entry['format'] == 'parquet':
+        return pd.read_parquet(path, columns=wanted)
+    return pd.read_csv(path, usecols=wanted, compression='gzip')
+
+
+def _recent_days(start, end, archived):
+    """Records from the pickle for days not yet archived, one day at a time."""
+    if not os.path.exists(LOCAL_RAW_DATA_PATH):
+        return
+    df = pd.read_pickle(LOCAL_RAW_DATA_PATH)
+    if df.empty:
+        return
+    days = record_days(df)
+    for day in sorted(days.dropna().unique()):
+        if day.isoformat() not in archived and start.date() <= day <= end.date():
+            yield df[days == day]
+
+
+def _resample(chunk, resolution):
+    rules = {}
+    for column in chunk.columns:
+        if column.endswith(FLOAT_SUFFIX):
+            rules[column] = 'max'   # a float was low at some point in the bin
+        else:
+            rules[column] = 'mean'  # relays become the fraction of the bin they were on
+    # origin='start_day' aligns bins to midnight, so a day-sized chunk never splits a bin
+    return chunk.resample(resolution, origin='start_day').agg(rules).dropna(how='all')
+
+
+def iter_chunks(start, end, channels=None, resolution=None, archive_dir=ARCHIVE_DIR):
+    """Yield DataFrames indexed by timestamp covering [start, end), at most one day per chunk.
+
+    Archived days are read from daily_archive/ and the days not archived yet
+    from the local pickle, so memory use is bounded by a day of records
+    whatever the range. resolution is a pandas offset such as '15min' or
+    '1h' and must divide a day.
+    """
+    if resolution and pd.Timedelta(days=1) % pd.Timedelta(resolution):
+        raise ValueError(f"resolution {resolution} does not divide a day")
+
+    index = read_index(archive_dir)["days"]
+    archived_chunks = (
+        _read_archive(entry, archive_dir, channels)
+        for day, entry in sorted(index.items())
+        if start.date() <= datetime.fromisoformat(day).date() <= end.date()
+    )
+    for chunk in itertools.chain(archived_chunks, _recent_days(start, end, index)):
+        chunk = chunk.copy()
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], errors='coerce')
+        chunk = chunk.dropna(subset=['timestamp']).set_index('timestamp').sort_index()
+        chunk = chunk[(chunk.index >= start) & (chunk.index < end)]
+        chunk = chunk.drop(columns=[c for c in TEXT_COLUMNS if c in chunk.columns])
+        if channels is not None:
+            chunk = chunk[[c for c in channels if c in chunk.columns]]
+        # All float, like the archives, so a chunk with gaps matches the first chunk's schema
+        chunk = chunk.apply(pd.to_numeric, errors='coerce').astype(float)
+        if resolution:
+            chunk = _resample(chunk, resolution)
+        if not chunk.empty:
+            yield chunk
+
+
+def export(start, end, output, channels=None, resolution=None, fmt=None, archive_dir=ARCHIVE_DIR):
+    """Stream a time range to a CSV or Parquet file (or CSV to stdout when output is '-').
+
+    Returns the number of rows written.
+    """
+    fmt = fmt or ('parquet' if str(output).endswith('.parquet') else 'csv')
+    rows = 0
+    writer = None
+    columns = None
+    out = sys.stdout if output == '-' else None
+    try:
+        for chunk in iter_chunks(start, end, channels, resolution, archive_dir):
+            # Days archived before a column existed are padded so every chunk has one schema
+            columns = columns or (channels if channels is not None else list(chunk.columns))
+            chunk = chunk.reindex(columns=columns).reset_index()
+            if fmt == 'parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema, compression='zstd')
+                writer.write_table(table.cast(writer.schema))
+            else:
+                if out is None:
+                    out = open(output, 'w', newline='')
+                chunk.to_csv(out, index=False, header=rows == 0)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export telemetry for a time range to CSV or Parquet.")
+    parser.add_argument("--start", required=True, help="Start date or date-time (inclusive)")
+    parser.add_argument("--end", help="End date or date-time (exclusive, default: now)")
+    parser.add_argument("--channels", help="Comma-separated columns, e.g. air_temp_indoor,relay_heater")
+    parser.add_argument("--resolution", help="Resample to this interval, e.g. 15min or 1h")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="Default: from the output extension")
+    parser.add_argument("-o", "--output", default="-", help="Output file ('-' for CSV on stdout)")
+    args = parser.parse_args()
+
+    start = parse_time(args.start)
+    end = parse_time(args.end) if args.end else pd.Timestamp(datetime.now() + timedelta(seconds=1))
+    channels = args.channels.split(",") if args.channels else None
+    if args.output == '-' and args.format == 'parquet':
+        parser.error("Parquet needs an output file")
+
+    try:
+        rows = export(start, end, args.output, channels, args.resolution, args.format)
+    except (ImportError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    print(f"[INFO] Exported {rows} rows.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import json
 from datetime import datetime, timedelta
@@ -8,15 +9,52 @@ from firebase_admin import credentials, firestore
 import traceback
 import pytz
 
+from daily_compaction import compact, open_bucket, trim_archived
+from sendDailyImages2Firebase import capture_and_upload
+
+# scheduler.py is shared with the controller in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scheduler import Scheduler  # noqa: E402
+
 
 # --- Configuration ---
 SERVICE_ACCOUNT_KEY_PATH = '/home/tcar5787/APIkeys/hydrowebkey/serviceAccountKey.json'
 STATUS_JSON_PATH = '/home/tcar5787/Documents/hydromonitor_v2/hydro_dashboard/status.json'
 FIRESTORE_COLLECTION_5MIN = 'Current Days Log'
+# One document per local day holding that day's 5-minute samples as parallel arrays
+FIRESTORE_COLLECTION_HISTORY = 'Daily History'
 LOCAL_RAW_DATA_PATH = '/home/tcar5787/Documents/hydromonitor_v2/hydro_dashboard/local_5min_records.pkl'
 LOCAL_AGG_DATA_PATH = '/home/tcar5787/Documents/hydromonitor_v2/hydro_dashboard/local_2hour_aggregates.csv'
 AGGREGATE_INTERVAL = 2 * 60 * 60  # 2 hours in seconds
 CHECK_INTERVAL = 5 * 60  # 5 minutes in seconds
+UPLOAD_DAILY_ARCHIVE = False  # also copy each sealed day to Firebase Storage (daily-archive/)
+COMPACTION_TIME = 10 * 60  # seconds after midnight to seal the previous day
+DAILY_IMAGE_TIME = 12 * 60 * 60  # seconds after midnight to capture camera images (replaces the cron job)
+UPLOADER_METRICS_PATH = '/home/tcar5787/Documents/hydromonitor_v2/hydro_dashboard/uploader_metrics.json'
+HEARTBEAT_INTERVAL = 30 * 60  # how often a no-op interval still writes the heartbeat doc
+# No 'timestamp' field, so getHistory's orderBy("timestamp") never returns it
+HEARTBEAT_DOC_ID = 'uploader_heartbeat'
+
+# Set up once rather than on every upload
+LOCAL_TZ = pytz.timezone("Australia/Sydney")
+SENSOR_KEYS = ['Air Temp (Indoor)', 'Air Temp (Outdoor)', 'Humidity (Indoor)', 'Humidity (Outdoor)',
+               'Water Temp Top', 'Water Temp Bottom']
+RELAY_KEYS = ['Relay Lights Top', 'Relay Lights Bottom', 'Relay Pump Top', 'Relay Pump Bottom',
+              'Relay Fan Vent', 'Relay Fan Circ', 'Relay Heater']
+FLOAT_KEYS = ['Top Float', 'Bottom Float']
+SENSOR_RENAME_MAP = {
+    'Air Temp (Indoor)': 'air_temp_indoor',
+    'Air Temp (Outdoor)': 'air_temp_outdoor',
+    'Humidity (Indoor)': 'humidity_indoor',
+    'Humidity (Outdoor)': 'humidity_outdoor',
+    'Water Temp Top': 'water_temp_top',
+    'Water Temp Bottom': 'water_temp_bottom'
+}
+RELAY_COLUMNS = {key: key.lower().replace(" ", "_") for key in RELAY_KEYS}
+FLOAT_COLUMNS = {key: key.lower().replace(" ", "_") + '_low' for key in FLOAT_KEYS}
+PACKED_FIELDS = list(SENSOR_RENAME_MAP.values()) + list(RELAY_COLUMNS.values()) + list(FLOAT_COLUMNS.values())
+# Fields that change on every upload and so say nothing about whether the readings changed
+VOLATILE_FIELDS = ('timestamp', 'timestamp_local')
 
 def initialize_firebase():
     try:
@@ -31,31 +69,98 @@ def initialize_firebase():
         print(f"[ERROR] Firebase initialization failed: {e}")
         raise
 
-def upload_status_to_firestore(db, status_data, timestamp_key, collection=FIRESTORE_COLLECTION_5MIN):
+def upload_status_to_firestore(db, status_data, timestamp_key, collection=FIRESTORE_COLLECTION_5MIN, previous=None):
+    """Write a status document and return what the document now holds, or None on failure.
+
+    With previous (what this document held after the last upload), only the
+    fields that differ are sent, as a merge write.
+    """
     try:
         # Convert sensor fields to floats before upload
-        for key in ['Air Temp (Indoor)', 'Air Temp (Outdoor)', 'Humidity (Indoor)', 'Humidity (Outdoor)',
-                    'Water Temp Top', 'Water Temp Bottom']:
+        for key in SENSOR_KEYS:
             if key in status_data:
                 try:
                     status_data[key] = float(str(status_data[key]).strip())
                 except Exception:
                     status_data[key] = None
 
-        print(f"[DEBUG] Preparing to upload to Firestore collection '{collection}' with doc ID '{timestamp_key}'")
-        print(f"[DEBUG] Data: {status_data}")
         # Add local ISO 8601 timestamp for web clients
-        local_tz = pytz.timezone("Australia/Sydney")
-        status_data['timestamp_local'] = datetime.now(local_tz).isoformat()
+        status_data['timestamp_local'] = datetime.now(LOCAL_TZ).isoformat()
         doc_ref = db.collection(collection).document(timestamp_key)
-        doc_ref.set(status_data)
+        if previous is None:
+            print(f"[DEBUG] Preparing to upload to Firestore collection '{collection}' with doc ID '{timestamp_key}'")
+            print(f"[DEBUG] Data: {status_data}")
+            doc_ref.set(status_data)
+        else:
+            changed = {key: value for key, value in status_data.items() if previous.get(key) != value}
+            print(f"[DEBUG] Merging {len(changed)} of {len(status_data)} fields into '{collection}/{timestamp_key}'")
+            print(f"[DEBUG] Data: {changed}")
+            doc_ref.set(changed, merge=True)
         print(f"[{datetime.now().isoformat()}] Uploaded status for {timestamp_key} to Firestore collection '{collection}'.")
+        return dict(previous or {}, **status_data)
     except Exception as e:
         print(f"[ERROR] Failed to upload to Firestore: {e}")
+        return None
+
+def write_heartbeat(db, note):
+    """Record that the uploader is alive without touching any history slot."""
+    try:
+        db.collection(FIRESTORE_COLLECTION_5MIN).document(HEARTBEAT_DOC_ID).set({
+            'last_check_local': datetime.now(LOCAL_TZ).isoformat(),
+            'note': note,
+        })
+        print(f"[{datetime.now().isoformat()}] Heartbeat: {note}")
+    except Exception as e:
+        print(f"[ERROR] Failed to write heartbeat: {e}")
+
+def packed_day_id(day):
+    return day.strftime("day_%Y-%m-%d")
+
+def empty_packed_day(day):
+    packed = {'date': day.isoformat(), 't': []}
+    packed.update({field: [] for field in PACKED_FIELDS})
+    return packed
+
+def load_packed_day(db, day):
+    """Fetch a day's packed history so a restarted uploader keeps appending to it."""
+    doc_id = packed_day_id(day)
+    try:
+        snapshot = db.collection(FIRESTORE_COLLECTION_HISTORY).document(doc_id).get()
+        if snapshot.exists:
+            packed = snapshot.to_dict()
+            # Arrays added to PACKED_FIELDS since the doc was written are padded to line up
+            for field in PACKED_FIELDS:
+                packed.setdefault(field, [None] * len(packed.get('t', [])))
+            return packed
+    except Exception as e:
+        print(f"[WARN] Failed to load packed history {doc_id}: {e}")
+    return empty_packed_day(day)
+
+def append_packed_sample(packed, record, epoch_seconds):
+    """Add one uploaded record to the day's arrays; 't' holds Unix seconds."""
+    for field in PACKED_FIELDS:
+        value = record.get(field)
+        if isinstance(value, float):
+            value = None if value != value else round(value, 2)  # NaN -> None
+        packed[field].append(value)
+    packed['t'].append(int(epoch_seconds))
+
+def upload_packed_day(db, packed):
+    try:
+        day = datetime.strptime(packed['date'], "%Y-%m-%d")
+        db.collection(FIRESTORE_COLLECTION_HISTORY).document(packed_day_id(day)).set(packed)
+        print(f"[{datetime.now().isoformat()}] Packed history {packed['date']} now has {len(packed['t'])} samples.")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Failed to upload packed history: {e}")
+        return False
+
+def reading_fields(record):
+    """The parts of an upload that describe the greenhouse, for change detection."""
+    return {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
 
 def get_5min_rounded_timestamp():
-    tz = pytz.timezone("Australia/Sydney")
-    now = datetime.now(tz)
+    now = datetime.now(LOCAL_TZ)
     minute = (now.minute // 5) * 5
     rounded = now.replace(minute=minute, second=0, microsecond=0)
     time_str = rounded.strftime("log_%H-%M")
@@ -73,6 +178,10 @@ def load_local_data():
         'air_temp_indoor', 'air_temp_outdoor',
         'humidity_indoor', 'humidity_outdoor',
         'water_temp_top', 'water_temp_bottom',
+        # Unfiltered readings, kept beside the cleaned values above
+        'air_temp_indoor_raw', 'air_temp_outdoor_raw',
+        'humidity_indoor_raw', 'humidity_outdoor_raw',
+        'water_temp_top_raw', 'water_temp_bottom_raw',
         'relay_lights_top', 'relay_lights_bottom',
         'relay_pump_top', 'relay_pump_bottom',
         'relay_fan_vent', 'relay_fan_circ',
@@ -96,33 +205,26 @@ def append_new_record(df, status_data):
         status_data['timestamp'] = pd.Timestamp.now()
 
     # Convert relay states ON/OFF -> 1/0
-    for relay_key in ['Relay Lights Top', 'Relay Lights Bottom',
-                      'Relay Pump Top', 'Relay Pump Bottom',
-                      'Relay Fan Vent', 'Relay Fan Circ',
-                      'Relay Heater']:
+    for relay_key, col_name in RELAY_COLUMNS.items():
         val = status_data.get(relay_key)
-        col_name = relay_key.lower().replace(" ", "_")
         if isinstance(val, str):
             status_data[col_name] = 1 if val.upper() == 'ON' else 0
         else:
             status_data[col_name] = 0
 
     # Floats: mark 1 if ever "Low"
-    for float_key in ['Top Float', 'Bottom Float']:
+    for float_key, col_name in FLOAT_COLUMNS.items():
         val = status_data.get(float_key, '')
-        col_name = float_key.lower().replace(" ", "_") + '_low'
         status_data[col_name] = 1 if str(val).lower() == 'low' else 0
 
     # Remove original relay/float keys to avoid duplicates
-    for key in ['Relay Lights Top', 'Relay Lights Bottom', 'Relay Pump Top', 'Relay Pump Bottom',
-                'Relay Fan Vent', 'Relay Fan Circ', 'Relay Heater', 'Top Float', 'Bottom Float']:
+    for key in RELAY_KEYS + FLOAT_KEYS:
         if key in status_data:
             status_data.pop(key)
 
 
     # Convert sensor string fields to float or None
-    for key in ['Air Temp (Indoor)', 'Air Temp (Outdoor)', 'Humidity (Indoor)', 'Humidity (Outdoor)',
-                'Water Temp Top', 'Water Temp Bottom']:
+    for key in SENSOR_KEYS + [f"{key} Raw" for key in SENSOR_KEYS]:
         if key in status_data:
             try:
                 status_data[key] = float(str(status_data[key]).strip())
@@ -130,20 +232,14 @@ def append_new_record(df, status_data):
                 status_data[key] = None
 
     # Rename sensor keys to match expected DataFrame columns
-    sensor_rename_map = {
-        'Air Temp (Indoor)': 'air_temp_indoor',
-        'Air Temp (Outdoor)': 'air_temp_outdoor',
-        'Humidity (Indoor)': 'humidity_indoor',
-        'Humidity (Outdoor)': 'humidity_outdoor',
-        'Water Temp Top': 'water_temp_top',
-        'Water Temp Bottom': 'water_temp_bottom'
-    }
-    for old_key, new_key in sensor_rename_map.items():
+    for old_key, new_key in SENSOR_RENAME_MAP.items():
         if old_key in status_data:
             status_data[new_key] = status_data.pop(old_key)
+        if f"{old_key} Raw" in status_data:
+            status_data[f"{new_key}_raw"] = status_data.pop(f"{old_key} Raw")
 
     # Remove keys not meant for dataframe
-    for skip_key in ['data', 'note']:
+    for skip_key in ['data', 'note', 'stale']:
         if skip_key in status_data:
             status_data.pop(skip_key)
 
@@ -154,9 +250,8 @@ def aggregate_2hour(df):
     if df.empty:
         return pd.DataFrame()
 
-    tz = pytz.timezone("Australia/Sydney")
     df = df.copy()
-    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize('UTC').dt.tz_convert(tz)
+    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize('UTC').dt.tz_convert(LOCAL_TZ)
     df = df.dropna(subset=['timestamp'])
     df['time_bin'] = df['timestamp'].dt.floor('2H')
 
@@ -207,70 +302,127 @@ def save_aggregates(agg_df):
     except Exception as e:
         print(f"[ERROR] Failed to save aggregates: {e}")
 
-def main_loop():
-    db = initialize_firebase()
-    last_mod_time = None
-    df = load_local_data()
-    last_aggregate_time = datetime.now() - timedelta(seconds=AGGREGATE_INTERVAL)
-
-    print(f"[{datetime.now().isoformat()}] Starting 5-minute interval status uploader with local aggregation...")
-
-    while True:
-        try:
-            timestamp_key = get_5min_rounded_timestamp()
-
-            if os.path.exists(STATUS_JSON_PATH):
-                mod_time = os.path.getmtime(STATUS_JSON_PATH)
-                if last_mod_time is None or mod_time > last_mod_time:
-                    with open(STATUS_JSON_PATH, 'r') as f:
-                        status_data = json.load(f)
-                    last_mod_time = mod_time
-                else:
-                    status_data = {
-                        "timestamp": timestamp_key,
-                        "data": None,
-                        "note": "No new data at this interval"
-                    }
+class StatusUploader:
+    """Upload state shared by the scheduled jobs. All of them except the image
+    capture run on the scheduler thread, so they never overlap each other."""
+
+    def __init__(self, db):
+        self.db = db
+        self.last_mod_time = None
+        self.df = load_local_data()
+        # Slot doc ID -> fields that doc held after our last write. Slots are reused
+        # every day, so a merge against yesterday's contents still only sends the difference.
+        self.slot_cache = {}
+        self.last_uploaded = None
+        self.last_heartbeat = (None, 0.0)  # (note, time.monotonic())
+        self.packed_day = load_packed_day(db, datetime.now(LOCAL_TZ).date())
+
+    def upload_interval(self):
+        timestamp_key = get_5min_rounded_timestamp()
+
+        status_data = None
+        note = None
+        unchanged = False
+        if os.path.exists(STATUS_JSON_PATH):
+            mod_time = os.path.getmtime(STATUS_JSON_PATH)
+            if self.last_mod_time is None or mod_time > self.last_mod_time:
+                with open(STATUS_JSON_PATH, 'r') as f:
+                    status_data = json.load(f)
+                self.last_mod_time = mod_time
+                # A restored snapshot is not fresh telemetry; don't upload it as if it were
+                if status_data.get("stale"):
+                    status_data, note = None, "Only stale state available"
             else:
-                status_data = {
-                    "timestamp": timestamp_key,
-                    "data": None,
-                    "note": "Status file missing"
-                }
+                note = "No new data at this interval"
+        else:
+            note = "Status file missing"
 
+        if status_data is not None:
             # Append to local dataframe and save raw data
-            df = append_new_record(df, status_data)
-            save_local_data(df)
+            self.df = append_new_record(self.df, status_data)
+            save_local_data(self.df)
+            # Unchanged readings still go to the slot: against the cached slot contents
+            # that is usually just the two timestamps, and it keeps getStatus's
+            # "last reading" current and today's slot free of yesterday's values
+            unchanged = self.last_uploaded is not None and reading_fields(status_data) == reading_fields(self.last_uploaded)
+
+        if note:
+            # Nothing new for the history: leave the slot alone and only refresh the
+            # heartbeat when the reason changes or it is getting old
+            previous_note, heartbeat_time = self.last_heartbeat
+            if note != previous_note or time.monotonic() - heartbeat_time >= HEARTBEAT_INTERVAL:
+                write_heartbeat(self.db, note)
+                self.last_heartbeat = (note, time.monotonic())
+            else:
+                print(f"[DEBUG] Skipping upload for {timestamp_key}: {note}")
+            return
 
-            # Upload 5-min status record to Firestore
+        if unchanged:
+            print(f"[DEBUG] Readings unchanged; refreshing timestamps of {timestamp_key}...")
+        else:
             print(f"[DEBUG] Uploading 5-minute status record at {timestamp_key}...")
-            upload_status_to_firestore(db, status_data, timestamp_key)
-
-            # Check if time to aggregate 2-hour data
-            now = datetime.now()
-            if (now - last_aggregate_time).total_seconds() >= AGGREGATE_INTERVAL:
-                agg_df = aggregate_2hour(df)
-                if not agg_df.empty:
-                    save_aggregates(agg_df)
-                    # Upload aggregates to Firestore under 'Hydro Records'
-                    for _, row in agg_df.iterrows():
-                        agg_doc_id = row['timestamp'].strftime("log_%Y-%m-%d_%H-%M")
-                        print(f"[DEBUG] Uploading aggregate record at {row['timestamp']} to 'Hydro Records'")
-                        upload_status_to_firestore(db, row.to_dict(), agg_doc_id, collection='Hydro Records')
-                last_aggregate_time = now
-
-            # Sleep until next 5-minute mark
-            now = datetime.utcnow()
-            next_time = (now + timedelta(minutes=5)).replace(second=0, microsecond=0)
-            wait_seconds = (next_time - now).total_seconds()
-            if wait_seconds < 0:
-                wait_seconds = 0
-            time.sleep(wait_seconds)
+        uploaded = upload_status_to_firestore(self.db, status_data, timestamp_key,
+                                              previous=self.slot_cache.get(timestamp_key))
+        if uploaded is None:
+            return
+        self.slot_cache[timestamp_key] = uploaded
+        self.last_uploaded = uploaded
+        self.last_heartbeat = (None, 0.0)
+
+        # The dashboard reads history from the packed day doc, one read per load.
+        # Unchanged intervals are appended too, so it holds one sample per slot.
+        today = datetime.now(LOCAL_TZ).date()
+        if self.packed_day['date'] != today.isoformat():
+            self.packed_day = empty_packed_day(today)
+        append_packed_sample(self.packed_day, uploaded, time.time())
+        upload_packed_day(self.db, self.packed_day)
+
+    def aggregate(self):
+        agg_df = aggregate_2hour(self.df)
+        if not agg_df.empty:
+            save_aggregates(agg_df)
+            # Upload aggregates to Firestore under 'Hydro Records'
+            for _, row in agg_df.iterrows():
+                agg_doc_id = row['timestamp'].strftime("log_%Y-%m-%d_%H-%M")
+                print(f"[DEBUG] Uploading aggregate record at {row['timestamp']} to 'Hydro Records'")
+                upload_status_to_firestore(self.db, row.to_dict(), agg_doc_id, collection='Hydro Records')
+
+    def compact_daily(self):
+        """Seal completed days into the local archive and drop them from the pickle."""
+        compact(self.df, bucket=open_bucket() if UPLOAD_DAILY_ARCHIVE else None)
+        self.df = trim_archived(self.df)
+        save_local_data(self.df)
+
+
+def write_uploader_metrics(scheduler):
+    try:
+        with open(UPLOADER_METRICS_PATH + '.tmp', 'w') as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "scheduler": scheduler.stats()}, f, indent=2)
+        os.replace(UPLOADER_METRICS_PATH + '.tmp', UPLOADER_METRICS_PATH)
+    except Exception as e:
+        print(f"[ERROR] Failed to write uploader metrics: {e}")
 
-        except Exception as e:
-            print(f"[{datetime.now().isoformat()}] Error in main loop: {e}")
-            traceback.print_exc()
-            time.sleep(30)  # short delay before retry
+def main_loop():
+    db = initialize_firebase()
+    uploader = StatusUploader(db)
+    scheduler = Scheduler()
+
+    print(f"[{datetime.now().isoformat()}] Starting 5-minute interval status uploader with local aggregation...")
+
+    # Catch up on anything missed while the uploader was down, then run on the marks
+    uploader.aggregate()
+    uploader.compact_daily()
+    # On the wall-clock five-minute marks, so slot IDs line up and uploads do not drift
+    scheduler.aligned(CHECK_INTERVAL, uploader.upload_interval, name="upload_status")
+    scheduler.aligned(AGGREGATE_INTERVAL, uploader.aggregate, offset=60, name="aggregate_2hour")
+    scheduler.aligned(24 * 60 * 60, uploader.compact_daily, offset=COMPACTION_TIME, name="daily_compaction")
+    # Camera capture and upload take a while, so they run on the worker pool
+    scheduler.aligned(24 * 60 * 60, capture_and_upload, offset=DAILY_IMAGE_TIME, name="daily_images",
+                      blocking=True)
+    scheduler.every(CHECK_INTERVAL, lambda: write_uploader_metrics(scheduler), delay=CHECK_INTERVAL,
+                    name="uploader_metrics")
+    scheduler.start()
+    scheduler.join()
 
 def supervisor():
     """Run the main loop but restart if stuck/crashes."""
@@ -1,38 +1,45 @@
 import tkinter as tk
-import threading
+import argparse
+import time
 from datetime import datetime
-import json
-import os
-import sys
-import csv
 from gui_helpers import (
     update_connection_status,
 )
-from arduino_helpers import connect_to_arduino, send_command_to_arduino
+from arduino_helpers import RELAY_CODES, parse_relay_state, parse_sensor_state
+from command_queue import RelayCommandQueue
+from controller_client import ControllerClient
+from gui_renderer import GuiRenderer
+from hydro_controller import HydroController
+from sparkline import Sparkline
 
 
 class HydroponicsGUI:
+    """Touchscreen front end. All serial, logging and scheduling lives in the controller."""
+
     RELAY_STATE_LENGTH = 7
     SENSOR_STATE_LENGTH = 6
-    RESTART_THRESHOLD_SECONDS = 120  # 2 minutes
-
-    def schedule_periodic_time_sync(self):
-        """Resend current time to Arduino every 10 minutes."""
-        self.set_time_on_arduino()
-        self.root.after(10 * 60 * 1000, self.schedule_periodic_time_sync)
+    TREND_HOURS = 6  # history shown by the sensor sparklines
+    INDOOR_COLOR = "#d32f2f"
+    OUTDOOR_COLOR = "#1976d2"
 
-    def __init__(self, root, arduino):
+    def __init__(self, root, controller):
         self.root = root
         default_bg = "#eeeeee"
-        self.arduino = arduino
+        self.controller = controller
         self.root.title("Hydroponics System Control")
         self.root.geometry("800x480")
         self.root.attributes("-fullscreen", False)
         self.root.configure(bg=default_bg)
 
+        # All widget updates go through the renderer so they are diffed,
+        # coalesced and applied on the Tk thread at a bounded frame rate
+        self.renderer = GuiRenderer(self.root)
+
         # Track Arduino time and when it was received for clock display
         self.last_arduino_time = None
         self.last_time_received_timestamp = None
+        self.last_message_timestamp = None
+        self.link_state = None
 
         # Top frame for clock and Arduino connection indicator
         self.top_frame = tk.Frame(self.root, padx=20, pady=10, bg=default_bg)
@@ -45,6 +52,7 @@ class HydroponicsGUI:
         connection_label.grid(row=0, column=0, padx=(0, 5))
         self.connection_indicator = tk.Canvas(connection_frame, width=20, height=20, highlightthickness=0, bg=default_bg)
         self.connection_indicator.grid(row=0, column=1)
+        self.connection_oval = self.connection_indicator.create_oval(2, 2, 18, 18, fill="gray")
         # Clock display moved to the right side of the top frame, inside connection_frame
         self.clock_label = tk.Label(connection_frame, text="", font=("Helvetica", 14), bg=default_bg, fg="black")
         self.clock_label.grid(row=0, column=2, padx=(10, 0))
@@ -95,7 +103,7 @@ class HydroponicsGUI:
 
         # Temperature and Humidity Display
         self.temp_frame = tk.Frame(self.right_frame, bg=default_bg)
-        self.temp_frame.pack(pady=10)
+        self.temp_frame.pack(pady=4)
 
         self.temperature_label_title = tk.Label(self.temp_frame, text="Air Temperature (Inside / Outside)", font=("Helvetica", 14, "bold"), bg=default_bg, fg="black")
         self.temperature_label_title.pack()
@@ -103,8 +111,15 @@ class HydroponicsGUI:
         self.temperature_label = tk.Label(self.temp_frame, text="-- °C", font=("Helvetica", 14), bg=default_bg, fg="black")
         self.temperature_label.pack()
 
+        self.temperature_trend = Sparkline(
+            self.temp_frame, self.renderer,
+            [("indoor", self.INDOOR_COLOR), ("outdoor", self.OUTDOOR_COLOR)],
+            hours=self.TREND_HOURS, bg=default_bg,
+        )
+        self.temperature_trend.pack()
+
         self.humid_frame = tk.Frame(self.right_frame, bg=default_bg)
-        self.humid_frame.pack(pady=10)
+        self.humid_frame.pack(pady=4)
 
         self.humidity_label_title = tk.Label(self.humid_frame, text="Air Humidity (Inside / Outside)", font=("Helvetica", 14, "bold"), bg=default_bg, fg="black")
         self.humidity_label_title.pack()
@@ -112,9 +127,16 @@ class HydroponicsGUI:
         self.humidity_label = tk.Label(self.humid_frame, text="-- %", font=("Helvetica", 14), bg=default_bg, fg="black")
         self.humidity_label.pack()
 
+        self.humidity_trend = Sparkline(
+            self.humid_frame, self.renderer,
+            [("indoor", self.INDOOR_COLOR), ("outdoor", self.OUTDOOR_COLOR)],
+            hours=self.TREND_HOURS, bg=default_bg,
+        )
+        self.humidity_trend.pack()
+
         # Water Temperature Display
         self.water_temp_frame = tk.Frame(self.right_frame, bg=default_bg)
-        self.water_temp_frame.pack(pady=10)
+        self.water_temp_frame.pack(pady=4)
 
         self.water_temp_label_title = tk.Label(self.water_temp_frame, text="Water Temperatures", font=("Helvetica", 14, "bold"), bg=default_bg, fg="black")
         self.water_temp_label_title.pack()
@@ -125,9 +147,16 @@ class HydroponicsGUI:
         self.water_temp2_label = tk.Label(self.water_temp_frame, text="Bottom reservoir: -- °C", font=("Helvetica", 12), bg=default_bg, fg="black")
         self.water_temp2_label.pack()
 
+        self.water_temp_trend = Sparkline(
+            self.water_temp_frame, self.renderer,
+            [("top", self.INDOOR_COLOR), ("bottom", self.OUTDOOR_COLOR)],
+            hours=self.TREND_HOURS, bg=default_bg,
+        )
+        self.water_temp_trend.pack()
+
         # Float Sensor Display
         self.float_frame = tk.Frame(self.right_frame, bg=default_bg)
-        self.float_frame.pack(pady=10)
+        self.float_frame.pack(pady=4)
 
         self.float_label_title = tk.Label(self.float_frame, text="Float Sensors", font=("Helvetica", 14, "bold"), bg=default_bg, fg="black")
         self.float_label_title.pack()
@@ -151,7 +180,7 @@ class HydroponicsGUI:
         ]
         self.states = {}
         for label, key, code, parent in relay_definitions:
-            self.states[key] = {"state": False, "device_code": code}
+            self.states[key] = {"state": False, "device_code": code, "pending_until": 0}
             container = tk.Frame(parent, bg=default_bg)
             container.pack(pady=4)
 
@@ -167,66 +196,53 @@ class HydroponicsGUI:
             )
             button.pack(side=tk.LEFT, padx=4, pady=2)
             self.states[key]["button"] = button
+            self.renderer.watch(button, "bg", "fg")
+
+        for label in (
+            self.temperature_label, self.humidity_label,
+            self.water_temp1_label, self.water_temp2_label,
+            self.float_top_label, self.float_bottom_label,
+        ):
+            self.renderer.watch(label, "text", "fg")
 
         # Start clock
         self.update_clock()
 
-        # Send time to Arduino after 2 seconds
-        self.root.after(2000, self.set_time_on_arduino)
-        # Schedule periodic time sync every 10 minutes
-        self.root.after(10 * 60 * 1000, self.schedule_periodic_time_sync)
-
-
-        # Start listening for relay state updates
-        self.start_relay_state_listener()
-
-        # Schedule periodic status write
-        self.schedule_status_write()
-        # Schedule periodic system health logging
-        self.log_system_health()
-
-        # Schedule periodic environment data logging
-        self.schedule_environment_log()
-
-        # Start watchdog to monitor Arduino connection
-        self.start_watchdog()
-
-
-
-    def schedule_status_write(self):
-        self.write_status_to_file()
-        self.root.after(60000, self.schedule_status_write)
-
-    def write_status_to_file(self):
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        output_path = os.path.join(script_dir, "hydro_dashboard", "status.json")
-
-        # Split temperature and humidity into indoor/outdoor for dashboard
-        temp_text = self.temperature_label.cget("text")
-        humid_text = self.humidity_label.cget("text")
-        status = {
-            "Air Temp (Indoor)": temp_text.split("/")[0].strip().replace("°C", ""),
-            "Air Temp (Outdoor)": temp_text.split("/")[1].strip().replace("°C", "") if "/" in temp_text else "",
-            "Humidity (Indoor)": humid_text.split("/")[0].strip().replace("%", ""),
-            "Humidity (Outdoor)": humid_text.split("/")[1].strip().replace("%", "") if "/" in humid_text else "",
-            "Water Temp Top": self.water_temp1_label.cget("text").split(":")[-1].strip().replace("°C", ""),
-            "Water Temp Bottom": self.water_temp2_label.cget("text").split(":")[-1].strip().replace("°C", ""),
-            "Top Float": self.float_top_label.cget("text").split(":")[-1].strip(),
-            "Bottom Float": self.float_bottom_label.cget("text").split(":")[-1].strip(),
-            "timestamp": datetime.now().isoformat()
-        }
-
-        # Add relay statuses
-        for key, info in self.states.items():
-            status[f"Relay {key.replace('_', ' ').title()}"] = "ON" if info["state"] else "OFF"
+        # Mirror every message the controller receives from the Arduino
+        self.controller.add_listener(self.handle_controller_line)
 
-        try:
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, "w") as f:
-                json.dump(status, f)
-            print(f"[INFO] ✅ Status written to {output_path}")
-        except Exception as e:
-            print(f"[ERROR] ❌ Failed to write status: {e}")
+    def handle_controller_line(self, response):
+        """Update the display from a controller message. Called from a background thread."""
+        if response.startswith("LINK:"):
+            self.link_state = response.split(":", 1)[1]
+            return
+        if response.startswith("STALE:"):
+            self.show_stale(response.split(":", 1)[1].split(","))
+            return
+        self.last_message_timestamp = datetime.now()
+        if response.startswith("RSTATE:"):
+            self.update_relay_states(response)
+        elif response.startswith("SSTATE:"):
+            self.update_sensor_states(response)
+        elif response.startswith("TIME:"):
+            # Use system time for display
+            now = datetime.now()
+            self.last_arduino_time = now
+            self.last_time_received_timestamp = now
+            self.renderer.set(self.clock_label, text=now.strftime("%H:%M:%S"), fg="black")
+
+    def show_stale(self, streams):
+        """Grey out values restored from the snapshot until fresh telemetry replaces them."""
+        if "SSTATE" in streams:
+            for label in (
+                self.temperature_label, self.humidity_label,
+                self.water_temp1_label, self.water_temp2_label,
+                self.float_top_label, self.float_bottom_label,
+            ):
+                self.renderer.set(label, fg="gray")
+        if "RSTATE" in streams:
+            for info in self.states.values():
+                self.renderer.set(info["button"], fg="gray")
 
     def toggle_switch(self, state_key):
         """Toggle a device state manually and send the command to the Arduino."""
@@ -236,105 +252,15 @@ class HydroponicsGUI:
 
         new_state = not self.states[state_key]["state"]
         self.states[state_key]["state"] = new_state
+        self.states[state_key]["pending_until"] = time.monotonic() + RelayCommandQueue.ACK_TIMEOUT
         new_color = "green" if new_state else "red"
-        self.states[state_key]["button"].config(bg=new_color)
+        self.renderer.set(self.states[state_key]["button"], bg=new_color)
         if new_state:
-            send_command_to_arduino(self.arduino, f"{self.states[state_key]['device_code']}:ON\n")
+            self.controller.send_command(f"{self.states[state_key]['device_code']}:ON\n")
         else:
-            send_command_to_arduino(self.arduino, f"{self.states[state_key]['device_code']}:OFF\n")
+            self.controller.send_command(f"{self.states[state_key]['device_code']}:OFF\n")
 
         print(f"🔄 Toggled {state_key} to {'ON' if new_state else 'OFF'}")
-        self.write_status_to_file()
-
-    def start_relay_state_listener(self):
-        """ Continuously listen for state updates from the Arduino. """
-        def listen_for_state():
-            while True:
-                # Check for serial disconnection
-                if not self.arduino:
-                    print("⚠ Arduino not connected.")
-                    self.log_health_event("Arduino disconnected")
-                    break
-                try:
-                    if self.arduino and self.arduino.in_waiting > 0:
-                        response = self.arduino.readline().decode().strip()
-                        if not response:
-                            continue  # Skip empty lines
-                        print(f"[ARDUINO] {response}")
-                        # Log every Arduino message to arduino_log.txt
-                        with open("arduino_log.txt", "a") as log_file:
-                            log_file.write(f"{datetime.now().isoformat()} - {response}\n")
-                        if response.startswith("RSTATE:"):
-                            self.update_relay_states(response)
-                        elif response.startswith("SSTATE:"):
-                            self.update_sensor_states(response)
-                        elif response.startswith("TIME:"):
-                            # Use system time for logging and display
-                            now = datetime.now()
-                            self.last_arduino_time = now
-                            self.last_time_received_timestamp = now
-                            self.clock_label.config(text=now.strftime("%H:%M:%S"), fg="black")
-
-                            # Also record the reported Arduino time for diagnostics
-                            arduino_time_str = response.split(":", 1)[1].strip()
-                            with open("arduino_log.txt", "a") as log_file:
-                                log_file.write(f"{now.isoformat()} - ARDUINO_TIME: {arduino_time_str}\n")
-                                # Log manual timestamp comparison for every TIME message
-                                log_file.write(f"{datetime.now().isoformat()} - MANUAL_TIMESTAMP_COMPARISON: PC={datetime.now().strftime('%H:%M:%S')} vs ARDUINO={arduino_time_str}\n")
-                except Exception as e:
-                    print(f"Error reading state update: {e}")
-                    break
-
-        threading.Thread(target=listen_for_state, daemon=True).start()
-    def log_health_event(self, message):
-        health_log_path = os.path.join("hydro_dashboard", "system_health.csv")
-        os.makedirs(os.path.dirname(health_log_path), exist_ok=True)
-        with open(health_log_path, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([datetime.now().isoformat(), message])
-
-    def log_system_health(self):
-        health_log_path = os.path.join("hydro_dashboard", "system_health.csv")
-        os.makedirs(os.path.dirname(health_log_path), exist_ok=True)
-
-        timestamp = datetime.now().isoformat()
-        arduino_connected = bool(self.arduino)
-        if self.last_time_received_timestamp:
-            seconds_since_last = (datetime.now() - self.last_time_received_timestamp).total_seconds()
-        else:
-            seconds_since_last = "N/A"
-
-        row = [timestamp, arduino_connected, seconds_since_last]
-
-        file_exists = os.path.exists(health_log_path)
-        with open(health_log_path, "a", newline="") as f:
-            writer = csv.writer(f)
-            if not file_exists or os.path.getsize(health_log_path) == 0:
-                writer.writerow(["timestamp", "arduino_connected", "seconds_since_last_message"])
-            writer.writerow(row)
-
-        # Also log to plain text log
-        try:
-            with open("hydro_dashboard/system_health.txt", "a") as f:
-                f.write(f"{timestamp} - Connected: {arduino_connected}, Seconds since last: {seconds_since_last}\n")
-        except Exception as e:
-            print(f"[ERROR] Could not write to system_health.txt: {e}")
-
-        # Attempt automatic reconnection if no data received for over 2 minutes
-        if isinstance(seconds_since_last, (int, float)) and seconds_since_last > 120:
-            self.log_health_event("No data from Arduino in 2+ minutes. Attempting reconnect...")
-            try:
-                from arduino_helpers import connect_to_arduino
-                self.arduino = connect_to_arduino()
-                if self.arduino:
-                    self.log_health_event("Reconnected to Arduino.")
-                    send_command_to_arduino(self.arduino, "GET_STATE\n")
-                    self.start_relay_state_listener()
-            except Exception as e:
-                self.log_health_event(f"Reconnection failed: {e}")
-
-        # Schedule next check
-        self.root.after(60000, self.log_system_health)
 
     def update_clock(self):
         """Update the GUI clock based on Arduino or fallback."""
@@ -343,7 +269,7 @@ class HydroponicsGUI:
             seconds_since_last = (now - self.last_time_received_timestamp).total_seconds()
             if seconds_since_last > 15:
                 # If no recent Arduino time message, show system time in gray
-                self.clock_label.config(text=now.strftime("%H:%M:%S"), fg="gray")
+                self.renderer.set(self.clock_label, text=now.strftime("%H:%M:%S"), fg="gray")
         self.root.after(1000, self.update_clock)
 
     def update_relay_states(self, response):
@@ -355,73 +281,16 @@ class HydroponicsGUI:
                 print(f"⚠ Incomplete or malformed message: {response}")
                 return
 
-            if not response.startswith("RSTATE:"):
-                print(f"⚠ Warning: Unexpected message format: {response}")
+            relay_states = parse_relay_state(response)
+            if relay_states is None:
                 return
 
-            # Split and extract relay state values as key-value pairs
-            state_values = response.split(":", 1)[1].split(",")
-
-            relay_map = {
-                'LT': 'lights_top',
-                'LB': 'lights_bottom',
-                'PT': 'pump_top',
-                'PB': 'pump_bottom',
-                'FV': 'fan_vent',
-                'FC': 'fan_circ',
-                'HE': 'heater',
-            }
-
-            relay_states = {}
-            for item in state_values:
-                if "=" in item:
-                    code, val = item.split("=")
-                    relay_states[code.strip()] = int(val.strip())
-
-            for code, key in relay_map.items():
+            for code, key in RELAY_CODES.items():
                 if code in relay_states:
-                    try:
-                        self.set_gui_state(key, relay_states[code])
-                    except Exception as e:
-                        print(f"⚠ GUI update error: {e}")
-
-            # Ensure GUI updates immediately after relay state change
-            try:
-                self.root.update_idletasks()
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
+                    self.set_gui_state(key, relay_states[code])
 
             # ✅ Update the connection indicator to green (since valid data was received)
-            try:
-                self.connection_indicator.delete("all")
-                self.connection_indicator.create_oval(2, 2, 18, 18, fill="green")
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
-
-            self.write_status_to_file()
-            # Log relay state update to arduino_log.txt
-            with open("arduino_log.txt", "a") as log_file:
-                log_file.write(f"{datetime.now().isoformat()} - RELAY: {response}\n")
-
-            # Log relay state to CSV
-            relay_log_path = os.path.join("hydro_dashboard", "relay_log.csv")
-            relay_headers = [
-                "timestamp",
-                "top_lights", "bottom_lights",
-                "pump_top", "pump_bottom",
-                "fan_vent", "fan_circ",
-                "heater"
-            ]
-            relay_row = [datetime.now().isoformat()]
-            for code in ['LT', 'LB', 'PT', 'PB', 'FV', 'FC', 'HE']:
-                relay_row.append(relay_states.get(code, ""))
-            file_exists = os.path.exists(relay_log_path)
-            os.makedirs(os.path.dirname(relay_log_path), exist_ok=True)
-            with open(relay_log_path, "a", newline="") as f:
-                writer = csv.writer(f)
-                if not file_exists or os.path.getsize(relay_log_path) == 0:
-                    writer.writerow(relay_headers)
-                writer.writerow(relay_row)
+            self.renderer.set_item(self.connection_indicator, self.connection_oval, fill="green")
 
         except Exception as e:
             print(f"⚠ Error parsing relay state: {e}")
@@ -433,101 +302,47 @@ class HydroponicsGUI:
         the second pair is from the *outdoor* DHT sensor.
         """
         try:
-            if ":" not in response:
-                print(f"⚠ Incomplete or malformed message: {response}")
+            sensors = parse_sensor_state(response)
+            if sensors is None:
                 return
 
-            sensor_values = response.split(":")[1].split(",")
-
-            if len(sensor_values) != 8:
-                print(f"⚠ Warning: Unexpected number of values in sensor update: {sensor_values}")
-                return
-
-            # Indoor DHT sensor
-            temp_indoor = int(sensor_values[0])
-            humid_indoor = int(sensor_values[1])
-            # Outdoor DHT sensor
-            temp_outdoor = int(sensor_values[2])
-            humid_outdoor = int(sensor_values[3])
-            water_temp1 = float(sensor_values[4])
-            water_temp2 = float(sensor_values[5])
-            float_top = int(sensor_values[6])
-            float_bottom = int(sensor_values[7])
-
-            try:
-                self.temperature_label.config(text=f"{temp_indoor} / {temp_outdoor} °C", fg="black")
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
-            try:
-                self.humidity_label.config(text=f"{humid_indoor} / {humid_outdoor} %", fg="black")
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
-            try:
-                self.water_temp1_label.config(text=f"Top reservoir: {water_temp1:.1f} °C", fg="black")
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
-            try:
-                self.water_temp2_label.config(text=f"Bottom reservoir: {water_temp2:.1f} °C", fg="black")
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
-            try:
-                self.float_top_label.config(
-                    text=f"Top: {'Okay' if float_top else 'Low'}",
-                    fg="red" if not float_top else "black"
-                )
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
-            try:
-                self.float_bottom_label.config(
-                    text=f"Bottom: {'Okay' if float_bottom else 'Low'}",
-                    fg="red" if not float_bottom else "black"
-                )
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
-
-            # Ensure GUI updates immediately after sensor state change
-            try:
-                self.root.update_idletasks()
-            except Exception as e:
-                print(f"⚠ GUI update error: {e}")
-
-            self.write_status_to_file()
-            # Log sensor state update to arduino_log.txt
-            with open("arduino_log.txt", "a") as log_file:
-                log_file.write(f"{datetime.now().isoformat()} - SENSOR: {response}\n")
-
-            # // TEMPORARILY DISABLED CSV LOGGING
-            # sensor_log_path = os.path.join("hydro_dashboard", "sensor_log.csv")
-            # sensor_headers = [
-            #     "timestamp",
-            #     "air_temp_indoor", "humidity_indoor",
-            #     "air_temp_outdoor", "humidity_outdoor",
-            #     "water_temp_top", "water_temp_bottom",
-            #     "float_top", "float_bottom"
-            # ]
-            # sensor_row = [
-            #     datetime.now().isoformat(),
-            #     temp_indoor, humid_indoor,
-            #     temp_outdoor, humid_outdoor,
-            #     water_temp1, water_temp2,
-            #     float_top, float_bottom
-            # ]
-            # file_exists = os.path.exists(sensor_log_path)
-            # os.makedirs(os.path.dirname(sensor_log_path), exist_ok=True)
-            # with open(sensor_log_path, "a", newline="") as f:
-            #     writer = csv.writer(f)
-            #     if not file_exists or os.path.getsize(sensor_log_path) == 0:
-            #         writer.writerow(sensor_headers)
-            #     writer.writerow(sensor_row)
+            # Queue the new text; the renderer only touches labels whose values changed.
+            # A field the Arduino could not read is None and shows as "--".
+            def reading(field, fmt="{}"):
+                return "--" if sensors[field] is None else fmt.format(sensors[field])
+
+            def float_state(field):
+                if sensors[field] is None:
+                    return "--", "gray"
+                return ("Okay", "black") if sensors[field] else ("Low", "red")
+
+            self.renderer.set(self.temperature_label, text=f"{reading('temp_indoor')} / {reading('temp_outdoor')} °C", fg="black")
+            self.renderer.set(self.humidity_label, text=f"{reading('humid_indoor')} / {reading('humid_outdoor')} %", fg="black")
+            self.renderer.set(self.water_temp1_label, text=f"Top reservoir: {reading('water_temp_top', '{:.1f}')} °C", fg="black")
+            self.renderer.set(self.water_temp2_label, text=f"Bottom reservoir: {reading('water_temp_bottom', '{:.1f}')} °C", fg="black")
+            text, color = float_state('float_top')
+            self.renderer.set(self.float_top_label, text=f"Top: {text}", fg=color)
+            text, color = float_state('float_bottom')
+            self.renderer.set(self.float_bottom_label, text=f"Bottom: {text}", fg=color)
+
+            # Each chart keeps a fixed-size history, so this costs the same every sample
+            now = time.time()
+            self.temperature_trend.add({"indoor": sensors['temp_indoor'], "outdoor": sensors['temp_outdoor']}, now)
+            self.humidity_trend.add({"indoor": sensors['humid_indoor'], "outdoor": sensors['humid_outdoor']}, now)
+            self.water_temp_trend.add({"top": sensors['water_temp_top'], "bottom": sensors['water_temp_bottom']}, now)
 
         except Exception as e:
             print(f"⚠ Error parsing sensor state: {e}")
 
     def set_gui_state(self, key, state):
         """Update button color and state based on relay state."""
+        info = self.states[key]
+        if bool(state) != info["state"] and info["pending_until"] > time.monotonic():
+            return  # Report predates a command still awaiting confirmation
+        info["pending_until"] = 0
         self.states[key]["state"] = bool(state)
         new_color = "green" if state else "red"
-        self.states[key]["button"].config(bg=new_color)
+        self.renderer.set(self.states[key]["button"], bg=new_color, fg="black")
 
 
     def set_heater_state(self, on):
@@ -538,85 +353,37 @@ class HydroponicsGUI:
             return
 
         self.states[key]["state"] = on
+        self.states[key]["pending_until"] = time.monotonic() + RelayCommandQueue.ACK_TIMEOUT
         new_color = "green" if on else "red"
-        self.states[key]["button"].config(bg=new_color)
+        self.renderer.set(self.states[key]["button"], bg=new_color)
         if on:
-            send_command_to_arduino(self.arduino, f"{self.states[key]['device_code']}:ON\n")
+            self.controller.send_command(f"{self.states[key]['device_code']}:ON\n")
         else:
-            send_command_to_arduino(self.arduino, f"{self.states[key]['device_code']}:OFF\n")
+            self.controller.send_command(f"{self.states[key]['device_code']}:OFF\n")
         print(f"🔧 Heater override: {'ON' if on else 'OFF'}")
-        self.write_status_to_file()
-
-
-    def set_time_on_arduino(self):
-        """Send the current system time to the Arduino."""
-        if self.arduino:
-            try:
-                current_time = datetime.now().strftime("%H:%M:%S")
-                full_command = f"SET_TIME:{current_time}\n"
-                print(f"[DEBUG] Sending to Arduino: {repr(full_command)}")
-                send_command_to_arduino(self.arduino, full_command)
-            except Exception as e:
-                print(f"Error sending time to Arduino: {e}")
-
-    def schedule_environment_log(self):
-        self.log_environment_data()
-        self.root.after(15 * 60 * 1000, self.schedule_environment_log)
-
-    def log_environment_data(self):
-        env_log_path = os.path.join("hydro_dashboard", "environment_log.csv")
-        os.makedirs(os.path.dirname(env_log_path), exist_ok=True)
-
-        # Extract data from GUI
-        temp_text = self.temperature_label.cget("text")
-        humid_text = self.humidity_label.cget("text")
-
-        indoor_temp = temp_text.split("/")[0].strip().replace("°C", "")
-        outdoor_temp = temp_text.split("/")[1].strip().replace("°C", "") if "/" in temp_text else ""
-        indoor_humid = humid_text.split("/")[0].strip().replace("%", "")
-        outdoor_humid = humid_text.split("/")[1].strip().replace("%", "") if "/" in humid_text else ""
-
-        timestamp = datetime.now().isoformat()
-        row = [timestamp, indoor_temp, outdoor_temp, indoor_humid, outdoor_humid]
-
-        file_exists = os.path.exists(env_log_path)
-        with open(env_log_path, "a", newline="") as f:
-            writer = csv.writer(f)
-            if not file_exists or os.path.getsize(env_log_path) == 0:
-                writer.writerow(["timestamp", "indoor_temp", "outdoor_temp", "indoor_humidity", "outdoor_humidity"])
-            writer.writerow(row)
-
-    def start_watchdog(self):
-        """Start a periodic watchdog to monitor Arduino connection and restart GUI if needed."""
-        def watchdog_check():
-            if self.last_time_received_timestamp:
-                elapsed = (datetime.now() - self.last_time_received_timestamp).total_seconds()
-                if elapsed > self.RESTART_THRESHOLD_SECONDS:
-                    print(f"[WARN] No Arduino data for {elapsed} seconds. Restarting GUI...")
-                    self.restart_gui()
-                    return  # Stop watchdog after restart
-            # Schedule next check in 1 minute
-            self.root.after(60000, watchdog_check)
-
-        watchdog_check()
-
-    def restart_gui(self):
-        """Cleanly restart the GUI application."""
-        print("[INFO] Restarting the GUI application...")
-        self.root.destroy()  # Close the GUI window
-
-        # Relaunch the current Python script with same arguments
-        python = sys.executable
-        os.execl(python, python, *sys.argv)
+
 
 def main():
-    arduino = connect_to_arduino()
+    parser = argparse.ArgumentParser(description="Hydroponics touchscreen GUI.")
+    parser.add_argument(
+        "--standalone", action="store_true",
+        help="Run the controller inside this process instead of attaching to hydro_controller.py",
+    )
+    args = parser.parse_args()
+
+    if not args.standalone and ControllerClient.daemon_available():
+        controller = ControllerClient()
+    else:
+        if not args.standalone:
+            print("[INFO] No controller daemon running, starting one inside the GUI process.")
+        controller = HydroController()
+
     root = tk.Tk()
-    gui = HydroponicsGUI(root, arduino)
+    gui = HydroponicsGUI(root, controller)
+    controller.start()
     root.mainloop()
-    if arduino:
-        arduino.close()
+    controller.stop()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
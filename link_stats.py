@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import deque
+
+from arduino_helpers import BAUD_RATE, SEQUENCE_MODULO, decode_frame
+
+# Lines that say the firmware's loop watchdog is about to reset the board
+LOOP_RESET_MARKER = "Loop took too long"
+# Telemetry that newer firmware always frames; seeing it bare means old firmware
+FRAMED_PREFIXES = ("RSTATE:", "SSTATE:", "TIME:")
+
+
+class LinkStats:
+    """Account for what crosses the serial link: lost, corrupt and reordered frames and load.
+
+    Every received line goes through receive(), which strips the frame and
+    returns the payload, or None for a frame that failed its checksum or
+    was truncated.
+    Utilisation is the share of the link's capacity (10 bits per byte at
+    the baud rate) used over the last WINDOW seconds.
+    """
+
+    WINDOW = 60.0
+    # A sequence jump this far back is a reordered frame, not loss of most of the counter
+    REORDER_LIMIT = SEQUENCE_MODULO // 2
+
+    def __init__(self, baud=BAUD_RATE):
+        self.bytes_per_second = baud / 10
+        self._lock = threading.Lock()
+        self._rx = deque()  # (time.monotonic(), bytes)
+        self._tx = deque()
+        self._rx_bytes = 0
+        self._tx_bytes = 0
+        self.last_seq = None
+        # Once a framed line has arrived the firmware frames all telemetry, so
+        # bare telemetry after that is a frame that lost its tail
+        self.framed_seen = False
+        self.counters = {
+            "frames": 0, "lost": 0, "malformed": 0, "out_of_order": 0,
+            "unframed_telemetry": 0, "firmware_restarts": 0, "loop_resets": 0,
+        }
+
+    def reset_sequence(self):
+        """Forget the last sequence number, e.g. after reopening the port."""
+        with self._lock:
+            self.last_seq = None
+
+    def receive(self, line, now=None):
+        now = time.monotonic() if now is None else now
+        payload, seq, valid = decode_frame(line)
+        with self._lock:
+            self._rx_bytes = self._add(self._rx, self._rx_bytes, len(line) + 2, now)  # println adds \r\n
+            if LOOP_RESET_MARKER in line:
+                self.counters["loop_resets"] += 1
+            if not valid:
+                self.counters["malformed"] += 1
+                return None
+            if seq is None:
+                if line.startswith(FRAMED_PREFIXES):
+                    if self.framed_seen or "#" in line:
+                        self.counters["malformed"] += 1  # e.g. "RSTATE:...HE=0#12" cut before the checksum
+                        return None
+                    self.counters["unframed_telemetry"] += 1
+                return payload
+            self.framed_seen = True
+            self.counters["frames"] += 1
+            self._check_sequence(seq)
+        return payload
+
+    def sent(self, command, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._tx_bytes = self._add(self._tx, self._tx_bytes, len(command.encode()), now)
+
+    def _check_sequence(self, seq):
+        if self.last_seq is None:
+            self.last_seq = seq
+            return
+        gap = (seq - self.last_seq - 1) % SEQUENCE_MODULO
+        if gap == 0:
+            self.last_seq = seq
+        elif seq == 0:
+            # The board rebooted; its counter starts again from zero
+            self.counters["firmware_restarts"] += 1
+            self.last_seq = seq
+        elif gap < self.REORDER_LIMIT:
+            self.counters["lost"] += gap
+            self.last_seq = seq
+        else:
+            self.counters["out_of_order"] += 1  # Older than one already seen; keep last_seq
+
+    def _add(self, window, total, size, now):
+        window.append((now, size))
+        total += size
+        while now - window[0][0] > self.WINDOW:
+            total -= window.popleft()[1]
+        return total
+
+    def _utilisation(self, window, total, now):
+        while window and now - window[0][0] > self.WINDOW:
+            total -= window.popleft()[1]
+        return total, round(total / (self.bytes_per_second * self.WINDOW) * 100, 2)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            self._rx_bytes, rx = self._utilisation(self._rx, self._rx_bytes, now)
+            self._tx_bytes, tx = self._utilisation(self._tx, self._tx_bytes, now)
+            stats = dict(self.counters)
+        expected = stats["frames"] + stats["lost"]
+        stats["loss_pct"] = round(stats["lost"] / expected * 100, 2) if expected else 0.0
+        stats["rx_utilisation_pct"] = rx
+        stats["tx_utilisation_pct"] = tx
+        return stats
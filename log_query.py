@@ -0,0 +1,167 @@
+import argparse
+import gzip
+import mmap
+import os
+import sys
+from datetime import datetime
+
+from log_rotation import archived_segments, read_manifest, scan_bounds
+
+DEFAULT_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "arduino_log.txt")
+MESSAGE_TYPES = ("RSTATE", "SSTATE", "TIME", "RELAY", "SENSOR", "CLOCK_SYNC",
+                 "Unknown command", "Override expired")
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def log_segments(path=DEFAULT_LOG):
+    """Return [(segment path, first, last)] for a log's archive and live file, oldest first.
+
+    first/last come from each segment's manifest, so archived files are not
+    opened. Either is None when unknown.
+    """
+    segments = []
+    for segment_path in archived_segments(path):
+        manifest = read_manifest(segment_path) or {}
+        segments.append((segment_path, _to_datetime(manifest.get("first")), _to_datetime(manifest.get("last"))))
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        first, last = scan_bounds(path)
+        segments.append((path, first, last))
+    return segments
+
+
+def _timestamp_bytes(line):
+    """The timestamp a raw log line starts with, as bytes, or None for headers and continuations."""
+    if not line[:1].isdigit():
+        return None
+    for separator in (b" - ", b","):
+        end = line.find(separator)
+        if end > 0:
+            return line[:end]
+    return line.rstrip()
+
+
+def _line_start(mm, pos):
+    """Offset of the first line starting at or after pos."""
+    if pos == 0:
+        return 0
+    newline = mm.find(b"\n", pos - 1)
+    return len(mm) if newline < 0 else newline + 1
+
+
+def _seek_time(mm, key):
+    """Offset of the first line stamped at or after key, by binary search over byte offsets.
+
+    ISO timestamps sort as plain bytes, so nothing is parsed and only
+    O(log n) pages of the file are touched.
+    """
+    lo, hi = 0, len(mm)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = _line_start(mm, mid)
+        if start < len(mm):
+            stamp = _timestamp_bytes(mm[start:start + 64])
+            if stamp is None or stamp < key:
+                lo = mid + 1
+                continue
+        hi = mid
+    return _line_start(mm, lo)
+
+
+def _message_matches(line, types):
+    if not types:
+        return True
+    stamp = _timestamp_bytes(line)
+    message = line[len(stamp):] if stamp else line
+    message = message.lstrip(b" -,")
+    return message.startswith(types)
+
+
+def _scan_plain(path, start_key, end_key, types):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = _seek_time(mm, start_key) if start_key else 0
+            size = len(mm)
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end < 0:
+                    end = size
+                line = mm[pos:end]
+                pos = end + 1
+                stamp = _timestamp_bytes(line)
+                if end_key and stamp and stamp > end_key:
+                    return
+                if stamp and _message_matches(line, types):
+                    yield line
+
+
+def _scan_gzip(path, start_key, end_key, types):
+    # Compressed segments cannot be searched; the manifest already ruled out
+    # segments outside the window, so this only streams the ones that overlap
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            line = line.rstrip(b"\r\n")
+            stamp = _timestamp_bytes(line)
+            if not stamp or (start_key and stamp < start_key):
+                continue
+            if end_key and stamp > end_key:
+                return
+            if _message_matches(line, types):
+                yield line
+
+
+def query(start=None, end=None, types=None, path=DEFAULT_LOG):
+    """Yield log lines stamped between start and end (inclusive) in time order.
+
+    start/end are datetimes or ISO strings; types is an iterable of message
+    prefixes such as "RSTATE" or "Unknown command". Lines are streamed, so
+    memory use does not grow with the size of the window.
+    """
+    start, end = _to_datetime(start), _to_datetime(end)
+    start_key = start.isoformat().encode() if start else None
+    end_key = end.isoformat().encode() if end else None
+    types = tuple(t.encode() for t in types) if types else None
+
+    for segment_path, first, last in log_segments(path):
+        if start and last and last < start:
+            continue
+        if end and first and first > end:
+            break
+        scan = _scan_gzip if segment_path.endswith(".gz") else _scan_plain
+        for line in scan(segment_path, start_key, end_key, types):
+            yield line.decode(errors="replace")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search arduino_log.txt and its archive by time and message type.")
+    parser.add_argument("--since", help="Start of the window (ISO, e.g. 2025-07-06T11:00)")
+    parser.add_argument("--until", help="End of the window (ISO)")
+    parser.add_argument("--type", action="append", dest="types", metavar="TYPE",
+                        help=f"Only messages starting with TYPE; repeatable ({', '.join(MESSAGE_TYPES)})")
+    parser.add_argument("--log", default=DEFAULT_LOG, help="Live log file; its log_archive/ is searched too")
+    parser.add_argument("--count", action="store_true", help="Print only the number of matching lines")
+    args = parser.parse_args()
+
+    try:
+        lines = query(args.since, args.until, args.types, args.log)
+        if args.count:
+            print(sum(1 for _ in lines))
+        else:
+            for line in lines:
+                sys.stdout.write(line + "\n")
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        pass  # Output piped into head
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
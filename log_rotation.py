@@ -0,0 +1,253 @@
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+import queue
+import shutil
+import threading
+from datetime import datetime
+
+ARCHIVE_DIR = "log_archive"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024           # rotate a segment once it reaches this size
+DEFAULT_RETENTION_BYTES = 100 * 1024 * 1024   # archived segments kept per log
+MANIFEST_SUFFIX = ".manifest.json"
+
+_compress_queue = queue.Queue()
+_compress_thread = None
+_compress_lock = threading.Lock()
+
+
+def line_timestamp(line):
+    """Return the ISO timestamp a log line or CSV row starts with, or None."""
+    for separator in (" - ", ","):
+        prefix = line.split(separator, 1)[0].strip()
+        try:
+            return datetime.fromisoformat(prefix)
+        except ValueError:
+            continue
+    return None
+
+
+def manifest_path(segment_path):
+    return segment_path + MANIFEST_SUFFIX
+
+
+def read_manifest(segment_path):
+    try:
+        with open(manifest_path(segment_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(segment_path, manifest):
+    tmp_path = manifest_path(segment_path) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path(segment_path))
+
+
+def scan_bounds(path):
+    """First and last timestamps of an existing file, reading only its head and tail."""
+    first = last = None
+    with open(path, "rb") as f:
+        for _ in range(2):  # The first line may be a CSV header
+            first = line_timestamp(f.readline().decode(errors="replace"))
+            if first:
+                break
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        for raw in reversed(f.read().splitlines()):
+            last = line_timestamp(raw.decode(errors="replace"))
+            if last:
+                break
+    return first, last
+
+
+def archived_segments(path):
+    """Archived segment paths for the log at path, oldest first."""
+    directory, filename = os.path.split(path)
+    stem, ext = os.path.splitext(filename)
+    pattern = os.path.join(directory, ARCHIVE_DIR, f"{stem}.*{ext}")
+    return sorted(glob.glob(pattern) + glob.glob(pattern + ".gz"))
+
+
+def _compress_worker():
+    while True:
+        log, segment_path = _compress_queue.get()
+        try:
+            log._compress_segment(segment_path)
+        except Exception as e:
+            print(f"[ERROR] Failed to archive {segment_path}: {e}")
+
+
+def _queue_compression(log, segment_path):
+    global _compress_thread
+    with _compress_lock:
+        if _compress_thread is None:
+            # One shared worker keeps gzip off the serial reader and scheduler threads
+            _compress_thread = threading.Thread(target=_compress_worker, daemon=True)
+            _compress_thread.start()
+    _compress_queue.put((log, segment_path))
+
+
+class RotatingLog:
+    """Append-only log that rotates by day or size and archives closed segments.
+
+    Closed segments move to log_archive/ next to the live file as
+    <name>.<first timestamp><ext>, are gzipped on a background thread and
+    are deleted oldest first once the archive passes retention_bytes. Every
+    segment has a <segment>.manifest.json recording its first and last
+    timestamp, so readers can pick files without opening them.
+    """
+
+    def __init__(self, path, header=None, max_bytes=DEFAULT_MAX_BYTES,
+                 retention_bytes=DEFAULT_RETENTION_BYTES, rotate_daily=True):
+        self.path = path
+        self.header = header  # CSV header row written at the top of every segment
+        self.max_bytes = max_bytes
+        self.retention_bytes = retention_bytes
+        self.rotate_daily = rotate_daily
+
+        directory, filename = os.path.split(path)
+        self.stem, self.ext = os.path.splitext(filename)
+        self.archive_dir = os.path.join(directory, ARCHIVE_DIR)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._lines = 0
+        self._first = None
+        self._last = None
+        self._bounds_known = False
+
+        # Segments left uncompressed by an earlier run
+        for segment_path in self.archived_segments():
+            if not segment_path.endswith(".gz"):
+                _queue_compression(self, segment_path)
+
+    def archived_segments(self):
+        return archived_segments(self.path)
+
+    def write(self, text, timestamp=None):
+        """Append text (one or more complete lines) stamped at timestamp (default now)."""
+        timestamp = timestamp or datetime.now()
+        size = len(text.encode())
+        with self._lock:
+            self._rotate_if_needed(timestamp, size)
+            self._open()
+            self._file.write(text)
+            self._file.flush()
+            self._size += size
+            if self._lines is not None:
+                self._lines += text.count("\n")
+            self._first = self._first or timestamp
+            self._last = timestamp
+
+    def writerow(self, row, timestamp=None):
+        """Append one CSV row. row[0] is used as the timestamp if it is ISO formatted."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(row)
+        if timestamp is None:
+            timestamp = line_timestamp(str(row[0])) if row else None
+        self.write(buffer.getvalue(), timestamp)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _open(self):
+        if self._file:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._size = self._file.tell()
+        if self._size == 0 and self.header:
+            self._file.write(self._header_text())
+            self._size = self._file.tell()
+
+    def _header_text(self):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(self.header)
+        return buffer.getvalue()
+
+    def _rotate_if_needed(self, timestamp, incoming):
+        if not self._bounds_known:
+            # A file left by an earlier run: recover its range from its head and tail
+            self._bounds_known = True
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                self._size = os.path.getsize(self.path)
+                self._lines = None  # Not worth counting; the manifest records it as unknown
+                self._first, self._last = scan_bounds(self.path)
+        if self._size == 0 or not os.path.exists(self.path):
+            return
+
+        new_day = self.rotate_daily and self._first and self._first.date() != timestamp.date()
+        too_big = self._size + incoming > self.max_bytes
+        if new_day or too_big:
+            self._rotate()
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        started = (self._first or datetime.now()).strftime("%Y%m%dT%H%M%S")
+        segment_path = os.path.join(self.archive_dir, f"{self.stem}.{started}{self.ext}")
+        suffix = 1
+        while os.path.exists(segment_path) or os.path.exists(segment_path + ".gz"):
+            segment_path = os.path.join(self.archive_dir, f"{self.stem}.{started}-{suffix}{self.ext}")
+            suffix += 1
+        os.replace(self.path, segment_path)
+
+        _write_manifest(segment_path, {
+            "first": self._first.isoformat() if self._first else None,
+            "last": self._last.isoformat() if self._last else None,
+            "lines": self._lines,
+            "bytes": self._size,
+        })
+        print(f"[INFO] Rotated {os.path.basename(self.path)} to {os.path.basename(segment_path)}")
+
+        self._size = self._lines = 0
+        self._first = self._last = None
+        _queue_compression(self, segment_path)
+
+    def _compress_segment(self, segment_path):
+        """Gzip a closed segment, move its manifest across and enforce the retention budget."""
+        if not os.path.exists(segment_path):
+            return
+        gz_path = segment_path + ".gz"
+        with open(segment_path, "rb") as src, gzip.open(gz_path + ".tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(gz_path + ".tmp", gz_path)
+
+        manifest = read_manifest(segment_path)
+        if manifest is None:
+            first, last = scan_bounds(segment_path)
+            manifest = {"first": first and first.isoformat(), "last": last and last.isoformat(),
+                        "lines": None, "bytes": os.path.getsize(segment_path)}
+        manifest["compressed_bytes"] = os.path.getsize(gz_path)
+        _write_manifest(gz_path, manifest)
+        os.remove(segment_path)
+        if os.path.exists(manifest_path(segment_path)):
+            os.remove(manifest_path(segment_path))
+
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        # Segments still waiting for gzip are never counted or deleted
+        segments = [p for p in self.archived_segments() if p.endswith(".gz")]
+        total = sum(os.path.getsize(p) for p in segments)
+        for segment_path in segments:
+            if total <= self.retention_bytes:
+                break
+            total -= os.path.getsize(segment_path)
+            os.remove(segment_path)
+            if os.path.exists(manifest_path(segment_path)):
+                os.remove(manifest_path(segment_path))
+            print(f"[INFO] Retention: deleted {os.path.basename(segment_path)}")
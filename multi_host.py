@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+import serial
+from serial.tools import list_ports
+
+from arduino_helpers import (
+    BAUD_RATE,
+    HANDSHAKE_TIMEOUT,
+    PING_INTERVAL,
+    RELAY_CODES,
+    find_candidate_ports,
+    parse_relay_state,
+    parse_sensor_state,
+)
+from clock_sync import ClockSync
+from connection_supervisor import ConnectionSupervisor
+from hydro_controller import CONTROLLER_HOST, HydroController, format_status
+from link_stats import LinkStats
+from log_rotation import RotatingLog
+from sensor_filter import SensorFilter
+
+# Clients of the multi-device host send "<device id> <command>" lines and
+# receive "<device id> <line>" for every line any Arduino sends
+MULTI_HOST_PORT = 5056
+DEVICE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def port_device_ids():
+    """Map each serial port to a stable device ID: the USB serial number where there is one."""
+    ids = {}
+    try:
+        for info in list_ports.comports():
+            if info.serial_number:
+                ids[info.device] = DEVICE_ID.sub("_", info.serial_number)
+    except Exception as e:
+        print(f"⚠ Could not list serial ports: {e}")
+    return ids
+
+
+class DeviceSession:
+    """One Arduino on the shared event loop: its port, parsed state and its own files.
+
+    Status and logs live under hydro_dashboard/devices/<device id>/, laid out
+    like the single-board files so the same tools can read them.
+    """
+
+    def __init__(self, host, device_id, port, arduino):
+        self.host = host
+        self.device_id = device_id
+        self.port = port
+        self.arduino = arduino
+        self.dir = os.path.join(host.devices_dir, device_id)
+
+        self.relay_states = {key: None for key in RELAY_CODES.values()}
+        self.sensor_state = None
+        self.sensor_filter = SensorFilter()
+        self.sensor_clean = None
+        self.connected = False
+        self.last_line_time = None  # time.monotonic() of the last line received
+        self.clock_sync = ClockSync(self.send)
+        self.link_stats = LinkStats()
+        self.arduino_log = RotatingLog(os.path.join(self.dir, "arduino_log.txt"))
+        self.relay_log = RotatingLog(os.path.join(self.dir, "relay_log.csv"), header=HydroController.RELAY_LOG_HEADER)
+
+        self._buffer = bytearray()
+        self._handshake = asyncio.Event()
+
+    async def open(self):
+        """Start reading and wait for PING_OK. Returns False if the device never answers."""
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.arduino.fileno(), self._on_readable)
+        deadline = time.monotonic() + HANDSHAKE_TIMEOUT
+        while not self._handshake.is_set() and time.monotonic() < deadline:
+            self.send("PING\n")
+            try:
+                await asyncio.wait_for(self._handshake.wait(), PING_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        if not self._handshake.is_set():
+            self.close()
+            return False
+
+        self.connected = True
+        self.last_line_time = time.monotonic()
+        print(f"✅ [{self.device_id}] Connected to Arduino on {self.port}")
+        self.send("GET_STATE\n")
+        self.clock_sync.query()
+        return True
+
+    def close(self):
+        if self.arduino is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self.arduino.fileno())
+        except (RuntimeError, ValueError, OSError):
+            pass
+        try:
+            self.arduino.close()
+        except Exception as e:
+            print(f"⚠ [{self.device_id}] Error closing serial port: {e}")
+        self.arduino = None
+        # A reconnect builds a new session with its own handles on the same files
+        for log in (self.arduino_log, self.relay_log):
+            log.close()
+        if self.connected:
+            self.connected = False
+            print(f"[WARN] [{self.device_id}] Disconnected from {self.port}")
+        self.host.device_closed(self)
+
+    def send(self, command):
+        if not self.arduino:
+            print(f"⚠ [{self.device_id}] Not connected, dropping command: {command.strip()}")
+            return False
+        try:
+            self.arduino.write(command.encode())
+            self.link_stats.sent(command)
+            return True
+        except Exception as e:
+            print(f"⚠ [{self.device_id}] Error sending command: {e}")
+            self.close()
+            return False
+
+    def _on_readable(self):
+        try:
+            data = self.arduino.read(self.arduino.in_waiting or 1)
+        except Exception as e:
+            # Unplugged boards report readable with no data, which pyserial raises on
+            print(f"⚠ [{self.device_id}] Serial read error: {e}")
+            self.close()
+            return
+
+        self._buffer += data
+        while b"\n" in self._buffer:
+            raw, _, rest = self._buffer.partition(b"\n")
+            self._buffer = bytearray(rest)
+            line = raw.decode(errors="replace").strip()
+            if line:
+                self.handle_line(line)
+
+    def handle_line(self, line):
+        self.last_line_time = time.monotonic()
+        line = self.link_stats.receive(line, self.last_line_time)
+        if line is None:
+            return  # Failed its checksum; counted in link_stats
+        if line == "PING_OK":
+            self._handshake.set()
+            return
+        if not self._handshake.is_set():
+            return  # Boot banner, or not an Arduino at all
+        answered_query = line.startswith("TIME:") and self.clock_sync.handle_time(line)
+
+        now = datetime.now()
+        self.arduino_log.write(f"{now.isoformat()} - {line}\n", now)
+        if line.startswith("RSTATE:"):
+            relay_states = parse_relay_state(line)
+            if relay_states is not None:
+                for code, key in RELAY_CODES.items():
+                    if code in relay_states:
+                        self.relay_states[key] = bool(relay_states[code])
+                self.relay_log.writerow([now.isoformat()] + [relay_states.get(code, "") for code in RELAY_CODES])
+        elif line.startswith("SSTATE:"):
+            sensor_state = parse_sensor_state(line)
+            if sensor_state is not None:
+                self.sensor_state = sensor_state
+                self.sensor_clean = self.sensor_filter.update(sensor_state)
+        elif answered_query:
+            clock = self.clock_sync.metrics()
+            self.arduino_log.write(f"{now.isoformat()} - CLOCK_SYNC: offset={clock['offset_s']}s "
+                                   f"rtt={clock['rtt_ms']}ms corrections={clock['corrections']}\n", now)
+
+        self.host.broadcast(f"{self.device_id} {line}")
+
+    def write_status(self):
+        if self.sensor_state is None and all(state is None for state in self.relay_states.values()):
+            return
+        status = format_status(self.relay_states, self.sensor_state, cleaned=self.sensor_clean)
+        status["device_id"] = self.device_id
+        status["link"] = self.link_stats.stats()
+        output_path = os.path.join(self.dir, "status.json")
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            with open(output_path + ".tmp", "w") as f:
+                json.dump(status, f)
+            os.replace(output_path + ".tmp", output_path)
+        except Exception as e:
+            print(f"[ERROR] ❌ [{self.device_id}] Failed to write status: {e}")
+
+
+class MultiHost:
+    """Run every attached Arduino from a single asyncio event loop.
+
+    Serial fds are watched with loop.add_reader, so each extra board adds a
+    session object and a file descriptor but no threads or processes.
+    """
+
+    RESCAN_INTERVAL = 30   # seconds between looking for newly attached boards
+    STATUS_INTERVAL = 60
+    RECONNECT_AFTER = ConnectionSupervisor.RECONNECT_AFTER
+    # Lines a client may fall behind before it is dropped, as in the single-board daemon
+    OUTBOX_LIMIT = 1000
+
+    def __init__(self, base_dir=None, host=CONTROLLER_HOST, port=MULTI_HOST_PORT):
+        self.base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+        self.devices_dir = os.path.join(self.base_dir, "hydro_dashboard", "devices")
+        self.listen_host = host
+        self.listen_port = port
+        self.sessions = {}   # device id -> DeviceSession
+        self._probing = set()  # ports being opened
+        self._clients = {}  # asyncio StreamWriter of each attached client -> its outbox queue
+
+    async def run(self):
+        server = await asyncio.start_server(self._handle_client, self.listen_host, self.listen_port)
+        print(f"[INFO] Multi-device host listening for clients on {self.listen_host}:{self.listen_port}")
+        async with server:
+            await asyncio.gather(
+                self._every(self.RESCAN_INTERVAL, self.rescan),
+                self._every(self.STATUS_INTERVAL, self.write_status),
+                self._every(ClockSync.QUERY_INTERVAL, self.query_clocks, delay=ClockSync.QUERY_INTERVAL),
+            )
+
+    async def _every(self, interval, job, delay=0):
+        await asyncio.sleep(delay)
+        while True:
+            try:
+                result = job()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                print(f"[ERROR] {job.__name__} failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def rescan(self):
+        """Open any candidate port not already in use, all handshakes running concurrently."""
+        # Drop boards that have gone silent; the next scan reopens them
+        now = time.monotonic()
+        for session in list(self.sessions.values()):
+            if session.last_line_time and now - session.last_line_time > self.RECONNECT_AFTER:
+                print(f"[WARN] [{session.device_id}] No data for {now - session.last_line_time:.0f} seconds. Reconnecting...")
+                session.close()
+
+        in_use = {session.port for session in self.sessions.values()} | self._probing
+        ports = [port for port in find_candidate_ports() if port not in in_use]
+        if ports:
+            ids = port_device_ids()
+            await asyncio.gather(*(self._open_port(port, ids.get(port)) for port in ports))
+
+    async def _open_port(self, port, device_id):
+        device_id = device_id or DEVICE_ID.sub("_", os.path.basename(port))
+        if device_id in self.sessions:
+            return
+        try:
+            arduino = serial.Serial(port, BAUD_RATE, timeout=0)  # Non-blocking; the loop tells us when to read
+        except Exception:
+            return
+        self._probing.add(port)
+        session = DeviceSession(self, device_id, port, arduino)
+        self.sessions[device_id] = session
+        try:
+            await session.open()
+        finally:
+            self._probing.discard(port)
+
+    def device_closed(self, session):
+        if self.sessions.get(session.device_id) is session:
+            del self.sessions[session.device_id]
+
+    def send(self, device_id, command):
+        session = self.sessions.get(device_id)
+        if not session:
+            print(f"⚠ Unknown device {device_id}, dropping command: {command.strip()}")
+            return False
+        return session.send(command if command.endswith("\n") else command + "\n")
+
+    def query_clocks(self):
+        for session in list(self.sessions.values()):
+            if session.connected:
+                session.clock_sync.query()
+
+    def write_status(self):
+        """Write each device's status.json and an index of all devices."""
+        index = {}
+        for device_id, session in list(self.sessions.items()):
+            session.write_status()
+            index[device_id] = {"port": session.port, "connected": session.connected}
+        try:
+            os.makedirs(self.devices_dir, exist_ok=True)
+            with open(os.path.join(self.devices_dir, "index.json"), "w") as f:
+                json.dump({"timestamp": datetime.now().isoformat(), "devices": index}, f)
+        except Exception as e:
+            print(f"[ERROR] ❌ Failed to write device index: {e}")
+
+    def broadcast(self, line):
+        data = f"{line}\n".encode()
+        for writer, outbox in list(self._clients.items()):
+            try:
+                outbox.put_nowait(data)
+            except asyncio.QueueFull:
+                self._drop_client(writer, f"more than {self.OUTBOX_LIMIT} lines behind")
+
+    def _drop_client(self, writer, reason):
+        if self._clients.pop(writer, None) is None:
+            return
+        print(f"⚠ Dropping client {writer.get_extra_info('peername')}: {reason}")
+        # Abort rather than close, so anything still buffered for it is discarded now
+        writer.transport.abort()
+
+    async def _write_client(self, writer, outbox):
+        """Send queued lines to one client, waiting for each to drain so buffers stay bounded."""
+        try:
+            while True:
+                writer.write(await outbox.get())
+                await writer.drain()
+        except (ConnectionError, OSError) as e:
+            self._drop_client(writer, e)
+
+    async def _handle_client(self, reader, writer):
+        outbox = asyncio.Queue(maxsize=self.OUTBOX_LIMIT)
+        self._clients[writer] = outbox
+        sender = asyncio.create_task(self._write_client(writer, outbox))
+        print(f"[INFO] Client attached from {writer.get_extra_info('peername')}")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                device_id, _, command = raw.decode(errors="replace").strip().partition(" ")
+                if command:
+                    self.send(device_id, command)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            sender.cancel()
+            self._clients.pop(writer, None)
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several hydroponics Arduinos from one process.")
+    parser.add_argument("--host", default=CONTROLLER_HOST, help="Address to accept clients on")
+    parser.add_argument("--port", type=int, default=MULTI_HOST_PORT, help="Port to accept clients on")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(MultiHost(host=args.host, port=args.port).run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,121 @@
+import os
 import serial
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from serial.tools import list_ports
 from datetime import datetime
 
+# USB vendor/product IDs of genuine Arduino boards and the usual clone USB-serial chips.
+# A product ID of None matches any product from that vendor.
+ARDUINO_USB_IDS = [
+    (0x2341, None),    # Arduino SA
+    (0x2A03, None),    # Arduino.org
+    (0x1A86, 0x7523),  # CH340
+    (0x0403, 0x6001),  # FTDI FT232R
+    (0x10C4, 0xEA60),  # Silicon Labs CP210x
+]
+# Only probed when no port matches the IDs above (e.g. list_ports lacks USB info)
+FALLBACK_PORTS = ["/dev/ttyACM0", "/dev/ttyACM1", "/dev/ttyUSB0", "/dev/ttyUSB1"]
+LAST_PORT_CACHE = os.path.expanduser("~/.hydromonitor_last_port")
+BAUD_RATE = 9600
+# Long enough for boards that reset when the port is opened to boot and answer
+HANDSHAKE_TIMEOUT = 3.5
+PING_INTERVAL = 0.5
+
+def find_candidate_ports():
+    """Return serial ports whose USB IDs look like an Arduino."""
+    candidates = []
+    try:
+        for info in list_ports.comports():
+            if info.vid is None:
+                continue
+            for vid, pid in ARDUINO_USB_IDS:
+                if info.vid == vid and (pid is None or info.pid == pid):
+                    candidates.append(info.device)
+                    break
+    except Exception as e:
+        print(f"⚠ Could not list serial ports: {e}")
+
+    if not candidates:
+        candidates = [port for port in FALLBACK_PORTS if os.path.exists(port)]
+    return candidates
+
+def load_last_port():
+    try:
+        with open(LAST_PORT_CACHE) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def save_last_port(port):
+    try:
+        with open(LAST_PORT_CACHE, "w") as f:
+            f.write(port)
+    except OSError as e:
+        print(f"⚠ Could not cache Arduino port: {e}")
+
+def probe_port(port, timeout=HANDSHAKE_TIMEOUT):
+    """Open a port and return it only if the device answers PING with PING_OK."""
+    try:
+        arduino = serial.Serial(port, BAUD_RATE, timeout=0.1)
+    except Exception:
+        return None
+
+    try:
+        deadline = time.monotonic() + timeout
+        next_ping = 0
+        while time.monotonic() < deadline:
+            if time.monotonic() >= next_ping:
+                arduino.write(b"PING\n")
+                next_ping = time.monotonic() + PING_INTERVAL
+            response = arduino.readline().decode(errors="ignore").strip()
+            if response == "PING_OK":
+                arduino.timeout = 2  # Timeout the listeners expect
+                return arduino
+    except Exception:
+        pass
+
+    arduino.close()
+    return None
+
+def _close_probe_result(future):
+    arduino = future.result()
+    if arduino:
+        arduino.close()
+
 def connect_to_arduino():
-    """Scan available ports and attempt to connect to the Arduino."""
-    POSSIBLE_PORTS = ["/dev/ttyACM0", "/dev/ttyACM1", "/dev/ttyUSB0", "/dev/ttyUSB1"]
-    
-    for port in POSSIBLE_PORTS:
+    """Find the Arduino: try the last good port, then probe the other candidates in parallel."""
+    candidates = find_candidate_ports()
+
+    cached_port = load_last_port()
+    if cached_port:
+        arduino = probe_port(cached_port)
+        if arduino:
+            print(f"✅ Connected to Arduino on {cached_port}")
+            return arduino
+        candidates = [port for port in candidates if port != cached_port]
+
+    if candidates:
+        pool = ThreadPoolExecutor(max_workers=len(candidates))
+        futures = {pool.submit(probe_port, port): port for port in candidates}
+        winner = None
         try:
-            arduino = serial.Serial(port, 9600, timeout=2)
-            time.sleep(2)  # Allow time for initialization
+            for future in as_completed(futures):
+                if future.result():
+                    winner = future
+                    break
+        finally:
+            # Let slower probes finish in the background and close anything they opened
+            for future in futures:
+                if future is not winner:
+                    future.add_done_callback(_close_probe_result)
+            pool.shutdown(wait=False)
+
+        if winner:
+            port = futures[winner]
+            save_last_port(port)
             print(f"✅ Connected to Arduino on {port}")
-            return arduino
-        except Exception:
-            continue  # Try the next port
+            return winner.result()
 
     print("⚠ No Arduino found.")
     return None
@@ -36,4 +36,9 @@ class StatusLogger:
                     writer.writerow(['timestamp', 'uptime', 'free_mem', 'cpu_temp'])
                 writer.writerow([timestamp, uptime, free_mem, cpu_temp])
         except Exception as e:
-            print(f"[StatusLogger] Failed to log system health: {e}")
\ No newline at end of file
+            print(f"[StatusLogger] Failed to log system health: {e}")
+
+    def log_sampled_health(self, sampler):
+        """Fill log_system_health from a SystemHealthSampler (system_health.py) sample."""
+        sample = sampler.sample()
+        self.log_system_health(sample['timestamp'], sample['uptime_s'], sample['mem_available_mb'], sample['cpu_temp_c'])
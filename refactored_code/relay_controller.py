@@ -30,6 +30,32 @@ class RelayController:
         self.send_command(cmd)
         self._update_button_color(key)
 
+    def apply(self, mapping):
+        """Switch several relays in one SET: command, e.g. {"lights_top": False, "fan_vent": True}.
+
+        Keys may be relay names or device codes. Relays already in the requested
+        state are left out; nothing is sent if none need to change.
+        """
+        changes = {}
+        for name, state in mapping.items():
+            key = name if name in self.states else self._code_to_key(name)
+            if not key:
+                print(f"[RelayController] Unknown key: {name}")
+                return
+            if self.states[key]["state"] != bool(state):
+                changes[key] = bool(state)
+
+        if not changes:
+            return
+
+        pairs = ",".join(
+            f"{self.states[key]['device_code']}={1 if state else 0}" for key, state in changes.items()
+        )
+        self.send_command(f"SET:{pairs}\n")
+        for key, state in changes.items():
+            self.states[key]["state"] = state
+            self._update_button_color(key)
+
     def set_state_from_arduino(self, response):
         """Update relay states from Arduino RSTATE response."""
         try:
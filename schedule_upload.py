@@ -0,0 +1,258 @@
+import argparse
+import os
+import queue
+import struct
+import time
+
+from arduino_helpers import connect_to_arduino, send_command_to_arduino
+
+# Devices the firmware schedule table can drive, in the firmware's index order
+SCHEDULE_DEVICES = ("LT", "LB", "PT", "PB")
+MAX_SCHEDULE_ENTRIES = 32  # MAX_SCHEDULE_ENTRIES in ArdunioMaster.ino
+SCHEDULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule.txt")
+REPLY_TIMEOUT = 3.0  # seconds to wait for each reply from the Arduino
+
+
+def scheduled_state(entries, device, seconds):
+    """Whether the table turns device on at seconds since midnight, or None if it does not list it."""
+    listed = False
+    for entry_device, start, duration in entries:
+        if entry_device != device:
+            continue
+        listed = True
+        # Same wrap-past-midnight rule as scheduleTableState() in the firmware
+        if (seconds - start) % 86400 < duration:
+            return True
+    return False if listed else None
+
+
+def compile_schedule(path=SCHEDULE_PATH):
+    """Compile schedule.txt into a sorted list of (device, start seconds, duration seconds)."""
+    entries = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(None, 3)
+            if len(parts) < 3:
+                raise ValueError(f"{path}:{line_number}: expected DEVICE START_TIME DURATION")
+            device, start_time, duration = parts[:3]
+            if device not in SCHEDULE_DEVICES:
+                raise ValueError(f"{path}:{line_number}: unknown device {device!r}")
+            try:
+                hours, minutes = (int(x) for x in start_time.split(":"))
+                duration = int(duration)
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: bad start time or duration")
+            if not (0 <= hours < 24 and 0 <= minutes < 60) or not (0 < duration <= 86400):
+                raise ValueError(f"{path}:{line_number}: start time or duration out of range")
+            entries.append((device, hours * 3600 + minutes * 60, duration))
+
+    if len(entries) > MAX_SCHEDULE_ENTRIES:
+        raise ValueError(f"{len(entries)} entries, the Arduino holds at most {MAX_SCHEDULE_ENTRIES}")
+    # A stable order keeps an edit to one entry from shifting every index after it
+    entries.sort(key=lambda e: (SCHEDULE_DEVICES.index(e[0]), e[1], e[2]))
+    return entries
+
+
+def schedule_crc(entries):
+    """CRC-16/CCITT of a table, computed exactly as scheduleTableCrc() in the firmware."""
+    data = bytes([len(entries)]) + b"".join(
+        struct.pack("<BII", SCHEDULE_DEVICES.index(device), start, duration)
+        for device, start, duration in entries
+    )
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+            crc &= 0xFFFF
+    return crc
+
+
+def format_entry(entry):
+    device, start, duration = entry
+    return f"{device} {start // 3600:02d}:{start % 3600 // 60:02d} for {duration} s"
+
+
+class SerialLink:
+    """Talk to the Arduino directly when no controller daemon owns the port."""
+
+    def __init__(self, arduino):
+        self.arduino = arduino
+        self.arduino.reset_input_buffer()
+
+    def send(self, command):
+        send_command_to_arduino(self.arduino, command)
+
+    def read_line(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            raw = self.arduino.readline()
+            if raw:
+                return raw.decode(errors="replace").strip()
+        return None
+
+    def close(self):
+        self.arduino.close()
+
+
+class DaemonLink:
+    """Go through the running hydro_controller daemon, which keeps the serial port."""
+
+    def __init__(self, client):
+        self.client = client
+        self.lines = queue.Queue()
+        client.add_listener(self.lines.put)
+        client.start()
+        deadline = time.monotonic() + 5
+        while not client.is_connected() and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    def send(self, command):
+        self.client.send_command(command)
+
+    def read_line(self, timeout):
+        try:
+            return self.lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.client.stop()
+
+
+def wait_for(link, prefixes, timeout=REPLY_TIMEOUT):
+    """Return the first line starting with one of prefixes, skipping telemetry in between."""
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        line = link.read_line(remaining)
+        if line and line.startswith(prefixes):
+            return line
+
+
+def read_schedule(link):
+    """Read back the Arduino's table. Returns (entries, crc) or None on timeout."""
+    link.send("SCHED_GET\n")
+    header = wait_for(link, ("SCHED:",))
+    if not header:
+        return None
+    count, crc = header.split(":", 1)[1].split(",")
+    entries = [None] * int(count)
+    for _ in range(int(count)):
+        line = wait_for(link, ("SCHED_ENTRY:",))
+        if not line:
+            return None
+        index, device, start, duration = line.split(":", 1)[1].split(",")
+        entries[int(index)] = (device, int(start), int(duration))
+    return entries, int(crc, 16)
+
+
+def upload_schedule(link, entries):
+    """Send only the entries that differ from the Arduino's table, then commit and verify."""
+    current = read_schedule(link)
+    if current is None:
+        print("❌ No schedule readback from Arduino. Is the firmware up to date?")
+        return False
+    current_entries, current_crc = current
+    expected_crc = schedule_crc(entries)
+    if current_entries == entries and current_crc == expected_crc:
+        print(f"✅ Arduino schedule already up to date ({len(entries)} entries, CRC {expected_crc:04X}).")
+        return True
+
+    changed = [i for i, entry in enumerate(entries)
+               if i >= len(current_entries) or current_entries[i] != entry]
+    print(f"[INFO] Updating {len(changed)} of {len(entries)} entries "
+          f"(Arduino has {len(current_entries)}).")
+
+    link.send("SCHED_BEGIN\n")
+    if not wait_for(link, ("SCHED_ACK:BEGIN", "SCHED_ERR")):
+        print("❌ Arduino did not start the upload.")
+        return False
+
+    # One line in flight at a time so the Arduino's serial buffer never overflows
+    for i in changed:
+        device, start, duration = entries[i]
+        link.send(f"SCHED_SET:{i},{device},{start},{duration}\n")
+        reply = wait_for(link, ("SCHED_ACK:", "SCHED_ERR"))
+        if reply != f"SCHED_ACK:{i}":
+            print(f"❌ Entry {i} ({format_entry(entries[i])}) rejected: {reply or 'no reply'}")
+            return False
+
+    if len(entries) != len(current_entries):
+        link.send(f"SCHED_LEN:{len(entries)}\n")
+        if wait_for(link, ("SCHED_ACK:LEN", "SCHED_ERR")) != "SCHED_ACK:LEN":
+            print("❌ Arduino rejected the new table length.")
+            return False
+
+    link.send(f"SCHED_COMMIT:{expected_crc:04X}\n")
+    reply = wait_for(link, ("SCHED_OK:", "SCHED_ERR"))
+    if not reply or not reply.startswith("SCHED_OK:"):
+        print(f"❌ Commit failed: {reply or 'no reply'}. The Arduino kept its previous schedule.")
+        return False
+
+    readback = read_schedule(link)
+    if readback != (entries, expected_crc):
+        print("❌ Readback does not match the uploaded schedule.")
+        return False
+    print(f"✅ Schedule uploaded and verified ({len(entries)} entries, CRC {expected_crc:04X}).")
+    return True
+
+
+def clear_schedule(link):
+    link.send("SCHED_CLEAR\n")
+    if wait_for(link, ("SCHED_OK:",)):
+        print("✅ Schedule table cleared. The Arduino is back on its built-in schedule.")
+        return True
+    print("❌ No confirmation from Arduino.")
+    return False
+
+
+def open_link():
+    """Use the controller daemon if it is running, otherwise open the serial port."""
+    # Imported here so the controller can use compile_schedule() without a circular import
+    from controller_client import ControllerClient
+
+    if ControllerClient.daemon_available():
+        print("[INFO] Uploading through the running controller.")
+        return DaemonLink(ControllerClient())
+    arduino = connect_to_arduino()
+    return SerialLink(arduino) if arduino else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload schedule.txt to the Arduino.")
+    parser.add_argument("path", nargs="?", default=SCHEDULE_PATH, help="Schedule file to upload")
+    parser.add_argument("--dry-run", action="store_true", help="Compile and print the table without uploading")
+    parser.add_argument("--clear", action="store_true", help="Remove the uploaded table from the Arduino")
+    args = parser.parse_args()
+
+    entries = []
+    if not args.clear:
+        try:
+            entries = compile_schedule(args.path)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not compile schedule: {e}")
+            return 1
+        for i, entry in enumerate(entries):
+            print(f"  {i:2d}  {format_entry(entry)}")
+        print(f"[INFO] {len(entries)} entries, CRC {schedule_crc(entries):04X}")
+        if args.dry_run:
+            return 0
+
+    link = open_link()
+    if not link:
+        return 1
+    try:
+        ok = clear_schedule(link) if args.clear else upload_schedule(link, entries)
+    finally:
+        link.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+class Scheduler:
+    """Run periodic jobs on a single background thread, timed with the monotonic clock.
+
+    Jobs run on the scheduler thread unless marked blocking; blocking jobs
+    (network uploads, camera captures) go to a small worker pool so they
+    cannot delay the others. A blocking job still running when it comes due
+    again is skipped rather than queued behind itself.
+    """
+
+    def __init__(self, workers=2):
+        self._jobs = []
+        self._all_jobs = []
+        self._counter = itertools.count()
+        self._wakeup = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._workers = workers
+        self._pool = None
+
+    def every(self, interval, func, delay=None, name=None, jitter=0, blocking=False):
+        """Run func every interval seconds, first after delay seconds (defaults to now).
+
+        jitter adds a random 0..jitter seconds to each run, so jobs sharing an
+        interval do not all fire on the same tick.
+        """
+        job = self._new_job(func, name, interval, jitter, blocking)
+        job["base"] = time.monotonic() + (delay if delay is not None else 0)
+        self._push(job["base"] + self._jitter(job), job)
+        return job
+
+    def aligned(self, interval, func, offset=0, name=None, jitter=0, blocking=False):
+        """Run func whenever local time of day is offset plus a multiple of interval seconds.
+
+        interval must divide a day: 300 runs on every five-minute mark,
+        86400 with offset=9 * 3600 runs daily at 09:00. Each next run is
+        worked out from the wall clock, so runs stay on the mark instead of
+        drifting, including across clock corrections and DST changes.
+        """
+        if 86400 % interval:
+            raise ValueError(f"aligned interval {interval} does not divide a day")
+        job = self._new_job(func, name, interval, jitter, blocking)
+        job["offset"] = offset
+        self._push(self._next_aligned(job) + self._jitter(job), job)
+        return job
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="scheduler")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify()
+        if self._pool:
+            self._pool.shutdown(wait=False)
+
+    def join(self):
+        """Block until the scheduler stops, for scripts whose only work is scheduled jobs."""
+        if self._thread:
+            self._thread.join()
+
+    def stats(self):
+        """Per-job run counts, run time and lateness (start time minus due time)."""
+        result = {}
+        with self._stats_lock:
+            for job in self._all_jobs:
+                s = job["stats"]
+                result[job["name"]] = {
+                    "runs": s["runs"],
+                    "skipped": s["skipped"],
+                    "failures": s["failures"],
+                    "run_ms_avg": round(s["run_total"] / s["runs"] * 1000, 1) if s["runs"] else None,
+                    "run_ms_max": round(s["run_max"] * 1000, 1),
+                    "late_ms_avg": round(s["late_total"] / s["starts"] * 1000, 1) if s["starts"] else None,
+                    "late_ms_max": round(s["late_max"] * 1000, 1),
+                }
+        return result
+
+    def _new_job(self, func, name, interval, jitter, blocking):
+        job = {
+            "name": name or func.__name__,
+            "func": func,
+            "interval": interval,
+            "jitter": jitter,
+            "blocking": blocking,
+            "future": None,
+            "stats": {"runs": 0, "starts": 0, "skipped": 0, "failures": 0,
+                      "run_total": 0.0, "run_max": 0.0, "late_total": 0.0, "late_max": 0.0},
+        }
+        with self._stats_lock:
+            self._all_jobs.append(job)
+        return job
+
+    def _push(self, due, job):
+        with self._wakeup:
+            heapq.heappush(self._jobs, (due, next(self._counter), job))
+            self._wakeup.notify()
+
+    @staticmethod
+    def _jitter(job):
+        return random.uniform(0, job["jitter"]) if job["jitter"] else 0
+
+    @staticmethod
+    def _next_aligned(job, after=None):
+        """Monotonic time of the first aligned mark later than `after` (a wall-clock time)."""
+        wall_now = time.time()
+        reference = datetime.fromtimestamp(after if after is not None else wall_now)
+        midnight = reference.replace(hour=0, minute=0, second=0, microsecond=0)
+        since_midnight = (reference - midnight).total_seconds()
+        steps = math.floor((since_midnight - job["offset"]) / job["interval"]) + 1
+        mark = midnight + timedelta(seconds=job["offset"] + steps * job["interval"])
+        return time.monotonic() + (mark.timestamp() - wall_now)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while self._running and (not self._jobs or self._jobs[0][0] > time.monotonic()):
+                    timeout = self._jobs[0][0] - time.monotonic() if self._jobs else None
+                    self._wakeup.wait(timeout)
+                if not self._running:
+                    return
+                due, _, job = heapq.heappop(self._jobs)
+
+            started = time.monotonic()
+            if job["blocking"]:
+                if job["future"] is not None and not job["future"].done():
+                    with self._stats_lock:
+                        job["stats"]["skipped"] += 1
+                else:
+                    self._record_start(job, started - due)
+                    job["future"] = self._pool.submit(self._execute, job)
+            else:
+                self._record_start(job, started - due)
+                self._execute(job)
+
+            if "offset" in job:
+                # Past the mark just served, so an early wakeup cannot run the same mark twice
+                next_run = self._next_aligned(job, after=time.time() + min(1.0, job["interval"] / 2))
+            else:
+                # Schedule from the previous due time so intervals do not drift,
+                # but never try to catch up on runs that were missed entirely
+                job["base"] += job["interval"]
+                now = time.monotonic()
+                if job["base"] <= now:
+                    job["base"] = now + job["interval"]
+                next_run = job["base"]
+            self._push(next_run + self._jitter(job), job)
+
+    def _record_start(self, job, lateness):
+        with self._stats_lock:
+            s = job["stats"]
+            s["starts"] += 1
+            s["late_total"] += lateness
+            s["late_max"] = max(s["late_max"], lateness)
+
+    def _execute(self, job):
+        started = time.monotonic()
+        failed = False
+        try:
+            job["func"]()
+        except Exception as e:
+            failed = True
+            print(f"[Scheduler] Job '{job['name']}' failed: {e}")
+        elapsed = time.monotonic() - started
+        with self._stats_lock:
+            s = job["stats"]
+            s["runs"] += 1
+            s["failures"] += failed
+            s["run_total"] += elapsed
+            s["run_max"] = max(s["run_max"], elapsed)
@@ -0,0 +1,125 @@
+import math
+import time
+from collections import deque
+
+# Values the firmware sends instead of a reading: -1 when a DHT or DS18B20
+# read returns NaN, -127 when a DS18B20 is disconnected
+SENTINELS = (-1, -127)
+
+
+class ChannelFilter:
+    """Clean one sensor channel sample by sample with constant-time state.
+
+    Each sample goes through: sentinel/range check -> median-of-k spike
+    rejection -> rate-of-change limit -> EWMA. Missing samples are tracked
+    as gaps. During a short gap the last clean value is held; after
+    hold_for seconds the channel reports None until readings return.
+    """
+
+    def __init__(self, valid_range, spike_threshold, max_rate, window=5, alpha=0.5, hold_for=60):
+        self.valid_range = valid_range
+        self.spike_threshold = spike_threshold  # distance from the window median that counts as a spike
+        self.max_rate = max_rate                # largest believable change per second
+        self.alpha = alpha
+        self.hold_for = hold_for
+        self._window = deque(maxlen=window)
+
+        self.value = None        # latest clean value
+        self._last_sample = None  # last sample after spike and rate limiting, before smoothing
+        self._last_time = None
+        self._gap_started = None
+        self.counters = {"samples": 0, "missing": 0, "spikes": 0, "rate_limited": 0, "gaps": 0}
+        self.longest_gap = 0.0
+
+    def update(self, raw, now=None):
+        """Feed one raw reading and return the clean value (None while there is no data)."""
+        now = time.monotonic() if now is None else now
+        self.counters["samples"] += 1
+
+        if not self._is_valid(raw):
+            self.counters["missing"] += 1
+            if self._gap_started is None:
+                self._gap_started = now
+                self.counters["gaps"] += 1
+            gap = now - self._gap_started
+            self.longest_gap = max(self.longest_gap, gap)
+            if gap > self.hold_for:
+                self.value = self._last_sample = None
+                self._window.clear()
+            return self.value
+        self._gap_started = None
+
+        raw = float(raw)
+        self._window.append(raw)
+        sample = raw
+        if len(self._window) == self._window.maxlen:
+            median = sorted(self._window)[len(self._window) // 2]
+            if abs(raw - median) > self.spike_threshold:
+                self.counters["spikes"] += 1
+                sample = median
+
+        if self.value is None:
+            self.value = sample
+        else:
+            dt = max(now - self._last_time, 1e-3)
+            limit = self.max_rate * dt
+            if abs(sample - self._last_sample) > limit:
+                self.counters["rate_limited"] += 1
+                sample = self._last_sample + math.copysign(limit, sample - self._last_sample)
+            self.value += self.alpha * (sample - self.value)
+        self._last_sample = sample
+        self._last_time = now
+        return self.value
+
+    def _is_valid(self, raw):
+        if raw is None:
+            return False
+        try:
+            raw = float(raw)
+        except (TypeError, ValueError):
+            return False  # e.g. "--" from a missing reading
+        if math.isnan(raw) or raw in SENTINELS:
+            return False
+        low, high = self.valid_range
+        return low <= raw <= high
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats["in_gap"] = self._gap_started is not None
+        stats["longest_gap_s"] = round(self.longest_gap, 1)
+        return stats
+
+
+class SensorFilter:
+    """Per-channel cleaning for parsed SSTATE readings (see parse_sensor_state)."""
+
+    # field: (valid range, spike threshold, max change per second)
+    CHANNELS = {
+        "temp_indoor": ((-20, 60), 5.0, 0.1),
+        "humid_indoor": ((0, 100), 15.0, 1.0),
+        "temp_outdoor": ((-20, 60), 5.0, 0.1),
+        "humid_outdoor": ((0, 100), 15.0, 1.0),
+        "water_temp_top": ((-5, 50), 3.0, 0.05),
+        "water_temp_bottom": ((-5, 50), 3.0, 0.05),
+    }
+
+    def __init__(self):
+        self.channels = {
+            field: ChannelFilter(valid_range, spike, rate)
+            for field, (valid_range, spike, rate) in self.CHANNELS.items()
+        }
+
+    def update(self, sensor_state, now=None):
+        """Return a copy of sensor_state with cleaned values (None where there is no data).
+
+        Fields without a filter, such as the float switches, pass through unchanged.
+        """
+        now = time.monotonic() if now is None else now
+        cleaned = dict(sensor_state)
+        for field, channel in self.channels.items():
+            if field in sensor_state:
+                cleaned[field] = channel.update(sensor_state[field], now)
+        return cleaned
+
+    def stats(self):
+        return {field: channel.stats() for field, channel in self.channels.items()}
@@ -1,22 +1,6 @@
-import serial
 import time
 from datetime import datetime
-
-def connect_to_arduino():
-    """Scan available ports and attempt to connect to the Arduino."""
-    POSSIBLE_PORTS = ["/dev/ttyACM0", "/dev/ttyACM1", "/dev/ttyUSB0", "/dev/ttyUSB1", "/dev/tty.usbmodem1101"]
-    
-    for port in POSSIBLE_PORTS:
-        try:
-            arduino = serial.Serial(port, 9600, timeout=2)
-            time.sleep(2)  # Allow Arduino to reboot and settle
-            print(f"✅ Connected to Arduino on {port}")
-            return arduino
-        except Exception:
-            continue
-
-    print("⚠ No Arduino found.")
-    return None
+from arduino_helpers import connect_to_arduino
 
 def send_time_and_confirm():
     now = datetime.now()
@@ -0,0 +1,226 @@
+import argparse
+import math
+import os
+import struct
+import sys
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+
+from arduino_helpers import RELAY_CODES, SENSOR_FIELDS
+from sensor_filter import SensorFilter
+
+try:
+    import numpy as np
+except ImportError:  # Readers fall back to memoryview rows
+    np = None
+
+DEFAULT_NAME = "hydromonitor_samples"
+DEFAULT_CAPACITY = 8640  # a day of SSTATE reports at the normal 10 s rate
+
+CLEAN_FIELDS = [f"{field}_clean" for field in SensorFilter.CHANNELS]
+# Every sample is one row of float64s in this order; NaN marks an unknown value
+FIELDS = ["time"] + SENSOR_FIELDS + CLEAN_FIELDS + ["relays"]
+
+MAGIC = b"HYR1"
+# magic, fields per row, capacity, generation, head (samples written so far)
+HEADER = struct.Struct("<4sIQQQ")
+GENERATION = struct.Struct("<Q")
+GENERATION_OFFSET = 16
+HEAD_OFFSET = 24
+WRITER_PID = struct.Struct("<Q")
+WRITER_PID_OFFSET = 32
+DATA_OFFSET = 64
+ROW = struct.Struct(f"<{len(FIELDS)}d")
+
+
+def relay_bits(relay_states):
+    """Pack {key: bool or None} (HydroController.relay_states) into a bitmask in RELAY_CODES order."""
+    if all(state is None for state in relay_states.values()):
+        return math.nan
+    bits = 0
+    for bit, key in enumerate(RELAY_CODES.values()):
+        if relay_states.get(key):
+            bits |= 1 << bit
+    return bits
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+
+class SampleRing:
+    """Recent parsed samples in shared memory, for other processes to read without parsing files.
+
+    The controller creates the ring and publish()es every sensor sample;
+    readers attach by name. Each row is written twice, at slot and slot +
+    capacity, so the latest n rows are always contiguous and latest()
+    returns them as a single view of the shared buffer (a NumPy array when
+    NumPy is installed) without copying.
+
+    The writer makes the generation odd while it writes and even again when
+    done; a reader retries until it sees the same even generation before
+    and after reading the head. Rows are only rewritten capacity samples
+    later, so a view of n rows stays valid for capacity - n further
+    samples; intact() says whether it still is.
+
+    The writer's PID is kept in the header. A second writer (e.g. a
+    standalone GUI next to the daemon) only takes over a segment whose
+    writer has exited, and otherwise fails with FileExistsError.
+    """
+
+    def __init__(self, name=DEFAULT_NAME, capacity=DEFAULT_CAPACITY, create=False):
+        self.name = name
+        self.writer = create
+        if create:
+            self.shm = self._create(name, capacity)
+        else:
+            self.shm = self._attach(name)
+        magic, fields, self.capacity, _, _ = HEADER.unpack_from(self.shm.buf)
+        if magic != MAGIC or fields != len(FIELDS):
+            self.shm.close()
+            raise ValueError(f"shared memory '{name}' is not a sample ring with this layout")
+        self.row_size = ROW.size
+
+    @staticmethod
+    def _size(capacity):
+        return DATA_OFFSET + 2 * capacity * ROW.size
+
+    def _create(self, name, capacity):
+        size = self._size(capacity)
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            old = self._attach(name)
+            pid = self._writer_pid(old)
+            old.close()
+            if pid is not None and pid != os.getpid() and _process_alive(pid):
+                raise FileExistsError(f"sample ring '{name}' is in use by process {pid}")
+            # Left behind by a controller that did not shut down cleanly
+            old.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        HEADER.pack_into(shm.buf, 0, MAGIC, len(FIELDS), capacity, 0, 0)
+        WRITER_PID.pack_into(shm.buf, WRITER_PID_OFFSET, os.getpid())
+        return shm
+
+    @staticmethod
+    def _writer_pid(shm):
+        if shm.size < DATA_OFFSET or bytes(shm.buf[:4]) != MAGIC:
+            return None
+        return WRITER_PID.unpack_from(shm.buf, WRITER_PID_OFFSET)[0] or None
+
+    @staticmethod
+    def _attach(name):
+        try:
+            return shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # Before Python 3.13 an attaching process registers the segment
+            # and would unlink it on exit, removing it for everyone
+            shm = shared_memory.SharedMemory(name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+            return shm
+
+    # --- Writer -------------------------------------------------------------
+
+    def publish(self, sensor_state, cleaned=None, relay_states=None, now=None):
+        """Append one sample: raw readings, the SensorFilter output and the relay states."""
+        cleaned = cleaned or {}
+        row = [time.time() if now is None else now]
+        for field in SENSOR_FIELDS:
+            value = sensor_state.get(field)
+            row.append(math.nan if value is None else value)
+        for field in SensorFilter.CHANNELS:
+            value = cleaned.get(field)
+            row.append(math.nan if value is None else value)
+        row.append(relay_bits(relay_states) if relay_states else math.nan)
+
+        buf = self.shm.buf
+        generation, head = struct.unpack_from("<QQ", buf, GENERATION_OFFSET)
+        slot = head % self.capacity
+        GENERATION.pack_into(buf, GENERATION_OFFSET, generation + 1)
+        ROW.pack_into(buf, DATA_OFFSET + slot * self.row_size, *row)
+        ROW.pack_into(buf, DATA_OFFSET + (slot + self.capacity) * self.row_size, *row)
+        struct.pack_into("<Q", buf, HEAD_OFFSET, head + 1)
+        GENERATION.pack_into(buf, GENERATION_OFFSET, generation + 2)
+
+    # --- Readers ------------------------------------------------------------
+
+    @property
+    def head(self):
+        return struct.unpack_from("<Q", self.shm.buf, HEAD_OFFSET)[0]
+
+    def latest(self, n=None, retries=100):
+        """Return (rows, head): a view of the newest n rows (columns as in FIELDS), oldest first.
+
+        n is capped at capacity - 1 and at the number of samples written.
+        Keep head to check the view with intact() after using it.
+        """
+        limit = self.capacity - 1 if n is None else min(n, self.capacity - 1)
+        for _ in range(retries):
+            generation, head = struct.unpack_from("<QQ", self.shm.buf, GENERATION_OFFSET)
+            if generation % 2 == 0:
+                count = min(limit, head)
+                start = (head - count) % self.capacity
+                if GENERATION.unpack_from(self.shm.buf, GENERATION_OFFSET)[0] == generation:
+                    return self._rows(start, count), head
+            time.sleep(0)  # Writer mid-update; let it finish
+        raise TimeoutError(f"sample ring '{self.name}' stayed busy")
+
+    def intact(self, head, n):
+        """True while a view from latest() (returned with head, n rows long) has not been overwritten."""
+        return self.head - head <= self.capacity - 1 - n
+
+    def _rows(self, start, count):
+        offset = DATA_OFFSET + start * self.row_size
+        if np is not None:
+            return np.ndarray((count, len(FIELDS)), dtype="<f8", buffer=self.shm.buf, offset=offset)
+        return self.shm.buf[offset:offset + count * self.row_size].cast("d", (count, len(FIELDS)))
+
+    def stats(self):
+        return {"name": self.name, "capacity": self.capacity, "samples": self.head}
+
+    def close(self):
+        """Detach; the writer also removes the segment. Release any views from latest() first."""
+        self.shm.close()
+        if self.writer:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the latest samples from the controller's shared-memory ring.")
+    parser.add_argument("-n", type=int, default=10, help="Number of samples")
+    parser.add_argument("--name", default=DEFAULT_NAME, help="Shared memory name")
+    args = parser.parse_args()
+
+    try:
+        ring = SampleRing(args.name)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Could not attach to sample ring: {e}", file=sys.stderr)
+        return 1
+
+    rows, head = ring.latest(args.n)
+    lines = [",".join(FIELDS)]
+    for row in rows.tolist():
+        row[0] = datetime.fromtimestamp(row[0]).isoformat(timespec="seconds")
+        lines.append(",".join(str(value) for value in row))
+    intact = ring.intact(head, len(lines) - 1)
+    del rows
+    ring.close()
+    if not intact:
+        print("❌ Samples were overwritten while reading; try a smaller -n", file=sys.stderr)
+        return 1
+    print("\n".join(lines))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
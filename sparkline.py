@@ -0,0 +1,118 @@
+import math
+import threading
+import time
+import tkinter as tk
+from array import array
+
+from sensor_filter import SENTINELS
+
+
+class RingBuffer:
+    """Fixed-size float history in a preallocated array('d'); NaN marks an empty slot."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = array('d', [math.nan]) * capacity
+        self._head = 0  # slot the next value goes into
+
+    def append(self, value):
+        self._data[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+
+    def set_last(self, value):
+        self._data[self._head - 1] = value
+
+    def __iter__(self):
+        """Oldest to newest."""
+        data, head = self._data, self._head
+        for i in range(self.capacity):
+            yield data[(head + i) % self.capacity]
+
+
+class Sparkline:
+    """A small live trend chart of one or more series over the last `hours`.
+
+    Each pixel column is one time bucket holding the mean of its samples,
+    so the buffers never grow and a sample costs the same whatever the
+    history length. Every series is a single canvas line whose coordinates
+    are replaced in place through the renderer; nothing is deleted or
+    recreated. add() may be called from any thread.
+    """
+
+    PAD = 2
+
+    def __init__(self, parent, renderer, series, hours=6, width=160, height=32, bg="#eeeeee"):
+        self.renderer = renderer
+        self.width = width
+        self.height = height
+        self.bucket_seconds = hours * 3600 / width
+        self.canvas = tk.Canvas(parent, width=width, height=height, highlightthickness=0, bg=bg)
+
+        self._lock = threading.Lock()
+        self._bucket = None
+        self._series = {}
+        for name, color in series:
+            self._series[name] = {
+                "buffer": RingBuffer(width),
+                "sum": 0.0,
+                "count": 0,
+                "line": self.canvas.create_line(0, 0, 0, 0, fill=color, width=1, state="hidden"),
+            }
+        # Scale markers: the current top and bottom of the y axis
+        self._high_label = self.canvas.create_text(width - 1, 1, anchor="ne", text="", font=("Helvetica", 7), fill="gray")
+        self._low_label = self.canvas.create_text(width - 1, height - 1, anchor="se", text="", font=("Helvetica", 7), fill="gray")
+
+    def pack(self, **options):
+        self.canvas.pack(**options)
+
+    def add(self, values, now=None):
+        """Add one sample per series ({name: value}); missing and sentinel values leave a gap."""
+        now = time.time() if now is None else now
+        bucket = int(now // self.bucket_seconds)
+        with self._lock:
+            if self._bucket is None:
+                self._bucket = bucket
+                for state in self._series.values():
+                    state["buffer"].append(math.nan)
+            elif bucket != self._bucket:
+                # Start a new column, leaving empty columns for any buckets without samples
+                for _ in range(min(bucket - self._bucket, self.width)):
+                    for state in self._series.values():
+                        state["buffer"].append(math.nan)
+                        state["sum"], state["count"] = 0.0, 0
+                self._bucket = bucket
+
+            for name, value in values.items():
+                state = self._series.get(name)
+                if state is None or value is None or value in SENTINELS:
+                    continue
+                state["sum"] += value
+                state["count"] += 1
+                state["buffer"].set_last(state["sum"] / state["count"])
+            self._redraw()
+
+    def _redraw(self):
+        columns = {name: list(state["buffer"]) for name, state in self._series.items()}
+        finite = [v for values in columns.values() for v in values if not math.isnan(v)]
+        if not finite:
+            return
+        low, high = min(finite), max(finite)
+        if high - low < 1.0:
+            # Keep a minimum span so sensor noise does not fill the whole chart
+            middle = (high + low) / 2
+            low, high = middle - 0.5, middle + 0.5
+        scale = (self.height - 2 * self.PAD) / (high - low)
+
+        for name, values in columns.items():
+            coords = []
+            for x, value in enumerate(values):
+                if not math.isnan(value):
+                    coords.extend((x, self.height - self.PAD - (value - low) * scale))
+            line = self._series[name]["line"]
+            if len(coords) >= 4:
+                self.renderer.set_coords(self.canvas, line, coords)
+                self.renderer.set_item(self.canvas, line, state="normal")
+            else:
+                self.renderer.set_item(self.canvas, line, state="hidden")
+        self.renderer.set_item(self.canvas, self._high_label, text=f"{high:.0f}")
+        self.renderer.set_item(self.canvas, self._low_label, text=f"{low:.0f}")
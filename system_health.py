@@ -0,0 +1,164 @@
+import glob
+import os
+import time
+from datetime import datetime
+
+# Columns of pi_health.csv, in order; sample() returns a dict with these keys
+PI_HEALTH_FIELDS = [
+    "timestamp", "uptime_s", "cpu_pct", "iowait_pct", "mem_available_mb", "mem_used_pct", "swap_used_mb",
+    "cpu_temp_c", "cpu_freq_mhz", "throttled", "disk_read_kbps", "disk_write_kbps", "disk_busy_pct",
+]
+DEFAULT_DISK = "mmcblk0"  # the Pi's SD card
+
+# Raspberry Pi firmware throttle flags (same bits as `vcgencmd get_throttled`), newer kernels only
+THROTTLED_PATH = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+CPU_FREQ_PATH = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"
+MEMINFO_KEYS = (b"MemTotal:", b"MemAvailable:", b"SwapTotal:", b"SwapFree:")
+
+
+class SystemHealthSampler:
+    """Cheap periodic readings of the Pi's CPU, memory, temperature and SD card activity.
+
+    The /proc and /sys files are opened once and re-read in place with
+    pread, so a sample costs a few small reads and no open/close. Rates
+    (CPU use, disk throughput) are worked out from the previous sample, so
+    the first sample leaves them as None. Readings that do not exist on
+    this machine (e.g. not a Pi, or not Linux) are None as well.
+    """
+
+    def __init__(self, disk=DEFAULT_DISK):
+        self.disk = disk.encode()
+        self._fds = {}
+        for name, path in (("stat", "/proc/stat"), ("meminfo", "/proc/meminfo"), ("uptime", "/proc/uptime"),
+                           ("diskstats", "/proc/diskstats"), ("freq", CPU_FREQ_PATH),
+                           ("throttled", THROTTLED_PATH)):
+            self._open(name, path)
+        self._thermal = [fd for fd in (self._open_fd(path) for path in
+                                       sorted(glob.glob("/sys/class/thermal/thermal_zone*/temp"))) if fd is not None]
+        if "stat" not in self._fds:
+            print("⚠ /proc not available; Pi health readings will be empty")
+        self._last_cpu = None   # (busy, iowait, total) jiffies
+        self._last_disk = None  # (time.monotonic(), sectors read, sectors written, ms doing I/O)
+        self.last = None
+
+    @staticmethod
+    def _open_fd(path):
+        try:
+            return os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+
+    def _open(self, name, path):
+        fd = self._open_fd(path)
+        if fd is not None:
+            self._fds[name] = fd
+
+    def _read(self, name, size=512):
+        fd = self._fds.get(name)
+        if fd is None:
+            return None
+        try:
+            return os.pread(fd, size, 0)
+        except OSError:
+            return None
+
+    def sample(self, now=None):
+        now = time.monotonic() if now is None else now
+        sample = dict.fromkeys(PI_HEALTH_FIELDS)
+        sample["timestamp"] = datetime.now().isoformat(timespec="seconds")
+
+        data = self._read("uptime", 64)
+        if data:
+            sample["uptime_s"] = round(float(data.split(None, 1)[0]))
+
+        self._sample_cpu(sample)
+        self._sample_memory(sample)
+        self._sample_disk(sample, now)
+
+        temps = []
+        for fd in self._thermal:
+            try:
+                temps.append(int(os.pread(fd, 16, 0)) / 1000)
+            except (OSError, ValueError):
+                pass
+        if temps:
+            sample["cpu_temp_c"] = max(temps)
+
+        data = self._read("freq", 32)
+        if data:
+            sample["cpu_freq_mhz"] = int(data) // 1000
+        data = self._read("throttled", 32)
+        if data:
+            sample["throttled"] = f"0x{int(data, 16):x}"
+
+        self.last = sample
+        return sample
+
+    def _sample_cpu(self, sample):
+        # First line only: "cpu  user nice system idle iowait irq softirq steal ..."
+        data = self._read("stat", 256)
+        if not data:
+            return
+        values = [int(v) for v in data.split(b"\n", 1)[0].split()[1:9]]
+        idle, iowait = values[3], values[4]
+        total = sum(values)
+        current = (total - idle - iowait, iowait, total)
+        if self._last_cpu is not None:
+            elapsed = current[2] - self._last_cpu[2]
+            if elapsed > 0:
+                sample["cpu_pct"] = round((current[0] - self._last_cpu[0]) / elapsed * 100, 1)
+                sample["iowait_pct"] = round((current[1] - self._last_cpu[1]) / elapsed * 100, 1)
+        self._last_cpu = current
+
+    def _sample_memory(self, sample):
+        data = self._read("meminfo", 2048)
+        if not data:
+            return
+        values = {}
+        for line in data.split(b"\n"):
+            if line.startswith(MEMINFO_KEYS):
+                key, value = line.split()[:2]
+                values[key] = int(value)  # kB
+                if len(values) == len(MEMINFO_KEYS):
+                    break
+        total, available = values.get(b"MemTotal:"), values.get(b"MemAvailable:")
+        if total and available is not None:
+            sample["mem_available_mb"] = available // 1024
+            sample["mem_used_pct"] = round((total - available) / total * 100, 1)
+        if b"SwapTotal:" in values and b"SwapFree:" in values:
+            sample["swap_used_mb"] = (values[b"SwapTotal:"] - values[b"SwapFree:"]) // 1024
+
+    def _sample_disk(self, sample, now):
+        data = self._read("diskstats", 8192)
+        if not data:
+            return
+        for line in data.split(b"\n"):
+            fields = line.split()
+            if len(fields) > 12 and fields[2] == self.disk:
+                # sectors read, sectors written, ms spent doing I/O
+                current = (now, int(fields[5]), int(fields[9]), int(fields[12]))
+                break
+        else:
+            return
+        if self._last_disk is not None:
+            elapsed = now - self._last_disk[0]
+            if elapsed > 0:
+                # Sectors are always 512 bytes in /proc/diskstats
+                sample["disk_read_kbps"] = round((current[1] - self._last_disk[1]) / 2 / elapsed, 1)
+                sample["disk_write_kbps"] = round((current[2] - self._last_disk[2]) / 2 / elapsed, 1)
+                sample["disk_busy_pct"] = round(min(100.0, (current[3] - self._last_disk[3]) / 10 / elapsed), 1)
+        self._last_disk = current
+
+    def row(self, sample=None):
+        """A sample as a CSV row in PI_HEALTH_FIELDS order (empty cells for missing readings)."""
+        sample = sample or self.sample()
+        return ["" if sample[field] is None else sample[field] for field in PI_HEALTH_FIELDS]
+
+    def close(self):
+        for fd in list(self._fds.values()) + self._thermal:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = {}
+        self._thermal = []
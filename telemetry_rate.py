@@ -0,0 +1,92 @@
+import threading
+import time
+
+from arduino_helpers import format_burst_command, format_rate_command, parse_rate_reply
+
+# Seconds between reports of each stream (R: RSTATE, S: SSTATE, T: TIME)
+NORMAL_RATES = {"R": 10, "S": 10, "T": 10}
+# Nobody watching: relays and sensors slow right down. TIME stays at 10 s so
+# the connection supervisor's 30 s stale check keeps working.
+IDLE_RATES = {"R": 60, "S": 60, "T": 10}
+MAX_BURST = 5 * 60  # maxBurstDuration in the firmware
+
+
+class TelemetryRates:
+    """Set the Arduino's report intervals to what its consumers currently need.
+
+    Each consumer (attached clients, climate control, ...) registers the
+    intervals it needs under a name; the Arduino is asked for the fastest
+    requested interval per stream, or IDLE_RATES when nothing is registered.
+    A RATE: command is only sent when that result changes.
+    """
+
+    def __init__(self, send, is_connected=None):
+        self.send = send  # send(command) -> bool
+        self.is_connected = is_connected
+        self._lock = threading.Lock()
+        self._requests = {}   # name -> {stream: seconds}
+        self._sent = None     # intervals last sent with RATE:
+        self.confirmed = None  # intervals from the last RATE_OK
+        self.burst_until = None
+        self.counters = {"rate_commands": 0, "bursts": 0, "errors": 0}
+
+    def request(self, name, intervals):
+        with self._lock:
+            self._requests[name] = dict(intervals)
+        self.apply()
+
+    def release(self, name):
+        with self._lock:
+            self._requests.pop(name, None)
+        self.apply()
+
+    def effective(self):
+        with self._lock:
+            rates = dict(IDLE_RATES)
+            for intervals in self._requests.values():
+                for code, interval in intervals.items():
+                    rates[code] = min(rates.get(code, interval), interval)
+            return rates
+
+    def apply(self, force=False):
+        """Send RATE: if the effective intervals changed (or always, after a reconnect)."""
+        if self.is_connected and not self.is_connected():
+            return  # Sent on connect instead
+        rates = self.effective()
+        with self._lock:
+            if not force and rates == self._sent:
+                return
+            self._sent = rates
+        if self.send(format_rate_command(rates)):
+            self.counters["rate_commands"] += 1
+        else:
+            with self._lock:
+                self._sent = None  # Retry on the next apply
+
+    def burst(self, duration, intervals):
+        """Fast reporting for diagnostics, e.g. burst(60, {"S": 1, "R": 0.5}); reverts by itself."""
+        duration = min(duration, MAX_BURST)
+        if self.send(format_burst_command(duration, intervals)):
+            self.counters["bursts"] += 1
+            return True
+        return False
+
+    def handle_reply(self, response):
+        """Track RATE_OK / BURST_OK / BURST_END / RATE_ERR lines from the Arduino."""
+        if response.startswith("RATE_OK:"):
+            self.confirmed = parse_rate_reply(response)
+        elif response.startswith("BURST_OK:"):
+            self.burst_until = time.monotonic() + int(response.split(":", 1)[1]) / 1000
+        elif response == "BURST_END":
+            self.burst_until = None
+        elif response.startswith("RATE_ERR:"):
+            self.counters["errors"] += 1
+            print(f"⚠ Arduino rejected a rate change: {response}")
+
+    def stats(self):
+        with self._lock:
+            consumers = sorted(self._requests)
+        stats = dict(self.counters, consumers=consumers, requested=self.effective(), confirmed=self.confirmed)
+        if self.burst_until is not None:
+            stats["burst_remaining_s"] = max(0, round(self.burst_until - time.monotonic()))
+        return stats
@@ -41,36 +41,88 @@ exports.getStatus = functions.https.onRequest((req, res) => {
 });
 
 // Get sensor history
+const HISTORY_FIELDS = [
+  "air_temp_indoor",
+  "air_temp_outdoor",
+  "humidity_indoor",
+  "humidity_outdoor",
+  "water_temp_top",
+  "water_temp_bottom",
+];
+
+// Last 24 hours from the packed per-day documents written by the uploader:
+// two document reads however many 5-minute samples they hold.
+async function packedHistory() {
+  const snapshot = await db
+    .collection("Daily History")
+    .orderBy("date", "desc")
+    .limit(2)
+    .get();
+  if (snapshot.empty) return null;
+
+  const since = Date.now() / 1000 - 24 * 60 * 60;
+  const packed = { t: [] };
+  HISTORY_FIELDS.forEach((field) => (packed[field] = []));
+  snapshot.docs.reverse().forEach((doc) => {
+    const day = doc.data();
+    (day.t || []).forEach((t, i) => {
+      if (t < since) return;
+      packed.t.push(t);
+      HISTORY_FIELDS.forEach((field) =>
+        packed[field].push(day[field] ? day[field][i] : null)
+      );
+    });
+  });
+  return packed.t.length ? packed : null;
+}
+
+// Previous layout: one document per 5-minute slot
+async function slotHistory() {
+  const snapshot = await db
+    .collection("Current Days Log")
+    .orderBy("timestamp")
+    .get();
+  if (snapshot.empty) return null;
+
+  return snapshot.docs.map((doc) => {
+    const data = doc.data();
+    const row = {
+      timestamp: data.timestamp ? data.timestamp : null,
+      timestamp_local:
+        data.timestamp_local !== undefined && data.timestamp_local !== null
+          ? data.timestamp_local
+          : null,
+    };
+    HISTORY_FIELDS.forEach((field) => (row[field] = data[field]));
+    return row;
+  });
+}
+
+// ?format=packed returns the columnar arrays as stored; otherwise one object per sample
 exports.getHistory = functions.https.onRequest((req, res) => {
   cors(req, res, async () => {
     try {
-      const snapshot = await db
-        .collection("Current Days Log")
-        .orderBy("timestamp")
-        .get();
+      const packed = await packedHistory();
+      if (packed) {
+        if (req.query.format === "packed") {
+          res.json(packed);
+          return;
+        }
+        res.json(
+          packed.t.map((t, i) => {
+            const row = { timestamp_local: new Date(t * 1000).toISOString() };
+            HISTORY_FIELDS.forEach((field) => (row[field] = packed[field][i]));
+            return row;
+          })
+        );
+        return;
+      }
 
-      if (snapshot.empty) {
+      const history = await slotHistory();
+      if (!history) {
         res.status(404).json({ error: "No data found" });
         return;
       }
-
-      const history = snapshot.docs.map((doc) => {
-        const data = doc.data();
-        return {
-          timestamp: data.timestamp ? data.timestamp : null,
-          timestamp_local:
-            data.timestamp_local !== undefined && data.timestamp_local !== null
-              ? data.timestamp_local
-              : null,
-          air_temp_indoor: data.air_temp_indoor,
-          air_temp_outdoor: data.air_temp_outdoor,
-          humidity_indoor: data.humidity_indoor,
-          humidity_outdoor: data.humidity_outdoor,
-          water_temp_top: data.water_temp_top,
-          water_temp_bottom: data.water_temp_bottom,
-        };
-      });
-
       res.json(history);
     } catch (error) {
       res.status(500).json({ error: error.message });